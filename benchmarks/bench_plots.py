@@ -0,0 +1,44 @@
+"""
+Sensitivity sweeps behind the plot page and the heatmap grid. The default
+sweep and the heatmap grids are cached after the first call, so they are
+timed both cold (cache cleared before every round) and warm.
+"""
+import pytest
+
+from adaptive_heatmap import adaptive_field
+from heatmap_field import _heatmap_grid, heatmap_grid
+from norwood_plots import _default_sensitivity_sweep, yaxis_class1, yaxis_class2
+
+
+@pytest.mark.parametrize("output", ["Q_s", "P_v"])
+def bench_yaxis_class1_cold(benchmark, output):
+    benchmark.pedantic(yaxis_class1, args=(output,), setup=_default_sensitivity_sweep.cache_clear, rounds=50)
+
+
+@pytest.mark.parametrize("output", ["S_m", "OD2"])
+def bench_yaxis_class2_cold(benchmark, output):
+    benchmark.pedantic(yaxis_class2, args=(output,), setup=_default_sensitivity_sweep.cache_clear, rounds=50)
+
+
+def bench_yaxis_class1_warm(benchmark):
+    _default_sensitivity_sweep()
+    benchmark(yaxis_class1, "Q_s")
+
+
+def bench_yaxis_class2_warm(benchmark):
+    _default_sensitivity_sweep()
+    benchmark(yaxis_class2, "OD2")
+
+
+def bench_heatmap_grid_cold(benchmark):
+    benchmark.pedantic(heatmap_grid, args=("R_s", "R_p"), setup=_heatmap_grid.cache_clear, rounds=50)
+
+
+def bench_heatmap_grid_warm(benchmark):
+    heatmap_grid("R_s", "R_p")
+    benchmark(heatmap_grid, "R_s", "R_p")
+
+
+@pytest.mark.parametrize("output", ["S_sv", "Q_s"])
+def bench_adaptive_field(benchmark, output):
+    benchmark(adaptive_field, "C_sys", "C_dia", output)
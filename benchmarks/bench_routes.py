@@ -0,0 +1,124 @@
+"""
+Every Flask route end to end through the test client: parsing, solving,
+rendering and JSON encoding. Plot routes run a fixed, small number of
+rounds; sampling routes use small sample counts so a run stays short.
+"""
+import itertools
+
+import pytest
+
+from app import app, get_clinical_baseline
+from parameters import get_baseline
+
+PLOT_ROUNDS = 5
+
+SLIDER_INPUTS = get_baseline("sensitivity")
+
+
+@pytest.fixture(scope="module")
+def client():
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+def _ok(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response
+
+
+@pytest.mark.parametrize("path", ["/", "/slider_page", "/plot_page", "/timedep_page", "/heatmap_page", "/conditions_page"])
+def bench_page(benchmark, client, path):
+    benchmark(lambda: _ok(client.get(path)))
+
+
+def bench_process(benchmark, client):
+    benchmark(lambda: _ok(client.post("/process", json=SLIDER_INPUTS)))
+
+
+def bench_calculate_condition_values(benchmark, client):
+    inputs = get_clinical_baseline()
+    benchmark(lambda: _ok(client.post("/calculate_condition_values", json=inputs)))
+
+
+def bench_apply_preset(benchmark, client):
+    benchmark(lambda: _ok(client.get("/apply_preset?condition=nicardipine")))
+
+
+@pytest.mark.parametrize("plot_type", ["Q_s", "OD2"])
+def bench_generate_plot(benchmark, client, plot_type):
+    benchmark.pedantic(lambda: _ok(client.get(f"/generate_plot?plot_type={plot_type}")), rounds=PLOT_ROUNDS)
+
+
+def bench_generate_custom_plot(benchmark, client):
+    url = "/generate_custom_plot?input1=R_s&input2=R_p&output=Q_s"
+    benchmark.pedantic(lambda: _ok(client.get(url)), rounds=PLOT_ROUNDS)
+
+
+def bench_generate_adaptive_heatmap(benchmark, client):
+    url = "/generate_adaptive_heatmap?input1=C_sys&input2=C_dia&output=S_sv"
+    benchmark.pedantic(lambda: _ok(client.get(url)), rounds=PLOT_ROUNDS)
+
+
+def bench_heatmap_fields(benchmark, client):
+    benchmark(lambda: _ok(client.get("/heatmap_fields?input1=R_s&input2=R_p")))
+
+
+@pytest.mark.parametrize("plot_type", ["flows", "pressures"])
+def bench_generate_timedep_plot(benchmark, client, plot_type):
+    url = f"/generate_timedep_plot?plot_type={plot_type}&t_end=0.1&dt=0.0001"
+    benchmark.pedantic(lambda: _ok(client.get(url)), rounds=PLOT_ROUNDS)
+
+
+@pytest.mark.parametrize("method", ["sobol", "morris"])
+def bench_global_sensitivity(benchmark, client, method):
+    url = f"/global_sensitivity?method={method}&n=256&seed=0"
+    benchmark.pedantic(lambda: _ok(client.get(url)), rounds=PLOT_ROUNDS)
+
+
+def bench_uncertainty(benchmark, client):
+    body = {"model": 2, "n_samples": 20000, "seed": 0, "distributions": {"R_s": {"dist": "lognormal", "mean": 25.0, "cv": 0.2}}}
+    benchmark.pedantic(lambda: _ok(client.post("/uncertainty", json=body)), rounds=PLOT_ROUNDS)
+
+
+def bench_compare_drug_scenarios(benchmark, client):
+    body = {
+        "baseline": get_clinical_baseline(),
+        "drugs": ["nicardipine"],
+        "scenarios": [{"label": f"s{i}", "R_s_factor": 0.5 + i / 20, "R_p_factor": 1.0} for i in range(20)],
+    }
+    benchmark(lambda: _ok(client.post("/compare_drug_scenarios", json=body)))
+
+
+def bench_drug_combinations(benchmark, client):
+    body = {"baseline": get_clinical_baseline(), "max_drugs": 2, "target_qp_qs": 1.0}
+    benchmark(lambda: _ok(client.post("/drug_combinations", json=body)))
+
+
+def bench_calibrate_patient(benchmark, client):
+    body = {"inputs": get_clinical_baseline(), "observed": {"Q_s": 0.8, "Q_p": 0.9, "P_a": 60.0}}
+    benchmark.pedantic(lambda: _ok(client.post("/calibrate_patient", json=body)), rounds=PLOT_ROUNDS)
+
+
+def bench_batch_stats(benchmark, client):
+    benchmark(lambda: _ok(client.get("/batch_stats")))
+
+
+def bench_metrics(benchmark, client):
+    benchmark(lambda: _ok(client.get("/metrics")))
+
+
+def bench_heatmap_tile_cold(benchmark, client):
+    # Zoom 8 has 256 x 256 tiles, so every round requests one not yet cached
+    tiles = itertools.count()
+
+    def request_tile():
+        y, x = divmod(next(tiles), 256)
+        return _ok(client.get(f"/heatmap_tiles/R_s/R_p/S_sv/8/{x}/{y}"))
+
+    benchmark(request_tile)
+
+
+def bench_heatmap_tile_warm(benchmark, client):
+    url = "/heatmap_tiles/R_s/R_p/S_sv/2/1/1"
+    _ok(client.get(url))
+    benchmark(lambda: _ok(client.get(url)))
@@ -0,0 +1,60 @@
+"""
+Steady-state and compliance solvers, one call per round.
+"""
+import numpy as np
+
+from Norwood_Circulation_Solver_Functions import (
+    flow_pressure_solver_1,
+    flow_pressure_solver_2,
+    flow_pressure_solver_2_batch,
+    saturation_solver,
+    saturation_solver_batch,
+)
+from arterial_and_venous_compliance_solver import arterial_and_venous_compliance_solver
+from parameters import get_baseline
+from systolic_and_diastolic_compliance_solver import systolic_and_diastolic_compliance_solver
+
+# Slider page baseline (C_sys model) and conditions page baseline (EF model)
+MODEL_1 = get_baseline("sensitivity", ("C_dia", "C_sys", "C_A", "C_V", "HR", "R_p", "R_s", "V_total"))
+MODEL_2 = get_baseline("clinical", ("C_dia", "C_A", "C_V", "HR", "R_p", "R_s", "V_total", "EF"))
+
+
+def bench_flow_pressure_solver_1(benchmark):
+    benchmark(flow_pressure_solver_1, **MODEL_1)
+
+
+def bench_flow_pressure_solver_2(benchmark):
+    benchmark(flow_pressure_solver_2, **MODEL_2)
+
+
+def bench_saturation_solver(benchmark):
+    benchmark(saturation_solver, 0.59, 0.73, 15.0, 40.0)
+
+
+def bench_flow_pressure_solver_2_batch_10k(benchmark):
+    rng = np.random.default_rng(0)
+    R_s = MODEL_2["R_s"] * rng.uniform(0.5, 1.5, 10_000)
+    params = {**MODEL_2, "R_s": R_s}
+    benchmark(flow_pressure_solver_2_batch, **params)
+
+
+def bench_saturation_solver_batch_10k(benchmark):
+    rng = np.random.default_rng(0)
+    benchmark(saturation_solver_batch, rng.uniform(0.4, 0.8, 10_000), rng.uniform(0.5, 1.0, 10_000), 15.0, 40.0)
+
+
+def bench_arterial_and_venous_compliance_solver(benchmark):
+    rng = np.random.default_rng(0)
+    P_a = rng.uniform(15, 20, (50, 1))
+    P_v = rng.uniform(2, 3, (50, 1))
+    benchmark(arterial_and_venous_compliance_solver, P_a, P_v)
+
+
+def bench_systolic_and_diastolic_compliance_solver(benchmark):
+    rng = np.random.default_rng(0)
+    shape = (50, 1)
+    benchmark(
+        systolic_and_diastolic_compliance_solver,
+        rng.uniform(2, 3, shape), rng.uniform(100, 140, shape), rng.uniform(0.4, 0.5, shape),
+        rng.uniform(0.5, 0.7, shape), rng.uniform(0.6, 0.9, shape),
+    )
@@ -0,0 +1,59 @@
+"""
+Time-dependent models and the fixed-point initial condition. Each solve
+takes tenths of a second, so these run a fixed, small number of rounds.
+"""
+import pytest
+
+from fixed_point_init import generate_x0_fixed_point_ra_rv
+from parameters import get_baseline
+from time_dependent_model import SCHEMES, Q_Ao_2, time_dependent_norwood, time_dependent_norwood_valve
+
+# Defaults of /generate_timedep_plot
+CIRCUIT = dict(get_baseline("circuit"), Q_Ao=Q_Ao_2)
+
+# (t_end, dt) in minutes
+HORIZONS = [(0.1, 1e-4), (0.1, 1e-5), (0.5, 1e-4)]
+
+ROUNDS = 3
+
+# Example parameters of new_time_dependent_simulation.ipynb
+C_SA = 28.4
+C_SV = 124.0
+RA_RV_PARAMS = dict(
+    HR=70.0, dt=0.001, V_a0=23.0, V_v0=46.0, K_a=5e-4, K_v=5e-4,
+    gamma_int=5e-3, gamma_ext=3e-3, L_int=5e-3, L_ext=5e-3, B_int=3e-3, B_ext=3e-3, R_int=1e-3, R_ext=1e-3,
+    R_s=17.5, R_p=1.79, R_BTS=5.0, V_total=5186.99,
+    C_SA=C_SA, C_PA=C_SA * 7, C_SV=C_SV, C_PV=C_SV * 7,
+    E_min_a=1.2, E_max_a=12.0, t_onset_a=0.85, m_1a=3.0, tau_1a=0.11, m_2a=27.0, tau_2a=0.18,
+    E_min_v=1.2, E_max_v=120.0, t_onset_v=0.0, m_1v=3.0, tau_1v=0.27, m_2v=27.0, tau_2v=0.45,
+)
+
+
+@pytest.mark.parametrize("t_end,dt", HORIZONS)
+def bench_time_dependent_norwood(benchmark, t_end, dt):
+    benchmark.pedantic(time_dependent_norwood, kwargs=dict(CIRCUIT, t_end=t_end, dt=dt), rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("t_end,dt", HORIZONS)
+def bench_time_dependent_norwood_valve(benchmark, t_end, dt):
+    benchmark.pedantic(time_dependent_norwood_valve, kwargs=dict(CIRCUIT, t_end=t_end, dt=dt), rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("scheme", SCHEMES)
+def bench_time_dependent_norwood_valve_scheme(benchmark, scheme):
+    kwargs = dict(CIRCUIT, t_end=0.1, dt=1e-4, scheme=scheme)
+    benchmark.pedantic(time_dependent_norwood_valve, kwargs=kwargs, rounds=ROUNDS)
+
+
+def _fixed_point_iterations(params):
+    try:
+        return generate_x0_fixed_point_ra_rv(**params)
+    except RuntimeError:
+        # The notebook parameters do not converge, so this times the full
+        # max_iter iterations; the work per round is still fixed
+        return None
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def bench_generate_x0_fixed_point_ra_rv(benchmark):
+    benchmark(_fixed_point_iterations, RA_RV_PARAMS)
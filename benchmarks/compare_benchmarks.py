@@ -0,0 +1,192 @@
+"""
+Compare a pytest-benchmark JSON run against a stored baseline.
+
+Benchmarks are matched by name and compared on their median time. A
+benchmark is a regression when its median grew by more than the threshold
+(a fraction, 0.2 = 20% slower). Benchmarks present in only one file are
+listed but do not fail the check.
+
+Usage:
+    python -m pytest -c benchmarks/pytest.ini benchmarks --benchmark-json current.json
+    python benchmarks/compare_benchmarks.py compare current.json
+                                    check current.json against the stored baseline
+    python benchmarks/compare_benchmarks.py update current.json
+                                    add current.json's new benchmarks to the stored
+                                    baseline and drop those no longer run
+    python benchmarks/compare_benchmarks.py save current.json
+                                    make current.json the stored baseline
+
+Exits with status 1 if any benchmark regressed. Timings depend on the
+machine, so regenerate the baseline on the machine that runs the check.
+A change that adds or removes benchmarks should use update, which keeps
+the existing entries as the reference, rather than save.
+"""
+import argparse
+import json
+import os
+import sys
+
+DEFAULT_THRESHOLD = 0.2
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "baseline.json")
+
+
+def load_medians(path):
+    """
+    Median time in seconds of each benchmark in a --benchmark-json file.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return {bench["fullname"]: bench["stats"]["median"] for bench in data["benchmarks"]}
+
+
+def save_baseline(run_path, baseline_path=BASELINE_PATH):
+    """
+    Copy a --benchmark-json file to the baseline without the per-round
+    timings, which make up almost all of its size.
+    """
+    with open(run_path) as f:
+        data = json.load(f)
+    for bench in data["benchmarks"]:
+        bench["stats"].pop("data", None)
+
+    os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+    with open(baseline_path, "w") as f:
+        json.dump(data, f, indent=1)
+        f.write("\n")
+
+
+def update_baseline(run_path, baseline_path=BASELINE_PATH):
+    """
+    Add the benchmarks of a --benchmark-json file that the baseline lacks
+    and drop baseline benchmarks the run no longer has. Entries in both
+    keep their baseline timings.
+
+    Returns
+    -------
+    added, removed : list of str
+    """
+    with open(run_path) as f:
+        run = json.load(f)
+    with open(baseline_path) as f:
+        data = json.load(f)
+
+    current = {bench["fullname"]: bench for bench in run["benchmarks"]}
+    kept = [bench for bench in data["benchmarks"] if bench["fullname"] in current]
+    removed = [bench["fullname"] for bench in data["benchmarks"] if bench["fullname"] not in current]
+    known = {bench["fullname"] for bench in kept}
+    added = [bench for name, bench in current.items() if name not in known]
+    for bench in added:
+        bench["stats"].pop("data", None)
+
+    data["benchmarks"] = kept + added
+    with open(baseline_path, "w") as f:
+        json.dump(data, f, indent=1)
+        f.write("\n")
+    return [bench["fullname"] for bench in added], removed
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Relative change in median time of each benchmark in both runs.
+
+    Parameters
+    ----------
+    baseline, current : dict
+        Benchmark name -> median time, as returned by load_medians.
+    threshold : float, optional
+        Relative slowdown above which a benchmark counts as a regression.
+
+    Returns
+    -------
+    rows : list of dict
+        "name", "baseline", "current", "change" and "regression", sorted by
+        change (largest slowdown first).
+    missing : list of str
+        Baseline benchmarks not in the current run.
+    added : list of str
+        Current benchmarks not in the baseline.
+    """
+    if threshold < 0:
+        raise ValueError(f"threshold must be non-negative (got {threshold}).")
+
+    rows = []
+    for name in sorted(baseline.keys() & current.keys()):
+        change = current[name] / baseline[name] - 1.0
+        rows.append({
+            "name": name,
+            "baseline": baseline[name],
+            "current": current[name],
+            "change": change,
+            "regression": change > threshold,
+        })
+    rows.sort(key=lambda row: row["change"], reverse=True)
+
+    missing = sorted(baseline.keys() - current.keys())
+    added = sorted(current.keys() - baseline.keys())
+    return rows, missing, added
+
+
+def _format_time(seconds):
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compare_parser = commands.add_parser("compare", help="Check a run against the baseline.")
+    compare_parser.add_argument("current", help="--benchmark-json file of the run to check.")
+    compare_parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file (default: stored baseline).")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help=f"Relative slowdown that counts as a regression (default {DEFAULT_THRESHOLD}).")
+
+    save_parser = commands.add_parser("save", help="Store a run as the baseline.")
+    save_parser.add_argument("run", help="--benchmark-json file to store.")
+    save_parser.add_argument("--baseline", default=BASELINE_PATH, help="Where to write (default: stored baseline).")
+
+    update_parser = commands.add_parser("update", help="Add new and drop removed benchmarks, keeping the rest.")
+    update_parser.add_argument("run", help="--benchmark-json file of a full run.")
+    update_parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline to update (default: stored baseline).")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "update":
+        added, removed = update_baseline(args.run, args.baseline)
+        for name in added:
+            print(f"added to baseline: {name}")
+        for name in removed:
+            print(f"removed from baseline: {name}")
+        return 0
+
+    if args.command == "save":
+        save_baseline(args.run, args.baseline)
+        print(f"Wrote baseline {args.baseline}")
+        return 0
+
+    rows, missing, added = compare(load_medians(args.baseline), load_medians(args.current), args.threshold)
+
+    width = max((len(row["name"]) for row in rows), default=4)
+    print(f"{'name':<{width}}  {'baseline':>12}  {'current':>12}  {'change':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<{width}}  {_format_time(row['baseline']):>12}  "
+              f"{_format_time(row['current']):>12}  {100 * row['change']:>+7.1f}%{flag}")
+
+    for name in missing:
+        print(f"missing from current run: {name}")
+    for name in added:
+        print(f"not in baseline: {name}")
+
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"{len(regressions)} of {len(rows)} benchmarks regressed by more than {100 * args.threshold:.0f}%")
+        return 1
+    print(f"No regressions above {100 * args.threshold:.0f}% in {len(rows)} benchmarks")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
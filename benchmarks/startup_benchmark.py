@@ -0,0 +1,94 @@
+"""
+Cold-start import budget for the Flask app.
+
+Runs `python -X importtime -c "import app"` in fresh interpreters, reports
+the slowest imports and exits non-zero if the median cumulative import
+time of `app` exceeds the budget or if a module that should be loaded
+lazily (plotting, scipy, pandas) is imported at startup.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--budget-ms 500] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Modules that must only be imported on first use
+LAZY_MODULES = ("matplotlib", "seaborn", "scipy", "pandas")
+
+DEFAULT_BUDGET_MS = 500.0
+
+
+def measure_import(module="app"):
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+
+    Returns
+    -------
+    total_us : int
+        Cumulative import time of the module in microseconds.
+    timings : list of (int, str)
+        Cumulative time and name of every imported module.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+
+    timings = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((int(cumulative_us), name.strip()))
+
+    total_us = next(us for us, name in reversed(timings) if name == module)
+    return total_us, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum median cumulative import time of app (ms).")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts to measure.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list.")
+    args = parser.parse_args(argv)
+
+    totals = []
+    for _ in range(args.runs):
+        total_us, timings = measure_import()
+        totals.append(total_us / 1000.0)
+    median_ms = statistics.median(totals)
+
+    top_level = {}
+    for us, name in timings:
+        root = name.split(".")[0]
+        top_level[root] = max(top_level.get(root, 0), us)
+
+    print(f"app cold import: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000.0:8.1f} ms  {name}")
+
+    failures = []
+    eager = sorted(name for name in top_level if name in LAZY_MODULES)
+    if eager:
+        failures.append(f"modules imported at startup that should be lazy: {', '.join(eager)}")
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy as sp
+
+from validation import STATUS_OK, check_inputs as _check_inputs, output_status, status_counts
 
 def flow_pressure_solver_1(C_dia, C_sys, C_A, C_V, HR, R_p, R_s, V_total):
     """
@@ -288,4 +288,377 @@ def saturation_solver(Q_s, Q_p, Hb, VO2, S_pv=0.99):
     S_sv = float(x[1][0])
     DO2 = oxygen_capacity * S_m * Q_s
 
-    return S_m, S_sv, DO2
\ No newline at end of file
+    return S_m, S_sv, DO2
+
+DEFAULT_BSA = 0.25  # representative infant body surface area in m^2
+
+BSA_FORMULAS = ("mosteller", "haycock", "dubois")
+
+def body_surface_area(weight, height, formula="mosteller"):
+    """
+    Body surface area (m^2) from weight (kg) and height (cm).
+
+    Parameters
+    ----------
+    weight, height : float or array
+        Broadcast against each other.
+    formula : str, optional
+        "mosteller" (default), sqrt(W*H/3600); "haycock",
+        0.024265*W^0.5378*H^0.3964, validated down to newborns; or "dubois",
+        0.007184*W^0.425*H^0.725.
+
+    Returns
+    -------
+    bsa : float or ndarray
+        NaN where weight or height is not positive.
+    """
+    if formula not in BSA_FORMULAS:
+        raise ValueError(f"formula must be one of {BSA_FORMULAS} (got {formula}).")
+
+    weight = np.asarray(weight, dtype=float)
+    height = np.asarray(height, dtype=float)
+    valid = (weight > 0) & (height > 0)
+    W = np.where(valid, weight, np.nan)
+    H = np.where(valid, height, np.nan)
+
+    if formula == "mosteller":
+        bsa = np.sqrt(W * H / 3600.0)
+    elif formula == "haycock":
+        bsa = 0.024265 * W**0.5378 * H**0.3964
+    else:
+        bsa = 0.007184 * W**0.425 * H**0.725
+
+    return float(bsa) if bsa.ndim == 0 else bsa
+
+
+def resolve_bsa(bsa=None, weight=None, height=None, formula="mosteller"):
+    """
+    Per-row body surface area from whichever measurements are available.
+
+    Each row uses its BSA if that is given and finite, otherwise the BSA
+    from its weight and height (see body_surface_area) if both are given,
+    otherwise DEFAULT_BSA.
+
+    Parameters
+    ----------
+    bsa, weight, height : float, array or None
+        Measured BSA (m^2), weight (kg) and height (cm). Missing entries
+        may be NaN. All given inputs are broadcast against each other.
+    formula : str, optional
+        BSA formula for rows without a measured BSA.
+
+    Returns
+    -------
+    bsa : ndarray
+    """
+    given = [np.asarray(v, dtype=float) for v in (bsa, weight, height) if v is not None]
+    shape = np.broadcast_shapes(*(v.shape for v in given)) if given else ()
+    resolved = np.full(shape, DEFAULT_BSA)
+
+    if weight is not None and height is not None:
+        estimated = body_surface_area(weight, height, formula)
+        resolved = np.where(np.isfinite(estimated), estimated, resolved)
+    if bsa is not None:
+        measured = np.asarray(bsa, dtype=float)
+        resolved = np.where(np.isfinite(measured), measured, resolved)
+
+    return np.broadcast_to(resolved, shape).copy()
+
+
+def indexed_cvo2_to_vo2(indexed_cvo2, bsa=DEFAULT_BSA):
+    """
+    Convert indexed oxygen consumption (mL/m^2/min) to absolute VO2 (mL/min).
+
+    indexed_cvo2 and bsa (m^2) may be floats or arrays, e.g. one BSA per
+    patient from resolve_bsa.
+    """
+    return indexed_cvo2 * bsa
+
+
+def validate_physiology(S_m, S_sv, OD2):
+    """
+    Raise an error if outputs are non-physiologic.
+
+    Arrays are checked as a whole; the error then gives the number of
+    non-physiologic entries of each output (see validation.output_status).
+    """
+    if np.ndim(S_m) or np.ndim(S_sv) or np.ndim(OD2):
+        counts = status_counts(output_status(S_m, S_sv, OD2))
+        if counts:
+            raise ValueError(
+                "Invalid outputs: " + ", ".join(f"{m} ({n} entries)" for m, n in counts.items()) + "."
+            )
+        return
+
+    if not (0 <= S_m <= 1):
+        raise ValueError(f"Non-physiologic mixed saturation: {S_m:.4f}")
+
+    if not (0 <= S_sv <= 1):
+        raise ValueError(f"Non-physiologic systemic venous saturation: {S_sv:.4f}")
+
+    if OD2 < 0:
+        raise ValueError(f"Non-physiologic oxygen delivery: {OD2:.4f}")
+
+
+def physiologic_mask(S_m, S_sv, OD2):
+    """
+    Vectorized counterpart of validate_physiology.
+
+    Returns
+    -------
+    mask : ndarray of bool
+        True where all outputs are physiologic. NaN outputs are False.
+    """
+    return output_status(S_m, S_sv, OD2) == STATUS_OK
+
+
+def _mask_invalid(status, *outputs):
+    """
+    Set the outputs of rows with a non-zero status to NaN.
+    """
+    if not status.any():
+        return outputs
+    return tuple(np.where(status == 0, output, np.nan) for output in outputs)
+
+
+def flow_pressure_solver_1_batch(C_dia, C_sys, C_A, C_V, HR, R_p, R_s, V_total, errors="raise"):
+    """
+    Vectorized flow_pressure_solver_1 for arrays of parameter sets.
+
+    Eliminating the 4x4 system by hand gives, with G = 1/R_s + 1/R_p,
+
+        a   = HR*(C_dia - C_sys) / (G + HR*C_sys)
+        P_v = V_total / (C_A*(1 + a) + C_V)
+        P_a = (1 + a)*P_v
+        Q_s = (P_a - P_v)/R_s,  Q_p = (P_a - P_v)/R_p
+
+    so every parameter set is solved with a handful of elementwise
+    operations instead of one LAPACK call each.
+
+    Parameters
+    ----------
+    Same as flow_pressure_solver_1, but each may be a float or an array.
+    All inputs are broadcast against each other.
+    errors : str, optional
+        "raise" (default) raises one ValueError listing every invalid input
+        (see validation.check_inputs); "mask" solves the valid rows and
+        returns NaN for the others, whose reasons validation.input_codes
+        gives.
+
+    Returns
+    -------
+    Q_s, Q_p, P_a, P_v : ndarray
+        Arrays with the broadcast shape of the inputs.
+    """
+    status = _check_inputs({
+        "C_dia": C_dia,
+        "C_sys": C_sys,
+        "C_A": C_A,
+        "C_V": C_V,
+        "HR": HR,
+        "R_p": R_p,
+        "R_s": R_s,
+        "V_total": V_total,
+    }, errors)
+    C_dia, C_sys, C_A, C_V, HR, R_p, R_s, V_total = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (C_dia, C_sys, C_A, C_V, HR, R_p, R_s, V_total))
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        G = 1/R_s + 1/R_p
+        a = HR*(C_dia - C_sys) / (G + HR*C_sys)
+        P_v = V_total / (C_A*(1 + a) + C_V)
+        P_a = (1 + a)*P_v
+        Q_s = (P_a - P_v)/R_s
+        Q_p = (P_a - P_v)/R_p
+
+    return _mask_invalid(status, Q_s, Q_p, P_a, P_v)
+
+
+def flow_pressure_solver_2_batch(C_dia, C_A, C_V, HR, R_p, R_s, V_total, EF, errors="raise"):
+    """
+    Vectorized flow_pressure_solver_2 for arrays of parameter sets.
+
+    Uses the same elimination as flow_pressure_solver_1_batch with
+    C_sys = 0 and the diastolic term scaled by EF:
+
+        a   = HR*EF*C_dia / (1/R_s + 1/R_p)
+        P_v = V_total / (C_A*(1 + a) + C_V)
+
+    Parameters
+    ----------
+    Same as flow_pressure_solver_2, but each may be a float or an array.
+    All inputs are broadcast against each other.
+    errors : str, optional
+        "raise" (default) raises one ValueError listing every invalid input
+        (see validation.check_inputs); "mask" solves the valid rows and
+        returns NaN for the others, whose reasons validation.input_codes
+        gives.
+
+    Returns
+    -------
+    Q_s, Q_p, P_a, P_v : ndarray
+        Arrays with the broadcast shape of the inputs.
+    """
+    status = _check_inputs({
+        "C_dia": C_dia,
+        "C_A": C_A,
+        "C_V": C_V,
+        "HR": HR,
+        "R_p": R_p,
+        "R_s": R_s,
+        "V_total": V_total,
+        "EF": EF,
+    }, errors)
+    C_dia, C_A, C_V, HR, R_p, R_s, V_total, EF = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (C_dia, C_A, C_V, HR, R_p, R_s, V_total, EF))
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        G = 1/R_s + 1/R_p
+        a = HR*EF*C_dia / G
+        P_v = V_total / (C_A*(1 + a) + C_V)
+        P_a = (1 + a)*P_v
+        Q_s = (P_a - P_v)/R_s
+        Q_p = (P_a - P_v)/R_p
+
+    return _mask_invalid(status, Q_s, Q_p, P_a, P_v)
+
+
+FLOW_PRESSURE_2_PARAMETERS = ("C_dia", "C_A", "C_V", "HR", "R_p", "R_s", "V_total", "EF")
+
+def flow_pressure_solver_2_jacobian(C_dia, C_A, C_V, HR, R_p, R_s, V_total, EF):
+    """
+    Solution of flow_pressure_solver_2 and its analytic Jacobian for arrays
+    of parameter sets.
+
+    Differentiating A(theta) x = b(theta) gives dx/dtheta = -A^-1 (dA/dtheta x - db/dtheta),
+    so all eight sensitivities come from one stacked solve with the same
+    4x4 matrix that flow_pressure_solver_2 builds.
+
+    Parameters
+    ----------
+    Same as flow_pressure_solver_2, each a float or an array of shape (n,).
+
+    Returns
+    -------
+    x : ndarray, shape (n, 4)
+        Columns Q_s, Q_p, P_a, P_v.
+    dx : ndarray, shape (n, 4, 8)
+        dx[:, i, j] is the derivative of output i with respect to parameter
+        FLOW_PRESSURE_2_PARAMETERS[j].
+    """
+    C_dia, C_A, C_V, HR, R_p, R_s, V_total, EF = (
+        np.atleast_1d(v) for v in np.broadcast_arrays(
+            *(np.asarray(v, dtype=float) for v in (C_dia, C_A, C_V, HR, R_p, R_s, V_total, EF))
+        )
+    )
+    Q_s, Q_p, P_a, P_v = flow_pressure_solver_2_batch(C_dia, C_A, C_V, HR, R_p, R_s, V_total, EF)
+    n = Q_s.shape[0]
+    zero = np.zeros(n)
+    one = np.ones(n)
+
+    A = np.stack([
+        np.stack([one, one, zero, -HR*EF*C_dia], axis=-1),
+        np.stack([zero, R_p, -one, one], axis=-1),
+        np.stack([R_s, zero, -one, one], axis=-1),
+        np.stack([zero, zero, C_A, C_V], axis=-1),
+    ], axis=1)
+
+    # Columns of d(Ax - b)/dtheta in FLOW_PRESSURE_2_PARAMETERS order
+    dr = np.zeros((n, 4, 8))
+    dr[:, 0, 0] = -HR*EF*P_v       # C_dia
+    dr[:, 3, 1] = P_a              # C_A
+    dr[:, 3, 2] = P_v              # C_V
+    dr[:, 0, 3] = -EF*C_dia*P_v    # HR
+    dr[:, 1, 4] = Q_p              # R_p
+    dr[:, 2, 5] = Q_s              # R_s
+    dr[:, 3, 6] = -1.0             # V_total
+    dr[:, 0, 7] = -HR*C_dia*P_v    # EF
+
+    dx = -np.linalg.solve(A, dr)
+    x = np.stack([Q_s, Q_p, P_a, P_v], axis=-1)
+
+    return x, dx
+
+
+def saturation_solver_batch(Q_s, Q_p, Hb, VO2, S_pv=0.99, check_inputs=True):
+    """
+    Vectorized saturation_solver for arrays of flows.
+
+    The 2x2 system has the closed-form solution
+
+        S_m  = S_pv - VO2 / (1.34*Hb*10*Q_p)
+        S_sv = S_m  - VO2 / (1.34*Hb*10*Q_s)
+
+    Parameters
+    ----------
+    Same as saturation_solver, but each may be a float or an array.
+    check_inputs : bool, optional
+        If False, skip the positivity check so that sampled parameter sets
+        with non-physical flows give non-physiologic saturations instead of
+        an error. Default is True.
+
+    Returns
+    -------
+    S_m, S_sv, DO2 : ndarray
+        Arrays with the broadcast shape of the inputs.
+    """
+    if check_inputs:
+        _check_inputs({
+            "Q_s": Q_s,
+            "Q_p": Q_p,
+            "Hb": Hb,
+            "VO2": VO2,
+            "S_pv": S_pv,
+        })
+    Q_s, Q_p, Hb, VO2, S_pv = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (Q_s, Q_p, Hb, VO2, S_pv))
+    )
+
+    oxygen_capacity = 1.34 * Hb * 10.0  # mL O2 / L blood
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        S_m = S_pv - VO2 / (oxygen_capacity * Q_p)
+        S_sv = S_m - VO2 / (oxygen_capacity * Q_s)
+        DO2 = oxygen_capacity * S_m * Q_s
+
+    return S_m, S_sv, DO2
+
+
+def oxygenation_batch(Q_s, Q_p, Hb, CVO2, bsa=DEFAULT_BSA, S_pv=0.99, check_inputs=True):
+    """
+    Vectorized oxygen pipeline: indexed_cvo2_to_vo2, saturation_solver and
+    physiologic_mask for arrays of patients.
+
+    Parameters
+    ----------
+    Q_s, Q_p : float or array
+        Systemic and pulmonary flows (L/min).
+    Hb : float or array
+        Hemoglobin (g/dL).
+    CVO2 : float or array
+        Indexed oxygen consumption (mL/m^2/min).
+    bsa : float or array, optional
+        Body surface area (m^2), e.g. from resolve_bsa. Default is
+        DEFAULT_BSA.
+    S_pv : float or array, optional
+        Pulmonary venous saturation. Default is 0.99.
+    check_inputs : bool, optional
+        Passed to saturation_solver_batch.
+
+    Returns
+    -------
+    outputs : dict
+        "VO2", "S_m", "S_sv", "OD2" and "physiologic", arrays with the
+        broadcast shape of the inputs.
+    """
+    VO2 = indexed_cvo2_to_vo2(np.asarray(CVO2, dtype=float), np.asarray(bsa, dtype=float))
+    S_m, S_sv, OD2 = saturation_solver_batch(Q_s, Q_p, Hb, VO2, S_pv, check_inputs=check_inputs)
+    return {
+        "VO2": np.broadcast_to(VO2, S_m.shape).copy(),
+        "S_m": S_m,
+        "S_sv": S_sv,
+        "OD2": OD2,
+        "physiologic": physiologic_mask(S_m, S_sv, OD2),
+    }
@@ -1,26 +1,39 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy as sp
 from Norwood_Circulation_Solver_Functions import (
     flow_pressure_solver_1,
     flow_pressure_solver_2,
+    flow_pressure_solver_1_batch,
+    flow_pressure_solver_2_batch,
     saturation_solver,
+    saturation_solver_batch,
+    indexed_cvo2_to_vo2,
+    validate_physiology,
 )
 from arterial_and_venous_compliance_solver import arterial_and_venous_compliance_solver
 from systolic_and_diastolic_compliance_solver import systolic_and_diastolic_compliance_solver
-from norwood_plots import yaxis_class1, yaxis_class2
-from time_dependent_model import time_dependent_norwood, time_dependent_norwood_valve, Q_Ao_2
+from parameters import get_baseline
+from heatmap_field import HEATMAP_OUTPUTS, heatmap_grid
+from adaptive_heatmap import DEFAULT_GRADIENT_TOL, DEFAULT_MAX_LEVEL, adaptive_field
+from heatmap_tiles import TILE_SIZE, color_range, get_tile, render_tile_png, tile_cache, tile_extent
+from validation import STATUS_OK, combine_codes, input_codes, input_status, output_status, row_reports
+from norwood_plots import sensitivity_sweep, baseline_values_1, factors
+from time_dependent_model import time_dependent_norwood_valve, Q_Ao_2, SCHEMES
+from timestep_study import DEFAULT_TOLERANCE as DEFAULT_DT_TOLERANCE, Q_AO_2_CYCLE, select_dt
+from calibration import calibrate_steady_state, CALIBRATION_TARGETS
+from drug_scenarios import DRUG_EFFECTS, DEFAULT_DOSE_LEVELS, count_combinations, evaluate_drug_combinations
+from global_sensitivity import sobol_indices, morris_screening
+from uncertainty import propagate_uncertainty
+from coalesce import RequestCoalescer, get_solver_executor
+from micro_batcher import batcher_from_env
+from instrumentation import init_app as init_instrumentation, phase
 
 import os
 import io
 import base64
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import seaborn as sns
-from io import BytesIO
+import logging
+import threading
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -29,50 +42,105 @@ app = Flask(
     template_folder=os.path.join(BASE_DIR, "templates"),
     static_folder=os.path.join(BASE_DIR, "static"),
 )
+init_instrumentation(app)
+
+logger = logging.getLogger(__name__)
+
+# Upper limit on Monte Carlo samples per /uncertainty request
+MAX_UNCERTAINTY_SAMPLES = 2_000_000
+
+# Deepest refinement /generate_adaptive_heatmap allows: (8 * 2**6 + 1)^2 lattice points
+MAX_ADAPTIVE_LEVEL = 6
+
+# Limits on the /drug_combinations search
+MAX_DOSE_LEVELS = 8
+MAX_COMBINED_DRUGS = 3
+MAX_DRUG_COMBINATIONS = 10_000
+
+# Identical in-flight plot requests share one computation on the solver pool
+plot_coalescer = RequestCoalescer(get_solver_executor())
+
+# pyplot keeps global state, so figures are built one at a time
+PYPLOT_LOCK = threading.Lock()
 
 # --------------------------------------------------
 # Helpers
 # --------------------------------------------------
 
-DEFAULT_BSA = 0.25  # representative infant body surface area in m^2
+def get_pyplot():
+    """
+    Import pyplot on first use with the non-interactive Agg backend.
+    Keeps matplotlib out of app startup for workers that never plot.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
 
-def indexed_cvo2_to_vo2(indexed_cvo2, bsa=DEFAULT_BSA):
+def encode_figure(fig, **savefig_kwargs):
     """
-    Convert indexed oxygen consumption (mL/m^2/min) to absolute VO2 (mL/min).
+    Render a figure to PNG and return it base64-encoded.
     """
-    return indexed_cvo2 * bsa
+    with phase("encode"):
+        img = io.BytesIO()
+        fig.savefig(img, format="png", **savefig_kwargs)
+    with phase("serialize"):
+        return base64.b64encode(img.getvalue()).decode("utf-8")
 
 
-def validate_physiology(S_m, S_sv, OD2):
+def get_clinical_baseline():
     """
-    Raise an error if outputs are non-physiologic.
+    More reasonable default baseline for the EF-based steady-state model
+    (the "clinical" profile of parameters.py).
     """
-    if not (0 <= S_m <= 1):
-        raise ValueError(f"Non-physiologic mixed saturation: {S_m:.4f}")
+    return get_baseline("clinical")
 
-    if not (0 <= S_sv <= 1):
-        raise ValueError(f"Non-physiologic systemic venous saturation: {S_sv:.4f}")
 
-    if OD2 < 0:
-        raise ValueError(f"Non-physiologic oxygen delivery: {OD2:.4f}")
+def get_heatmap_baseline():
+    """
+    Baseline used by the heatmap page (C_sys-based steady-state model;
+    the "heatmap" profile of parameters.py).
+    """
+    return get_baseline("heatmap")
 
 
-def get_clinical_baseline():
+def solve_steady_state_batch(items, input_names, solve_flows, format_results, solve_one):
     """
-    More reasonable default baseline for the EF-based steady-state model.
+    Solve many single-point requests with the batched solvers.
+
+    Rows that fail validation.input_status or validation.output_status
+    (non-positive or non-finite inputs, EF > 1, non-positive flows or
+    non-physiologic outputs) are re-run through solve_one, so they fail with
+    exactly the error a single request would.
+
+    Returns
+    -------
+    results : list
+        format_results(...) dicts, or the exception for failed rows.
     """
-    return {
-        "HR": 120.0,
-        "EF": 0.45,
-        "C_dia": 0.01,
-        "C_A": 0.03,
-        "C_V": 0.20,
-        "R_s": 25.0,
-        "R_p": 20.0,
-        "V_total": 1.0,
-        "Hb": 15.0,
-        "CVO2": 160.0,  # indexed oxygen consumption (mL/m^2/min)
-    }
+    columns = {name: np.array([item[name] for item in items], dtype=float) for name in input_names}
+
+    results = [None] * len(items)
+    rows = np.flatnonzero(input_status(columns) == STATUS_OK)
+    if rows.size:
+        solved = {name: values[rows] for name, values in columns.items()}
+        Q_s, Q_p, P_a, P_v = solve_flows(solved)
+        VO2 = indexed_cvo2_to_vo2(solved["CVO2"])
+        S_m, S_sv, OD2 = saturation_solver_batch(Q_s, Q_p, solved["Hb"], VO2, check_inputs=False)
+        good = output_status(S_m, S_sv, OD2, Q_s, Q_p) == STATUS_OK
+
+        for k in np.flatnonzero(good):
+            results[rows[k]] = format_results(Q_s[k], Q_p[k], P_a[k], P_v[k], S_m[k], S_sv[k], OD2[k])
+
+    for row, result in enumerate(results):
+        if result is None:
+            try:
+                results[row] = solve_one(items[row])
+            except Exception as e:
+                results[row] = e
+
+    return results
 
 
 # --------------------------------------------------
@@ -113,6 +181,53 @@ def conditions_page():
 # Adjustable parameters page
 # --------------------------------------------------
 
+SLIDER_INPUTS = ("HR", "C_sys", "C_dia", "C_A", "C_V", "R_s", "R_p", "V_total", "Hb", "CVO2")
+
+
+def format_process_results(Q_s, Q_p, P_a, P_v, S_m, S_sv, OD2):
+    """
+    Round C_sys-model outputs the way the slider page displays them.
+    """
+    return {
+        "Q_s": round(float(Q_s), 2),
+        "Q_p": round(float(Q_p), 2),
+        "P_a": round(float(P_a), 2),
+        "P_v": round(float(P_v), 2),
+        "S_m": round(float(S_m), 4),
+        "S_sv": round(float(S_sv), 4),
+        "OD2": round(float(OD2), 2),
+    }
+
+
+def solve_process(inputs):
+    Q_s, Q_p, P_a, P_v = flow_pressure_solver_1(
+        inputs["C_dia"], inputs["C_sys"], inputs["C_A"], inputs["C_V"],
+        inputs["HR"], inputs["R_p"], inputs["R_s"], inputs["V_total"],
+    )
+
+    VO2 = indexed_cvo2_to_vo2(inputs["CVO2"])
+    S_m, S_sv, OD2 = saturation_solver(Q_s, Q_p, inputs["Hb"], VO2)
+    validate_physiology(S_m, S_sv, OD2)
+
+    return format_process_results(Q_s, Q_p, P_a, P_v, S_m, S_sv, OD2)
+
+
+def solve_process_batch(items):
+    return solve_steady_state_batch(
+        items,
+        SLIDER_INPUTS,
+        lambda p: flow_pressure_solver_1_batch(
+            p["C_dia"], p["C_sys"], p["C_A"], p["C_V"], p["HR"], p["R_p"], p["R_s"], p["V_total"],
+        ),
+        format_process_results,
+        solve_process,
+    )
+
+
+# None unless NORWOOD_MICRO_BATCH is set (see micro_batcher.batcher_from_env)
+process_batcher = batcher_from_env(solve_process_batch)
+
+
 @app.route("/process", methods=["POST"])
 def process():
     data = request.json
@@ -121,38 +236,17 @@ def process():
         return jsonify({"error": "No input data received."}), 400
 
     try:
-        HR = float(data.get("HR"))
-        C_sys = float(data.get("C_sys"))
-        C_dia = float(data.get("C_dia"))
-        C_A = float(data.get("C_A"))
-        C_V = float(data.get("C_V"))
-        R_s = float(data.get("R_s"))
-        R_p = float(data.get("R_p"))
-        V_total = float(data.get("V_total"))
-        Hb = float(data.get("Hb"))
-        CVO2 = float(data.get("CVO2"))
-
-        Q_s, Q_p, P_a, P_v = flow_pressure_solver_1(
-            C_dia, C_sys, C_A, C_V, HR, R_p, R_s, V_total
-        )
+        with phase("parse"):
+            inputs = {name: float(data.get(name)) for name in SLIDER_INPUTS}
 
-        VO2 = indexed_cvo2_to_vo2(CVO2)
-        S_m, S_sv, OD2 = saturation_solver(Q_s, Q_p, Hb, VO2)
-        validate_physiology(S_m, S_sv, OD2)
+        with phase("solve"):
+            result = process_batcher(inputs) if process_batcher is not None else solve_process(inputs)
 
-        return jsonify({
-            "Q_s": round(Q_s, 2),
-            "Q_p": round(Q_p, 2),
-            "P_a": round(P_a, 2),
-            "P_v": round(P_v, 2),
-            "S_m": round(S_m, 4),
-            "S_sv": round(S_sv, 4),
-            "OD2": round(OD2, 2),
-        })
+        with phase("serialize"):
+            return jsonify(result)
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("%s failed", request.endpoint)
         return jsonify({"error": f"Failed to process inputs: {str(e)}"}), 400
 
 
@@ -162,43 +256,35 @@ def process():
 
 @app.route("/generate_plot")
 def generate_plot():
-    factors = np.arange(0.5, 1.55, 0.05)
     plot_type = request.args.get("plot_type")
 
-    if plot_type in ("Q_s", "Q_p", "Q_total", "P_a", "P_v"):
-        yaxis = yaxis_class1(plot_type)
-        plot = plt.figure(figsize=(9, 6))
-
-        for label, y in yaxis.items():
-            y = np.asarray(y)
-            plt.plot(factors, y, label=label)
+    if plot_type not in ("Q_s", "Q_p", "Q_total", "P_a", "P_v", "S_m", "S_sv", "OD2"):
+        return jsonify({"error": "Invalid plot type"}), 400
 
-        plt.xlabel("Factor")
-        plt.ylabel(plot_type)
-        plt.legend()
-        plt.tight_layout()
+    with phase("solve"):
+        sweep = sensitivity_sweep()[plot_type]
+        if plot_type in ("Q_s", "Q_p", "Q_total", "P_a", "P_v"):
+            # Flow outputs only respond to the flow_pressure_solver_1 inputs
+            yaxis = {key: sweep[key] for key in baseline_values_1}
+        else:
+            yaxis = sweep
 
-    elif plot_type in ("S_m", "S_sv", "OD2"):
-        yaxis = yaxis_class1(plot_type)
-        plot = plt.figure(figsize=(9, 6))
+    plt = get_pyplot()
 
-        for label, y in yaxis.items():
-            y = np.asarray(y)
-            plt.plot(factors, y, label=label)
+    with PYPLOT_LOCK:
+        with phase("render"):
+            plot = plt.figure(figsize=(9, 6))
 
-        plt.xlabel("Factor")
-        plt.ylabel(plot_type)
-        plt.legend()
-        plt.tight_layout()
+            for label, y in yaxis.items():
+                plt.plot(factors, y, label=label)
 
-    else:
-        return jsonify({"error": "Invalid plot type"}), 400
+            plt.xlabel("Factor")
+            plt.ylabel(plot_type)
+            plt.legend()
+            plt.tight_layout()
 
-    img = io.BytesIO()
-    plot.savefig(img, format="png")
-    img.seek(0)
-    plot_data = base64.b64encode(img.getvalue()).decode("utf-8")
-    plt.close(plot)
+        plot_data = encode_figure(plot)
+        plt.close(plot)
 
     return jsonify({"plot": plot_data})
 
@@ -213,87 +299,314 @@ def generate_custom_plot():
     input2 = request.args.get("input2")
     output = request.args.get("output")
 
-    baseline_values = {
-        "HR": 100,
-        "C_dia": 0.02,
-        "C_sys": 0.01,
-        "C_A": 1 / 135,
-        "C_V": 30 / 135,
-        "R_p": 10,
-        "R_s": 80,
-        "V_total": 5.0,
-        "EF": 0.55,
-        "Hb": 15,
-        "CVO2": 200,
-    }
+    try:
+        key = ("generate_custom_plot", input1, input2, output)
+        plot_base64 = plot_coalescer.run(key, render_custom_plot, input1, input2, output)
+    except Exception as e:
+        logger.exception("%s failed", request.endpoint)
+        return jsonify({"error": f"Failed to generate heatmap: {str(e)}"}), 400
+
+    return jsonify({"plot": plot_base64})
 
-    input1_values = np.linspace(baseline_values[input1] * 0.5, baseline_values[input1] * 1.5, 50)
-    input2_values = np.linspace(baseline_values[input2] * 0.5, baseline_values[input2] * 1.5, 50)
-
-    Z = np.zeros((len(input2_values), len(input1_values)))
-
-    for i, val1 in enumerate(input1_values):
-        for j, val2 in enumerate(input2_values):
-            params = baseline_values.copy()
-            params[input1] = val1
-            params[input2] = val2
-
-            Q_s, Q_p, P_a, P_v = flow_pressure_solver_1(
-                params["C_dia"],
-                params["C_sys"],
-                params["C_A"],
-                params["C_V"],
-                params["HR"],
-                params["R_p"],
-                params["R_s"],
-                params["V_total"],
+
+@app.route("/heatmap_fields")
+def heatmap_fields():
+    """
+    Every heatmap output on the grid of input1 and input2 as JSON, so a
+    client can switch outputs without another request. Invalid points are
+    null.
+    """
+    input1 = request.args.get("input1")
+    input2 = request.args.get("input2")
+
+    try:
+        with phase("solve"):
+            grid = heatmap_grid(input1, input2)
+        with phase("serialize"):
+            fields = {
+                name: np.where(np.isnan(values), None, np.round(values, 6)).tolist()
+                for name, values in grid["fields"].items()
+            }
+        return jsonify({"x": grid["x"].tolist(), "y": grid["y"].tolist(), "fields": fields})
+
+    except Exception as e:
+        logger.exception("%s failed", request.endpoint)
+        return jsonify({"error": f"Failed to compute heatmap fields: {str(e)}"}), 400
+
+
+def render_custom_plot(input1, input2, output):
+    """
+    Heatmap of output over 0.5x to 1.5x baseline of input1 and input2,
+    as a base64-encoded PNG. Every output of the grid is solved once and
+    cached (see heatmap_field.heatmap_grid), so only the rendering depends
+    on output.
+    """
+    with phase("solve"):
+        if output not in HEATMAP_OUTPUTS:
+            raise ValueError(f"Invalid output {output!r}; choose from {HEATMAP_OUTPUTS}.")
+        grid = heatmap_grid(input1, input2)
+        input1_values, input2_values = grid["x"], grid["y"]
+        Z = grid["fields"][output]
+
+    plt = get_pyplot()
+    import seaborn as sns
+
+    with PYPLOT_LOCK:
+        with phase("render"):
+            fig = plt.figure(figsize=(10, 7.5))
+            heatmap = sns.heatmap(
+                Z,
+                xticklabels=np.round(input1_values, 1),
+                yticklabels=np.round(input2_values, 1),
+                cmap="coolwarm",
+                cbar_kws={"label": output},
+                linewidths=0.5,
             )
+            plt.xlabel(input1, fontsize=14)
+            plt.ylabel(input2, fontsize=14)
+            plt.title(f"Heatmap of {output}", fontsize=18)
+            plt.gca().invert_yaxis()
+            plt.tick_params(axis="both", which="major", labelsize=7)
 
-            if output in ["S_m", "S_sv", "D20"]:
-                VO2 = indexed_cvo2_to_vo2(params["CVO2"])
-                S_m, S_sv, D20 = saturation_solver(Q_s, Q_p, params["Hb"], VO2)
-
-            if output == "Q_s":
-                Z[j, i] = Q_s
-            elif output == "Q_p":
-                Z[j, i] = Q_p
-            elif output == "P_a":
-                Z[j, i] = P_a
-            elif output == "P_v":
-                Z[j, i] = P_v
-            elif output == "S_m":
-                Z[j, i] = S_m
-            elif output == "S_sv":
-                Z[j, i] = S_sv
-            elif output == "D20":
-                Z[j, i] = D20
-
-    plt.figure(figsize=(10, 7.5))
-    heatmap = sns.heatmap(
-        Z,
-        xticklabels=np.round(input1_values, 1),
-        yticklabels=np.round(input2_values, 1),
-        cmap="coolwarm",
-        cbar_kws={"label": output},
-        linewidths=0.5,
-    )
-    plt.xlabel(input1, fontsize=14)
-    plt.ylabel(input2, fontsize=14)
-    plt.title(f"Heatmap of {output}", fontsize=18)
-    plt.gca().invert_yaxis()
-    plt.tick_params(axis="both", which="major", labelsize=7)
-
-    cbar = heatmap.collections[0].colorbar
-    cbar.ax.tick_params(labelsize=12)
-    cbar.set_label(output, fontsize=14)
-
-    img = io.BytesIO()
-    plt.savefig(img, format="png", bbox_inches="tight")
-    img.seek(0)
-    plot_base64 = base64.b64encode(img.getvalue()).decode("utf-8")
-    plt.close()
+            cbar = heatmap.collections[0].colorbar
+            cbar.ax.tick_params(labelsize=12)
+            cbar.set_label(output, fontsize=14)
 
-    return jsonify({"plot": plot_base64})
+        plot_base64 = encode_figure(fig, bbox_inches="tight")
+        plt.close(fig)
+
+    return plot_base64
+
+
+@app.route("/generate_adaptive_heatmap")
+def generate_adaptive_heatmap():
+    """
+    Heatmap of one output from an adaptive quadtree (see
+    adaptive_heatmap.adaptive_field). Optional max_level, tol and
+    thresholds (comma-separated output values) query parameters.
+    """
+    input1 = request.args.get("input1")
+    input2 = request.args.get("input2")
+    output = request.args.get("output")
+
+    try:
+        max_level = int(request.args.get("max_level", DEFAULT_MAX_LEVEL))
+        if not (0 <= max_level <= MAX_ADAPTIVE_LEVEL):
+            return jsonify({"error": f"max_level must be between 0 and {MAX_ADAPTIVE_LEVEL}"}), 400
+        tol = float(request.args.get("tol", DEFAULT_GRADIENT_TOL))
+        raw = request.args.get("thresholds")
+        thresholds = None if raw is None else tuple(float(t) for t in raw.split(",") if t.strip())
+
+        key = ("generate_adaptive_heatmap", input1, input2, output, max_level, tol, thresholds)
+        result = plot_coalescer.run(
+            key, render_adaptive_heatmap, input1, input2, output, max_level, tol, thresholds,
+        )
+    except Exception as e:
+        logger.exception("%s failed", request.endpoint)
+        return jsonify({"error": f"Failed to generate adaptive heatmap: {str(e)}"}), 400
+
+    return jsonify(result)
+
+
+@app.route("/heatmap_tiles/<input1>/<input2>/<output>/<int:zoom>/<int:x>/<int:y>")
+def heatmap_tile(input1, input2, output, zoom, x, y):
+    """
+    One TILE_SIZE x TILE_SIZE tile of output over input1 and input2 (see
+    heatmap_tiles), as a PNG, or with format=json as the values, the
+    tile's input ranges and the plane's color range. Tiles are cached, so
+    panning and zooming only solve tiles not seen before.
+    """
+    try:
+        if request.args.get("format") == "json":
+            with phase("solve"):
+                if output not in HEATMAP_OUTPUTS:
+                    raise ValueError(f"Invalid output {output!r}; choose from {HEATMAP_OUTPUTS}.")
+                values = get_tile(input1, input2, zoom, x, y)[output]
+                vmin, vmax = color_range(input1, input2, output)
+                x_range, y_range = tile_extent(input1, input2, zoom, x, y)
+            with phase("serialize"):
+                return jsonify({
+                    "size": TILE_SIZE,
+                    "x_range": x_range,
+                    "y_range": y_range,
+                    "vmin": vmin,
+                    "vmax": vmax,
+                    "values": np.where(np.isnan(values), None, np.round(values.astype(float), 6)).tolist(),
+                })
+
+        png = render_tile_png(input1, input2, output, zoom, x, y)
+    except Exception as e:
+        logger.exception("%s failed", request.endpoint)
+        return jsonify({"error": f"Failed to compute heatmap tile: {str(e)}"}), 400
+
+    return Response(png, mimetype="image/png", headers={"Cache-Control": "public, max-age=3600"})
+
+
+@app.route("/heatmap_tile_stats")
+def heatmap_tile_stats():
+    """
+    Size and hit rate of the heatmap tile cache.
+    """
+    return jsonify(tile_cache.stats())
+
+
+def render_adaptive_heatmap(input1, input2, output, max_level, tol, thresholds):
+    """
+    Filled contours of an adaptive field with its leaf cells and threshold
+    contours drawn on top, as a dict with the base64-encoded PNG and the
+    evaluation counts.
+    """
+    with phase("solve"):
+        field = adaptive_field(input1, input2, output, max_level=max_level, tol=tol, thresholds=thresholds)
+
+    plt = get_pyplot()
+    from matplotlib.collections import LineCollection
+    from matplotlib.tri import Triangulation
+
+    points = field["points"]
+    invalid = np.isnan(points["value"])
+    triangulation = Triangulation(points["x"], points["y"])
+    triangulation.set_mask(invalid[triangulation.triangles].any(axis=1))
+    z = np.where(invalid, 0.0, points["value"])
+
+    # Color scale from percentiles: outputs diverge near singular parameter
+    # combinations, and the extremes would wash out the rest of the field
+    finite = points["value"][~invalid]
+    low, high = np.percentile(finite, [2, 98]) if finite.size else (0.0, 1.0)
+    if high <= low:
+        low, high = low - 0.5, high + 0.5
+
+    x0, x1, y0, y1 = field["cells"].T
+    edges = np.stack([
+        np.stack([x0, y0, x1, y0], axis=1), np.stack([x1, y0, x1, y1], axis=1),
+        np.stack([x1, y1, x0, y1], axis=1), np.stack([x0, y1, x0, y0], axis=1),
+    ], axis=1).reshape(-1, 2, 2)
+
+    with PYPLOT_LOCK:
+        with phase("render"):
+            fig, ax = plt.subplots(figsize=(10, 7.5))
+            filled = ax.tricontourf(triangulation, z, levels=np.linspace(low, high, 41), cmap="coolwarm",
+                                    extend="both")
+            ax.add_collection(LineCollection(edges, colors="0.3", linewidths=0.2, alpha=0.5))
+            for threshold in field["thresholds"]:
+                ax.tricontour(triangulation, z, levels=[threshold], colors="black", linewidths=1.5)
+
+            cbar = fig.colorbar(filled, ax=ax)
+            cbar.ax.tick_params(labelsize=12)
+            cbar.set_label(output, fontsize=14)
+            ax.set_xlabel(input1, fontsize=14)
+            ax.set_ylabel(input2, fontsize=14)
+            ax.set_title(f"Adaptive heatmap of {output} ({field['n_evaluations']} of "
+                         f"{field['uniform_evaluations']} grid points solved)", fontsize=14)
+
+        plot_base64 = encode_figure(fig, bbox_inches="tight")
+        plt.close(fig)
+
+    return {
+        "plot": plot_base64,
+        "n_evaluations": field["n_evaluations"],
+        "uniform_evaluations": field["uniform_evaluations"],
+        "cells": int(len(field["cells"])),
+        "thresholds": list(field["thresholds"]),
+    }
+
+# --------------------------------------------------
+# Global sensitivity analysis
+# --------------------------------------------------
+
+@app.route("/global_sensitivity")
+def global_sensitivity():
+    """
+    Sobol indices or Morris screening of every steady-state output.
+    Query: model=1|2, method=sobol|morris, n (base samples or trajectories),
+    spread (relative half-width of the sampling box), seed.
+    """
+    try:
+        model = int(request.args.get("model", 2))
+        method = request.args.get("method", "sobol")
+        spread = float(request.args.get("spread", 0.5))
+        seed = request.args.get("seed")
+        seed = int(seed) if seed not in (None, "") else None
+        baseline = get_heatmap_baseline() if model == 1 else get_clinical_baseline()
+
+        if method == "sobol":
+            n = min(int(request.args.get("n", 4096)), 2**16)
+            result = sobol_indices(baseline, model=model, n_samples=n, spread=spread, seed=seed)
+            indices = ("first_order", "total")
+        elif method == "morris":
+            n = min(int(request.args.get("n", 100)), 10000)
+            result = morris_screening(baseline, model=model, n_trajectories=n, spread=spread, seed=seed)
+            indices = ("mu_star", "mu", "sigma")
+        else:
+            return jsonify({"error": "Invalid method"}), 400
+
+        payload = {
+            "method": method,
+            "model": model,
+            "inputs": list(result["inputs"]),
+            "n_evaluations": int(result["n_evaluations"]),
+        }
+        for index in indices:
+            payload[index] = {
+                output: [round(float(v), 4) for v in values]
+                for output, values in result[index].items()
+            }
+
+        return jsonify(payload)
+
+    except Exception as e:
+        logger.exception("%s failed", request.endpoint)
+        return jsonify({"error": f"Failed to compute sensitivity: {str(e)}"}), 400
+
+
+@app.route("/uncertainty", methods=["POST"])
+def uncertainty():
+    """
+    Monte Carlo propagation of input uncertainty.
+    Body: model=1|2, inputs (point values; default is the page baseline),
+    distributions (input name -> spec, see uncertainty.sample_distribution),
+    n_samples, seed.
+    """
+    try:
+        data = request.get_json() or {}
+        model = int(data.get("model", 2))
+        n_samples = min(int(data.get("n_samples", 100000)), MAX_UNCERTAINTY_SAMPLES)
+        seed = data.get("seed")
+        seed = int(seed) if seed not in (None, "") else None
+
+        inputs = get_heatmap_baseline() if model == 1 else get_clinical_baseline()
+        inputs.update({k: float(v) for k, v in (data.get("inputs") or {}).items()})
+        inputs.update(data.get("distributions") or {})
+
+        result = propagate_uncertainty(inputs, model=model, n_samples=n_samples, seed=seed)
+        if result["n_invalid_inputs"] == result["n_samples"]:
+            return jsonify({"error": "Every sampled input set is invalid (inputs must be positive and EF at most 1)."}), 400
+
+        def stat(value):
+            # NaN and inf are not valid JSON
+            value = float(value)
+            return round(value, 6) if np.isfinite(value) else None
+
+        return jsonify({
+            "model": model,
+            "n_samples": result["n_samples"],
+            "n_invalid_inputs": result["n_invalid_inputs"],
+            "p_non_physiologic": round(result["p_non_physiologic"], 6),
+            "outputs": {
+                name: {
+                    "mean": stat(s["mean"]),
+                    "std": stat(s["std"]),
+                    "min": stat(s["min"]),
+                    "max": stat(s["max"]),
+                    "percentiles": {str(q): stat(v) for q, v in s["percentiles"].items()},
+                }
+                for name, s in result["outputs"].items()
+            },
+        })
+
+    except Exception as e:
+        logger.exception("%s failed", request.endpoint)
+        return jsonify({"error": f"Failed to propagate uncertainty: {str(e)}"}), 400
 
 # --------------------------------------------------
 # Time dependent page
@@ -307,96 +620,138 @@ def generate_timedep_plot():
             return float(default)
         return float(raw)
 
-    R_s = qfloat("R_s", 62)
-    R_p = qfloat("R_p", 6)
-    R_BTS = qfloat("R_BTS", 48)
-    C_s = qfloat("C_s", 0.0004)
-    C_p = qfloat("C_p", 0.0007)
-    P_sa_0 = qfloat("P_sa_0", 20.0)
-    P_pa_0 = qfloat("P_pa_0", 20.0)
-    t_end = qfloat("t_end", 0.1)
-    dt = qfloat("dt", 0.00001)
-
-    if t_end <= 0 or dt <= 0:
-        return jsonify({"error": "t_end and dt must be > 0"}), 400
-    if dt >= t_end:
-        return jsonify({"error": "dt must be smaller than t_end"}), 400
+    params = {name: qfloat(name, default) for name, default in get_baseline("circuit").items()}
+    params["t_end"] = qfloat("t_end", 0.1)
+    t_end = params["t_end"]
+
+    # dt=auto picks the largest time step within a relative error of tol
+    if request.args.get("dt", "").strip().lower() == "auto":
+        params["dt"] = "auto"
+        params["tol"] = qfloat("tol", DEFAULT_DT_TOLERANCE)
+        if t_end <= 0 or params["tol"] <= 0:
+            return jsonify({"error": "t_end and tol must be > 0"}), 400
+    else:
+        params["dt"] = dt = qfloat("dt", 0.00001)
+        if t_end <= 0 or dt <= 0:
+            return jsonify({"error": "t_end and dt must be > 0"}), 400
+        if dt >= t_end:
+            return jsonify({"error": "dt must be smaller than t_end"}), 400
 
     plot_type = request.args.get("plot_type", "flows")
+    if plot_type not in ("flows", "pressures", "aortic"):
+        return jsonify({"error": "Invalid plot type"}), 400
 
-    (t1, Q_sa1, Q_sv1, Q_pa1, Q_pv1, P_sa1, P_sv1, P_pa1, P_pv1) = time_dependent_norwood(
-        R_s, R_p, R_BTS,
-        C_s, C_p,
-        P_sa_0, P_pa_0,
-        Q_Ao_2,          
-        t_end, dt
-    )
+    params["scheme"] = request.args.get("scheme", "backward_euler")
+    if params["scheme"] not in SCHEMES:
+        return jsonify({"error": f"Invalid scheme; choose from {', '.join(SCHEMES)}"}), 400
 
-    (t2, Q_sa2, Q_sv2, Q_pa2, Q_pv2, P_sa2, P_sv2, P_pa2, P_pv2) = time_dependent_norwood_valve(
-        R_s, R_p, R_BTS,
-        C_s, C_p,
-        P_sa_0, P_pa_0,
-        Q_Ao_2,          
-        t_end, dt
-    )
+    # Parsed floats, so "62" and "62.0" share a computation
+    key = ("generate_timedep_plot", plot_type) + tuple(params.items())
+    result = plot_coalescer.run(key, render_timedep_plot, params, plot_type)
 
+    return jsonify(result)
 
-    Q_AO = np.array([Q_Ao_2(ti) for ti in t1])
-    fig = plt.figure(figsize=(9, 6))
-
-    if plot_type == "flows":
-        plt.plot(t2, Q_sa2, label="Q_SA")
-        plt.plot(t2, Q_sv2, label="Q_SV")
-        plt.plot(t2, Q_pa2, label="Q_PA")
-        plt.plot(t2, Q_pv2, label="Q_PV")
-        plt.plot(t2, Q_AO, "--", label="Q_AO (input)")
-        plt.title("Time Dependent Plot: Flows")
-        plt.xlabel("Time [min]")
-        plt.ylabel("Flow [L/min]")
-        plt.grid(True)
-        plt.legend()
-
-    elif plot_type == "pressures":
-        plt.plot(t2, P_sa2, label="P_SA")
-        plt.plot(t2, P_sv2, label="P_SV")
-        plt.plot(t2, P_pa2, label="P_PA")
-        plt.plot(t2, P_pv2, '--', label="P_PV")
-        plt.title("Time Dependent Plot: Pressures")
-        plt.xlabel("Time [min]")
-        plt.ylabel("Pressure [mmHg]")
-        plt.grid(True)
-        plt.legend()
-
-    elif plot_type == "aortic":
-        plt.plot(t2, Q_AO, "-", label="Q_AO (input)")
-        plt.title("Time Dependent Plot: Aortic Flow")
-        plt.xlabel("Time [min]")
-        plt.ylabel("Flow [L/min]")
-        plt.grid(True)
-        plt.legend()
 
-    else:
+def render_timedep_plot(params, plot_type):
+    """
+    Solve the time-dependent model and plot flows, pressures or the aortic
+    inflow. Returns {"plot": base64 PNG, "dt": time step used}, plus
+    "dt_error" (estimated relative error) when params["dt"] is "auto".
+    """
+    R_s, R_p, R_BTS = params["R_s"], params["R_p"], params["R_BTS"]
+    C_s, C_p = params["C_s"], params["C_p"]
+    P_sa_0, P_pa_0 = params["P_sa_0"], params["P_pa_0"]
+    t_end, dt = params["t_end"], params["dt"]
+    result = {}
+
+    with phase("solve"):
+        if dt == "auto":
+            # Q_Ao_2 is periodic, so two cycles are enough to judge the error
+            dt, error, t2, signals = select_dt(params, t_end, params["tol"], window=2 * Q_AO_2_CYCLE,
+                                               scheme=params["scheme"])
+            Q_sa2, Q_sv2, Q_pa2, Q_pv2 = signals["Q_sa"], signals["Q_sv"], signals["Q_pa"], signals["Q_pv"]
+            P_sa2, P_sv2, P_pa2, P_pv2 = signals["P_sa"], signals["P_sv"], signals["P_pa"], signals["P_pv"]
+            result["dt_error"] = error
+        else:
+            (t2, Q_sa2, Q_sv2, Q_pa2, Q_pv2, P_sa2, P_sv2, P_pa2, P_pv2) = time_dependent_norwood_valve(
+                R_s, R_p, R_BTS,
+                C_s, C_p,
+                P_sa_0, P_pa_0,
+                Q_Ao_2,
+                t_end, dt,
+                scheme=params["scheme"],
+            )
+        result["dt"] = dt
+
+        Q_AO = np.array([Q_Ao_2(ti) for ti in t2])
+
+    plt = get_pyplot()
+
+    with PYPLOT_LOCK:
+        with phase("render"):
+            fig = plt.figure(figsize=(9, 6))
+
+            if plot_type == "flows":
+                plt.plot(t2, Q_sa2, label="Q_SA")
+                plt.plot(t2, Q_sv2, label="Q_SV")
+                plt.plot(t2, Q_pa2, label="Q_PA")
+                plt.plot(t2, Q_pv2, label="Q_PV")
+                plt.plot(t2, Q_AO, "--", label="Q_AO (input)")
+                plt.title("Time Dependent Plot: Flows")
+                plt.ylabel("Flow [L/min]")
+
+            elif plot_type == "pressures":
+                plt.plot(t2, P_sa2, label="P_SA")
+                plt.plot(t2, P_sv2, label="P_SV")
+                plt.plot(t2, P_pa2, label="P_PA")
+                plt.plot(t2, P_pv2, '--', label="P_PV")
+                plt.title("Time Dependent Plot: Pressures")
+                plt.ylabel("Pressure [mmHg]")
+
+            elif plot_type == "aortic":
+                plt.plot(t2, Q_AO, "-", label="Q_AO (input)")
+                plt.title("Time Dependent Plot: Aortic Flow")
+                plt.ylabel("Flow [L/min]")
+
+            plt.xlabel("Time [min]")
+            plt.legend()
+            plt.grid(True)
+            plt.tight_layout()
+
+        result["plot"] = encode_figure(fig, bbox_inches="tight")
         plt.close(fig)
-        return jsonify({"error": "Invalid plot type"}), 400
 
-    plt.xlabel("Time [min]")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-
-    img = io.BytesIO()
-    fig.savefig(img, format="png", bbox_inches="tight")
-    img.seek(0)
-    plot_data = base64.b64encode(img.getvalue()).decode("utf-8")
-    plt.close(fig)
-
-    return jsonify({"plot": plot_data})
+    return result
 
 
 # --------------------------------------------------
 # Clinical conditions page
 # --------------------------------------------------
 
+CONDITION_INPUTS = ("HR", "EF", "C_dia", "C_A", "C_V", "R_s", "R_p", "V_total", "Hb", "CVO2")
+
+
+def format_condition_results(Q_s, Q_p, P_a, P_v, S_m, S_sv, OD2):
+    """
+    Round EF-model outputs the way the conditions page displays them.
+    """
+    Q_s, Q_p, P_a, P_v, S_m, S_sv, OD2 = map(float, (Q_s, Q_p, P_a, P_v, S_m, S_sv, OD2))
+    Q_RV = Q_s + Q_p
+    Qp_Qs = Q_p / Q_s if Q_s != 0 else None
+
+    return {
+        "Q_s": round(Q_s, 2),
+        "Q_p": round(Q_p, 2),
+        "Q_RV": round(Q_RV, 2),
+        "P_a": round(P_a, 2),
+        "P_v": round(P_v, 2),
+        "S_m": round(S_m, 4),
+        "S_sv": round(S_sv, 4),
+        "OD2": round(OD2, 2),
+        "Qp_Qs": round(Qp_Qs, 4) if Qp_Qs is not None else None,
+    }
+
+
 @app.route("/apply_preset")
 def apply_preset():
     """
@@ -407,38 +762,10 @@ def apply_preset():
     condition = request.args.get("condition", "").strip().lower()
     baseline = get_clinical_baseline()
 
-    drug_effects = {
-        "nicardipine": {
-            "svr_reduction": 0.30,
-            "pvr_reduction": 0.05,
-            "selectivity": "Poor pulmonary selectivity",
-        },
-        "milrinone": {
-            "svr_reduction": 0.175,
-            "pvr_reduction": 0.225,
-            "selectivity": "Moderate pulmonary selectivity",
-        },
-        "sildenafil": {
-            "svr_reduction": 0.10,
-            "pvr_reduction": 0.30,
-            "selectivity": "Good pulmonary selectivity",
-        },
-        "ino": {
-            "svr_reduction": 0.00,
-            "pvr_reduction": 0.45,
-            "selectivity": "Excellent pulmonary selectivity",
-        },
-        "epoprostenol": {
-            "svr_reduction": 0.15,
-            "pvr_reduction": 0.40,
-            "selectivity": "Good pulmonary selectivity",
-        },
-    }
-
-    if condition not in drug_effects:
+    if condition not in DRUG_EFFECTS:
         return jsonify({"error": "Invalid drug selection"}), 400
 
-    effect = drug_effects[condition]
+    effect = DRUG_EFFECTS[condition]
 
     preset_values = {
         **baseline,
@@ -451,60 +778,251 @@ def apply_preset():
     return jsonify(preset_values)
 
 
+def solve_condition_values(inputs):
+    # EF-based steady-state model from the report
+    Q_s, Q_p, P_a, P_v = flow_pressure_solver_2(
+        inputs["C_dia"], inputs["C_A"], inputs["C_V"], inputs["HR"],
+        inputs["R_p"], inputs["R_s"], inputs["V_total"], inputs["EF"],
+    )
+    logger.debug("condition flows Q_s=%s Q_p=%s P_a=%s P_v=%s", Q_s, Q_p, P_a, P_v)
+
+    VO2 = indexed_cvo2_to_vo2(inputs["CVO2"])
+    S_m, S_sv, OD2 = saturation_solver(Q_s, Q_p, inputs["Hb"], VO2)
+    logger.debug("condition saturations S_m=%s S_sv=%s OD2=%s", S_m, S_sv, OD2)
+
+    validate_physiology(S_m, S_sv, OD2)
+
+    return format_condition_results(Q_s, Q_p, P_a, P_v, S_m, S_sv, OD2)
+
+
+def solve_condition_values_batch(items):
+    return solve_steady_state_batch(
+        items,
+        CONDITION_INPUTS,
+        lambda p: flow_pressure_solver_2_batch(
+            p["C_dia"], p["C_A"], p["C_V"], p["HR"], p["R_p"], p["R_s"], p["V_total"], p["EF"],
+        ),
+        format_condition_results,
+        solve_condition_values,
+    )
+
+
+condition_batcher = batcher_from_env(solve_condition_values_batch)
+
+
 @app.route("/calculate_condition_values", methods=["POST"])
 def calculate_condition_values():
     data = request.json
-    print("Received /calculate_condition_values payload:", data)
+    logger.debug("calculate_condition_values payload=%s", data)
+
+    if not data:
+        return jsonify({"error": "No input data received."}), 400
+
+    try:
+        with phase("parse"):
+            inputs = {name: float(data.get(name)) for name in CONDITION_INPUTS}
+
+        with phase("solve"):
+            if condition_batcher is not None:
+                result = condition_batcher(inputs)
+            else:
+                result = solve_condition_values(inputs)
+
+        with phase("serialize"):
+            return jsonify(result)
+
+    except Exception as e:
+        logger.exception("%s failed", request.endpoint)
+        return jsonify({"error": f"Failed to calculate condition values: {str(e)}"}), 400
+
+
+@app.route("/batch_stats")
+def batch_stats():
+    """
+    Batch size distribution of the micro-batched solve routes.
+    """
+    return jsonify({
+        name: batcher.stats() if batcher is not None else {"enabled": False}
+        for name, batcher in (("process", process_batcher), ("calculate_condition_values", condition_batcher))
+    })
+
+
+@app.route("/compare_drug_scenarios", methods=["POST"])
+def compare_drug_scenarios():
+    """
+    Evaluate a baseline and many R_s/R_p scenarios in one vectorized solve.
+    Expects {"baseline": {...}, "drugs": [...]} and/or
+    {"scenarios": [{"label": ..., "R_s_factor": ..., "R_p_factor": ...}]}.
+    """
+    data = request.json
 
     if not data:
         return jsonify({"error": "No input data received."}), 400
 
     try:
-        HR = float(data.get("HR"))
-        EF = float(data.get("EF"))
-        C_dia = float(data.get("C_dia"))
-        C_A = float(data.get("C_A"))
-        C_V = float(data.get("C_V"))
-        R_s = float(data.get("R_s"))
-        R_p = float(data.get("R_p"))
-        V_total = float(data.get("V_total"))
-        Hb = float(data.get("Hb"))
-        CVO2 = float(data.get("CVO2"))
-
-        print("Parsed inputs:", HR, EF, C_dia, C_A, C_V, R_s, R_p, V_total, Hb, CVO2)
-
-        # EF-based steady-state model from the report
-        Q_s, Q_p, P_a, P_v = flow_pressure_solver_2(
-            C_dia, C_A, C_V, HR, R_p, R_s, V_total, EF
+        baseline = data.get("baseline") or {}
+        inputs = {key: float(baseline[key]) for key in CONDITION_INPUTS}
+
+        scenarios = [{"label": "baseline", "R_s_factor": 1.0, "R_p_factor": 1.0}]
+        for drug in data.get("drugs", []):
+            key = str(drug).strip().lower()
+            if key not in DRUG_EFFECTS:
+                return jsonify({"error": f"Invalid drug selection: {drug}"}), 400
+            effect = DRUG_EFFECTS[key]
+            scenarios.append({
+                "label": key,
+                "R_s_factor": 1 - effect["svr_reduction"],
+                "R_p_factor": 1 - effect["pvr_reduction"],
+            })
+        for scenario in data.get("scenarios", []):
+            scenarios.append({
+                "label": str(scenario.get("label", f"scenario_{len(scenarios)}")),
+                "R_s_factor": float(scenario.get("R_s_factor", 1.0)),
+                "R_p_factor": float(scenario.get("R_p_factor", 1.0)),
+            })
+
+        R_s = inputs["R_s"] * np.array([s["R_s_factor"] for s in scenarios])
+        R_p = inputs["R_p"] * np.array([s["R_p_factor"] for s in scenarios])
+
+        # Scenarios with invalid factors are reported without failing the others
+        codes = input_codes({**inputs, "R_s": R_s, "R_p": R_p})
+        reports = {report["row"]: report for report in row_reports(combine_codes(codes), codes)}
+        Q_s, Q_p, P_a, P_v = flow_pressure_solver_2_batch(
+            inputs["C_dia"], inputs["C_A"], inputs["C_V"], inputs["HR"],
+            R_p, R_s, inputs["V_total"], inputs["EF"], errors="mask",
         )
-        print("Flow outputs:", Q_s, Q_p, P_a, P_v)
+        VO2 = indexed_cvo2_to_vo2(inputs["CVO2"])
+        S_m, S_sv, OD2 = saturation_solver_batch(Q_s, Q_p, inputs["Hb"], VO2, check_inputs=False)
+
+        results = []
+        for i, scenario in enumerate(scenarios):
+            entry = {**scenario, "R_s": round(float(R_s[i]), 4), "R_p": round(float(R_p[i]), 4)}
+            if i in reports:
+                entry["error"] = "Invalid inputs: " + "; ".join(reports[i]["problems"])
+                results.append(entry)
+                continue
+            try:
+                validate_physiology(S_m[i], S_sv[i], OD2[i])
+                entry["data"] = format_condition_results(
+                    float(Q_s[i]), float(Q_p[i]), float(P_a[i]), float(P_v[i]),
+                    float(S_m[i]), float(S_sv[i]), float(OD2[i]),
+                )
+            except ValueError as e:
+                entry["error"] = str(e)
+            results.append(entry)
+
+        return jsonify({"baseline": results[0], "scenarios": results[1:]})
 
-        VO2 = indexed_cvo2_to_vo2(CVO2)
-        S_m, S_sv, OD2 = saturation_solver(Q_s, Q_p, Hb, VO2)
-        print("Sat outputs:", S_m, S_sv, OD2)
+    except Exception as e:
+        logger.exception("%s failed", request.endpoint)
+        return jsonify({"error": f"Failed to compare scenarios: {str(e)}"}), 400
 
-        validate_physiology(S_m, S_sv, OD2)
 
-        Q_RV = Q_s + Q_p
-        Qp_Qs = Q_p / Q_s if Q_s != 0 else None
+@app.route("/drug_combinations", methods=["POST"])
+def drug_combinations():
+    """
+    Search dose-scaled drug combinations and return the Pareto-optimal
+    options for oxygen delivery versus Qp/Qs balance.
+    Expects {"baseline": {...}} with optional "drugs", "dose_levels",
+    "max_drugs" and "target_qp_qs".
+    """
+    data = request.json
+
+    if not data:
+        return jsonify({"error": "No input data received."}), 400
+
+    try:
+        baseline = data.get("baseline") or {}
+        inputs = {key: float(baseline[key]) for key in CONDITION_INPUTS}
+        dose_levels = [float(d) for d in data.get("dose_levels", DEFAULT_DOSE_LEVELS)]
+        max_drugs = int(data.get("max_drugs", 2))
+        target = float(data.get("target_qp_qs", 1.0))
+        drugs = data.get("drugs")
+
+        if len(dose_levels) > MAX_DOSE_LEVELS:
+            return jsonify({"error": f"At most {MAX_DOSE_LEVELS} dose levels are allowed."}), 400
+        if not (0 <= max_drugs <= MAX_COMBINED_DRUGS):
+            return jsonify({"error": f"max_drugs must be between 0 and {MAX_COMBINED_DRUGS}."}), 400
+        n_drugs = len(DRUG_EFFECTS) if drugs is None else len(drugs)
+        if count_combinations(n_drugs, dose_levels, max_drugs) > MAX_DRUG_COMBINATIONS:
+            return jsonify({"error": f"The search would evaluate more than {MAX_DRUG_COMBINATIONS} combinations."}), 400
+
+        result = evaluate_drug_combinations(
+            inputs,
+            drugs=drugs,
+            dose_levels=dose_levels,
+            max_drugs=max_drugs,
+            target_qp_qs=target,
+        )
+
+        options = []
+        for i in result["pareto"]:
+            options.append({
+                "doses": {
+                    drug: float(dose)
+                    for drug, dose in zip(result["drugs"], result["doses"][i])
+                    if dose > 0
+                },
+                "R_s": round(float(result["R_s"][i]), 4),
+                "R_p": round(float(result["R_p"][i]), 4),
+                "data": format_condition_results(
+                    float(result["Q_s"][i]), float(result["Q_p"][i]),
+                    float(result["P_a"][i]), float(result["P_v"][i]),
+                    float(result["S_m"][i]), float(result["S_sv"][i]),
+                    float(result["OD2"][i]),
+                ),
+            })
 
         return jsonify({
-            "Q_s": round(Q_s, 2),
-            "Q_p": round(Q_p, 2),
-            "Q_RV": round(Q_RV, 2),
-            "P_a": round(P_a, 2),
-            "P_v": round(P_v, 2),
-            "S_m": round(S_m, 4),
-            "S_sv": round(S_sv, 4),
-            "OD2": round(OD2, 2),
-            "Qp_Qs": round(Qp_Qs, 4) if Qp_Qs is not None else None,
+            "n_evaluated": int(result["doses"].shape[0]),
+            "n_physiologic": int(np.count_nonzero(result["physiologic"])),
+            "pareto": options,
         })
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": f"Failed to calculate condition values: {str(e)}"}), 400
+        logger.exception("%s failed", request.endpoint)
+        return jsonify({"error": f"Failed to evaluate drug combinations: {str(e)}"}), 400
+
+
+@app.route("/calibrate_patient", methods=["POST"])
+def calibrate_patient():
+    """
+    Fit the EF-based steady-state model to a patient's measured targets.
+    Expects {"inputs": {...}, "observed": {...}, "fit": [...]} where inputs
+    uses the same keys as /calculate_condition_values.
+    """
+    data = request.json
+
+    if not data:
+        return jsonify({"error": "No input data received."}), 400
+
+    try:
+        inputs = {**get_clinical_baseline(), **data.get("inputs", {})}
+        inputs = {key: float(value) for key, value in inputs.items()}
+        observed = {
+            key: float(value)
+            for key, value in data.get("observed", {}).items()
+            if key in CALIBRATION_TARGETS
+        }
+        fit = data.get("fit") or ("R_s", "R_p", "C_dia")
+
+        result = calibrate_steady_state(observed, inputs, fit=fit)
+
+        return jsonify({
+            "params": {key: round(float(value[0]), 6) for key, value in result["params"].items()},
+            "residuals": {key: round(float(value[0]), 6) for key, value in result["residuals"].items()},
+            "converged": bool(result["converged"][0]),
+            "iterations": int(result["iterations"][0]),
+        })
+
+    except Exception as e:
+        logger.exception("%s failed", request.endpoint)
+        return jsonify({"error": f"Failed to calibrate: {str(e)}"}), 400
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.environ.get("NORWOOD_LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s %(message)s",
+    )
     app.run(host="0.0.0.0", port=5001, debug=True)
\ No newline at end of file
@@ -1,6 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy as sp
 
 def arterial_and_venous_compliance_solver(P_a, P_v, V_total = 0):
     """
@@ -38,7 +36,9 @@ def arterial_and_venous_compliance_solver(P_a, P_v, V_total = 0):
     
     A = P_a + 7*P_v
 
-    x, residuals, rank, s= sp.linalg.lstsq(A, V_t)
+    from scipy import linalg
+
+    x, residuals, rank, s= linalg.lstsq(A, V_t)
 
     C_A_hat = x[0][0]
     C_V_hat = 7*C_A_hat
@@ -0,0 +1,21 @@
+"""
+ASGI entry point for serving the web tool with an async server.
+
+Flask is a WSGI app, so asgiref's WsgiToAsgi runs each request in a worker
+thread; the event loop stays free for other connections while plots are
+computed on the shared solver pool (see coalesce.py).
+
+Requires the optional asgiref package and an ASGI server, e.g.:
+    pip install asgiref uvicorn
+    cd src && uvicorn asgi:application --port 5001
+"""
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError as e:
+    raise ImportError(
+        "ASGI serving needs the optional asgiref package: pip install asgiref"
+    ) from e
+
+from app import app
+
+application = WsgiToAsgi(app)
@@ -0,0 +1,160 @@
+import numpy as np
+
+
+def weighted_ratio_fit(a, b, mask=None, weights=None):
+    """
+    Fit the one-parameter model b = x*a independently for every row of
+    stacked sample arrays.
+
+    For a single unknown the least-squares normal equation reduces to
+    x = sum(w*a*b) / sum(w*a*a), so no matrix factorization is needed and
+    every patient is fit in the same vectorized pass.
+
+    Parameters
+    ----------
+    a : array_like, shape (n_patients, n_samples) or (n_samples,)
+        Regressor samples.
+    b : array_like, same shape as a
+        Observed samples.
+    mask : array_like of bool, same shape as a, optional
+        True where a sample is valid. Samples that are NaN in a or b are
+        always treated as missing.
+    weights : array_like, broadcastable to a, optional
+        Non-negative sample weights. Default is 1 for every sample.
+
+    Returns
+    -------
+    x_hat : ndarray, shape (n_patients,)
+        Estimated parameter per row. NaN where a row has no usable samples.
+    std_err : ndarray, shape (n_patients,)
+        Standard error of x_hat. NaN where a row has fewer than two usable
+        samples.
+    n_used : ndarray of int, shape (n_patients,)
+        Number of samples used per row.
+    """
+    a = np.atleast_2d(np.asarray(a, dtype=float))
+    b = np.atleast_2d(np.asarray(b, dtype=float))
+    if a.shape != b.shape:
+        raise ValueError(f"a and b must have the same shape (got {a.shape} and {b.shape}).")
+
+    valid = np.isfinite(a) & np.isfinite(b)
+    if mask is not None:
+        valid &= np.broadcast_to(np.asarray(mask, dtype=bool), a.shape)
+
+    if weights is None:
+        w = valid.astype(float)
+    else:
+        w = np.broadcast_to(np.asarray(weights, dtype=float), a.shape)
+        if np.any(w[valid] < 0):
+            raise ValueError("weights must be non-negative.")
+        w = np.where(valid, w, 0.0)
+
+    # Zero out missing entries so NaNs never reach the sums
+    a = np.where(valid, a, 0.0)
+    b = np.where(valid, b, 0.0)
+
+    s_aa = np.sum(w * a * a, axis=1)
+    s_ab = np.sum(w * a * b, axis=1)
+    n_used = np.count_nonzero(w > 0, axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_hat = np.where(s_aa > 0, s_ab / s_aa, np.nan)
+
+        residuals = b - a * x_hat[:, None]
+        sigma2 = np.sum(w * residuals * residuals, axis=1) / (n_used - 1)
+        std_err = np.where(n_used > 1, np.sqrt(sigma2 / s_aa), np.nan)
+
+    return x_hat, std_err, n_used
+
+
+def arterial_and_venous_compliance_batch(P_a, P_v, V_total=None, mask=None, weights=None):
+    """
+    Batched version of arterial_and_venous_compliance_solver.
+
+    Uses P_a*C_A + P_v*C_V = V_total with C_V ~= 7*C_A for every patient
+    (row) at once. If V_total is None the ratios C_A/V_total and
+    C_V/V_total are estimated instead.
+
+    Parameters
+    ----------
+    P_a : array_like, shape (n_patients, n_samples)
+        Arterial pressure samples (mmHg). NaN marks a missing sample.
+    P_v : array_like, shape (n_patients, n_samples)
+        Venous pressure samples (mmHg). NaN marks a missing sample.
+    V_total : array_like, optional
+        Total blood volume (L), broadcastable to P_a. Default is None.
+    mask : array_like of bool, optional
+        True where a sample is valid.
+    weights : array_like, optional
+        Non-negative sample weights broadcastable to P_a.
+
+    Returns
+    -------
+    C_A_hat : ndarray, shape (n_patients,)
+        Estimated arterial compliance (or ratio to V_total).
+    C_V_hat : ndarray, shape (n_patients,)
+        Estimated venous compliance (or ratio to V_total).
+    C_A_se : ndarray, shape (n_patients,)
+        Standard error of C_A_hat. The standard error of C_V_hat is 7*C_A_se.
+    n_used : ndarray of int, shape (n_patients,)
+        Number of samples used per patient.
+    """
+    P_a = np.atleast_2d(np.asarray(P_a, dtype=float))
+    P_v = np.atleast_2d(np.asarray(P_v, dtype=float))
+
+    if V_total is None:
+        V_t = np.ones(P_a.shape)
+    else:
+        V_t = np.broadcast_to(np.asarray(V_total, dtype=float), P_a.shape)
+
+    A = P_a + 7*P_v
+
+    C_A_hat, C_A_se, n_used = weighted_ratio_fit(A, V_t, mask=mask, weights=weights)
+    C_V_hat = 7*C_A_hat
+
+    return C_A_hat, C_V_hat, C_A_se, n_used
+
+
+def systolic_and_diastolic_compliance_batch(P_v, HR, EF, Q_s, Q_p, mask=None, weights=None):
+    """
+    Batched version of systolic_and_diastolic_compliance_solver.
+
+    Uses Q_s + Q_p = HR*EF*P_v*C_dia to estimate C_dia for every patient
+    (row) at once.
+
+    Parameters
+    ----------
+    P_v : array_like, shape (n_patients, n_samples)
+        Venous pressure samples (mmHg).
+    HR : array_like, shape (n_patients, n_samples)
+        Heart rate samples (beats per minute).
+    EF : array_like, shape (n_patients, n_samples)
+        Ejection fraction samples as a decimal.
+    Q_s : array_like, shape (n_patients, n_samples)
+        Systemic flow samples (L/min).
+    Q_p : array_like, shape (n_patients, n_samples)
+        Pulmonary flow samples (L/min).
+    mask : array_like of bool, optional
+        True where a sample is valid. NaN in any input marks it missing.
+    weights : array_like, optional
+        Non-negative sample weights broadcastable to P_v.
+
+    Returns
+    -------
+    C_dia : ndarray, shape (n_patients,)
+        Estimated diastolic compliance.
+    C_dia_se : ndarray, shape (n_patients,)
+        Standard error of C_dia.
+    n_used : ndarray of int, shape (n_patients,)
+        Number of samples used per patient.
+    """
+    P_v = np.atleast_2d(np.asarray(P_v, dtype=float))
+    HR = np.atleast_2d(np.asarray(HR, dtype=float))
+    EF = np.atleast_2d(np.asarray(EF, dtype=float))
+    Q_s = np.atleast_2d(np.asarray(Q_s, dtype=float))
+    Q_p = np.atleast_2d(np.asarray(Q_p, dtype=float))
+
+    A = HR*EF*P_v
+    b = Q_s + Q_p
+
+    return weighted_ratio_fit(A, b, mask=mask, weights=weights)
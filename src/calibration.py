@@ -0,0 +1,245 @@
+import numpy as np
+
+from Norwood_Circulation_Solver_Functions import (
+    FLOW_PRESSURE_2_PARAMETERS,
+    flow_pressure_solver_2_batch,
+    flow_pressure_solver_2_jacobian,
+    indexed_cvo2_to_vo2,
+)
+
+CALIBRATION_TARGETS = ("Q_s", "Q_p", "P_a", "P_v", "S_m", "S_sv", "Qp_Qs")
+
+DEFAULT_FIT_PARAMETERS = ("R_s", "R_p", "C_dia")
+
+S_PV = 0.99
+
+
+def _model_outputs(params, VO2, oxygen_capacity):
+    """
+    Steady-state outputs for every target given a dict of parameter arrays.
+    """
+    Q_s, Q_p, P_a, P_v = flow_pressure_solver_2_batch(
+        params["C_dia"], params["C_A"], params["C_V"], params["HR"],
+        params["R_p"], params["R_s"], params["V_total"], params["EF"],
+    )
+    S_m = S_PV - VO2 / (oxygen_capacity * Q_p)
+    S_sv = S_m - VO2 / (oxygen_capacity * Q_s)
+
+    return {
+        "Q_s": Q_s,
+        "Q_p": Q_p,
+        "P_a": P_a,
+        "P_v": P_v,
+        "S_m": S_m,
+        "S_sv": S_sv,
+        "Qp_Qs": Q_p / Q_s,
+    }
+
+
+def _model_jacobian(params, VO2, oxygen_capacity):
+    """
+    Outputs and their derivatives with respect to every flow parameter.
+
+    Flow and pressure sensitivities come from the 4x4 system; saturation
+    sensitivities follow from the chain rule through Q_s and Q_p.
+    """
+    x, dx = flow_pressure_solver_2_jacobian(*(params[name] for name in FLOW_PRESSURE_2_PARAMETERS))
+    Q_s, Q_p, P_a, P_v = x.T
+    dQ_s, dQ_p, dP_a, dP_v = dx[:, 0], dx[:, 1], dx[:, 2], dx[:, 3]
+
+    k = VO2 / oxygen_capacity
+    S_m = S_PV - k / Q_p
+    S_sv = S_m - k / Q_s
+    dS_m = (k / Q_p**2)[:, None] * dQ_p
+    dS_sv = dS_m + (k / Q_s**2)[:, None] * dQ_s
+    dratio = dQ_p / Q_s[:, None] - (Q_p / Q_s**2)[:, None] * dQ_s
+
+    outputs = {
+        "Q_s": Q_s,
+        "Q_p": Q_p,
+        "P_a": P_a,
+        "P_v": P_v,
+        "S_m": S_m,
+        "S_sv": S_sv,
+        "Qp_Qs": Q_p / Q_s,
+    }
+    derivatives = {
+        "Q_s": dQ_s,
+        "Q_p": dQ_p,
+        "P_a": dP_a,
+        "P_v": dP_v,
+        "S_m": dS_m,
+        "S_sv": dS_sv,
+        "Qp_Qs": dratio,
+    }
+    return outputs, derivatives
+
+
+def calibrate_steady_state(observed, baseline, fit=DEFAULT_FIT_PARAMETERS, bounds=None,
+                           target_scale=None, max_iter=100, tol=1e-10):
+    """
+    Fit parameters of flow_pressure_solver_2 so the steady-state model
+    reproduces each patient's observed hemodynamics.
+
+    All patients are calibrated together with a bounded Levenberg-Marquardt
+    iteration. Parameters are fit in log space (so they stay positive) and
+    projected onto their bounds after every step. The Jacobian is analytic.
+
+    Parameters
+    ----------
+    observed : dict
+        Maps target names in CALIBRATION_TARGETS to arrays of shape
+        (n_patients,). NaN marks a target that was not measured for a patient.
+    baseline : dict
+        Values for every parameter in FLOW_PRESSURE_2_PARAMETERS plus Hb
+        (g/dL) and CVO2 (indexed, mL/m^2/min). Each may be a float or an
+        array of shape (n_patients,). Fitted parameters start from these
+        values; the rest are held fixed.
+    fit : sequence of str, optional
+        Parameters to fit. Default is ("R_s", "R_p", "C_dia").
+    bounds : dict, optional
+        Maps a fitted parameter to (lower, upper). Defaults are 0.1x and
+        10x the starting value, and EF is capped at 1.
+    target_scale : dict, optional
+        Residual scale per target. Default is the absolute observed value,
+        so residuals are relative errors.
+    max_iter : int, optional
+        Maximum number of iterations. Default is 100.
+    tol : float, optional
+        Convergence tolerance on the relative change in cost. Default is 1e-10.
+
+    Returns
+    -------
+    result : dict
+        "params": dict of fitted and fixed parameter arrays,
+        "residuals": dict of model minus observed per target,
+        "cost": half the sum of squared scaled residuals per patient,
+        "converged": bool array, "iterations": int array.
+    """
+    fit = tuple(fit)
+    for name in fit:
+        if name not in FLOW_PRESSURE_2_PARAMETERS:
+            raise ValueError(f"Cannot fit {name}; choose from {FLOW_PRESSURE_2_PARAMETERS}.")
+    targets = tuple(name for name in CALIBRATION_TARGETS if name in observed)
+    unknown = set(observed) - set(CALIBRATION_TARGETS)
+    if unknown:
+        raise ValueError(f"Unknown calibration targets: {sorted(unknown)}.")
+    if not targets:
+        raise ValueError("At least one observed target is required.")
+
+    obs = np.column_stack([np.atleast_1d(np.asarray(observed[name], dtype=float)) for name in targets])
+    n = obs.shape[0]
+
+    params = {
+        name: np.broadcast_to(np.asarray(baseline[name], dtype=float), (n,)).copy()
+        for name in FLOW_PRESSURE_2_PARAMETERS
+    }
+    Hb = np.broadcast_to(np.asarray(baseline["Hb"], dtype=float), (n,))
+    VO2 = indexed_cvo2_to_vo2(np.broadcast_to(np.asarray(baseline["CVO2"], dtype=float), (n,)))
+    oxygen_capacity = 1.34 * Hb * 10.0
+
+    if target_scale is None:
+        scale = np.abs(obs)
+    else:
+        scale = np.column_stack([
+            np.broadcast_to(np.asarray(target_scale.get(name, 1.0), dtype=float), (n,))
+            for name in targets
+        ])
+    measured = np.isfinite(obs)
+    inv_scale = np.where(measured & (scale > 0), 1.0 / np.where(scale > 0, scale, 1.0), 0.0)
+    obs = np.where(measured, obs, 0.0)
+
+    lower = np.empty((n, len(fit)))
+    upper = np.empty((n, len(fit)))
+    for j, name in enumerate(fit):
+        start = params[name]
+        lo, hi = (bounds or {}).get(name, (0.1*start, 10*start))
+        if name == "EF":
+            hi = np.minimum(hi, 1.0)
+        lower[:, j] = np.log(lo)
+        upper[:, j] = np.log(hi)
+    fit_index = [FLOW_PRESSURE_2_PARAMETERS.index(name) for name in fit]
+
+    u = np.clip(np.log(np.column_stack([params[name] for name in fit])), lower, upper)
+
+    def with_fit(u_values, rows=slice(None)):
+        trial = {name: values[rows] for name, values in params.items()}
+        for j, name in enumerate(fit):
+            trial[name] = np.exp(u_values[:, j])
+        return trial
+
+    def scaled_residuals(outputs, rows=slice(None)):
+        model = np.column_stack([outputs[name] for name in targets])
+        return (model - obs[rows]) * inv_scale[rows]
+
+    outputs = _model_outputs(with_fit(u), VO2, oxygen_capacity)
+    r = scaled_residuals(outputs)
+    cost = 0.5 * np.sum(r * r, axis=1)
+
+    damping = np.full(n, 1e-3)
+    active = np.ones(n, dtype=bool)
+    iterations = np.zeros(n, dtype=int)
+    converged = np.zeros(n, dtype=bool)
+
+    for _ in range(max_iter):
+        rows = np.flatnonzero(active)
+        if rows.size == 0:
+            break
+
+        trial_params = with_fit(u[rows], rows)
+        outputs, derivatives = _model_jacobian(trial_params, VO2[rows], oxygen_capacity[rows])
+        r = scaled_residuals(outputs, rows)
+        theta = np.exp(u[rows])
+        # d(residual)/d(log theta) = d(residual)/d(theta) * theta
+        J = np.stack([derivatives[name][:, fit_index] for name in targets], axis=1)
+        J = J * inv_scale[rows][:, :, None] * theta[:, None, :]
+
+        # Freeze parameters pinned at a bound by a gradient pointing outward
+        g = np.einsum("nmp,nm->np", J, r)
+        pinned = ((u[rows] <= lower[rows]) & (g > 0)) | ((u[rows] >= upper[rows]) & (g < 0))
+        J = np.where(pinned[:, None, :], 0.0, J)
+        g = np.where(pinned, 0.0, g)
+
+        H = np.einsum("nmp,nmq->npq", J, J)
+        diag = np.einsum("npp->np", H)
+        H_damped = H + (damping[rows][:, None] * diag + 1e-12)[:, :, None] * np.eye(len(fit))
+        step = -np.linalg.solve(H_damped, g[:, :, None])[:, :, 0]
+
+        u_trial = np.clip(u[rows] + step, lower[rows], upper[rows])
+        trial_outputs = _model_outputs(with_fit(u_trial, rows), VO2[rows], oxygen_capacity[rows])
+        r_trial = scaled_residuals(trial_outputs, rows)
+        cost_trial = 0.5 * np.sum(r_trial * r_trial, axis=1)
+
+        old_cost = cost[rows]
+        improved = cost_trial < old_cost
+        step_size = np.max(np.abs(u_trial - u[rows]), axis=1)
+        u[rows] = np.where(improved[:, None], u_trial, u[rows])
+        cost[rows] = np.where(improved, cost_trial, old_cost)
+        damping[rows] = np.where(improved, damping[rows] * 0.3, damping[rows] * 10.0)
+        iterations[rows] += 1
+
+        change = np.abs(old_cost - cost[rows])
+        success = (
+            (improved & (change <= tol * old_cost))
+            | (cost[rows] <= 1e-30)
+            | (step_size <= 1e-12)
+            | (np.max(np.abs(g), axis=1) <= 1e-14)
+        )
+        stalled = damping[rows] > 1e12
+        converged[rows] = success
+        active[rows] = ~(success | stalled)
+
+    fitted = with_fit(u)
+    outputs = _model_outputs(fitted, VO2, oxygen_capacity)
+    residuals = {
+        name: np.where(measured[:, j], outputs[name] - obs[:, j], np.nan)
+        for j, name in enumerate(targets)
+    }
+
+    return {
+        "params": fitted,
+        "residuals": residuals,
+        "cost": cost,
+        "converged": converged,
+        "iterations": iterations,
+    }
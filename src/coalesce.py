@@ -0,0 +1,100 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_SOLVER_WORKERS = int(os.environ.get("NORWOOD_SOLVER_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+class RequestCoalescer:
+    """
+    Single-flight execution of identical concurrent computations.
+
+    The first caller for a key starts the computation on the executor; any
+    caller that arrives with the same key while it is still running waits
+    on the same future instead of starting another. Once the computation
+    finishes the key is forgotten, so later calls compute afresh (results
+    are not cached).
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor, optional
+        Where computations run. If None, they run in the calling thread of
+        the first caller.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor
+        self._lock = threading.RLock()
+        self._in_flight = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Future for fn(*args, **kwargs), shared with any in-flight call
+        that has the same key. key must be hashable and identify the
+        result completely.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+
+            if self.executor is not None:
+                # Run in a copy of the caller's context so request-scoped state
+                # (e.g. instrumentation phase timers) follows the computation
+                future = self.executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+                run_inline = False
+            else:
+                future = Future()
+                future.set_running_or_notify_cancel()
+                run_inline = True
+
+            # Register before adding the callback, which runs immediately
+            # if the executor has already finished
+            self._in_flight[key] = future
+            self.started += 1
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        if run_inline:
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        return future
+
+    def run(self, key, fn, *args, timeout=None, **kwargs):
+        """
+        Blocking form of submit: return the result or raise its exception.
+        """
+        return self.submit(key, fn, *args, **kwargs).result(timeout)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._in_flight)
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+
+_solver_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_solver_executor():
+    """
+    Shared thread pool for CPU-bound solves, created on first use with
+    NORWOOD_SOLVER_WORKERS threads (default min(4, cpu_count)).
+    """
+    global _solver_executor
+    with _executor_lock:
+        if _solver_executor is None:
+            _solver_executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_SOLVER_WORKERS, thread_name_prefix="solver"
+            )
+        return _solver_executor
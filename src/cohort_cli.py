@@ -0,0 +1,247 @@
+"""
+Evaluate the EF-based steady-state model for every row of a patient table.
+
+Reads a CSV or Parquet table with the columns HR, EF, C_dia, C_A, C_V, R_s,
+R_p, V_total, Hb and CVO2 (the /calculate_condition_values inputs) in
+chunks, solves each chunk with the vectorized solvers, and writes the input
+columns followed by the outputs to a CSV or Parquet file. Memory use is
+bounded by the chunk size, so tables of millions of rows stream through.
+
+CVO2 is indexed by body surface area. The optional columns BSA (m^2), or
+weight_kg and height_cm with a BSA formula, give each patient's BSA; rows
+without them use DEFAULT_BSA.
+
+Rows with a missing or out-of-range input are kept, with NaN outputs and
+valid_inputs = False; physiologic is False where the flows, saturations or
+oxygen delivery are out of range. The status column holds each row's
+validation status bits (see validation.py) and the run ends with a count of
+rows per problem.
+
+Usage:
+    python cohort_cli.py patients.csv results.parquet [--chunk-size 100000]
+                         [--bsa-formula mosteller|haycock|dubois]
+
+Parquet input or output needs the optional pyarrow package. Parquet output
+is also much faster to write than CSV for large tables.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from Norwood_Circulation_Solver_Functions import (
+    BSA_FORMULAS,
+    flow_pressure_solver_2_batch,
+    oxygenation_batch,
+    resolve_bsa,
+)
+from validation import STATUS_OK, combine_codes, input_codes, output_status, status_counts
+
+COHORT_INPUTS = ("HR", "EF", "C_dia", "C_A", "C_V", "R_s", "R_p", "V_total", "Hb", "CVO2")
+
+# Optional per-patient size columns, see resolve_bsa
+COHORT_SIZE_INPUTS = ("BSA", "weight_kg", "height_cm")
+
+COHORT_OUTPUTS = (
+    "BSA_used", "VO2", "Q_s", "Q_p", "Q_total", "Qp_Qs", "P_a", "P_v", "S_m", "S_sv", "OD2",
+    "valid_inputs", "physiologic", "status",
+)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def evaluate_cohort(columns, bsa_formula="mosteller"):
+    """
+    Steady-state outputs for arrays of patients.
+
+    Parameters
+    ----------
+    columns : dict
+        Maps each name in COHORT_INPUTS to a 1-D array. CVO2 is indexed
+        oxygen consumption (mL/m^2/min). May also hold any of
+        COHORT_SIZE_INPUTS, with NaN for patients not measured.
+    bsa_formula : str, optional
+        BSA formula for rows with weight and height but no BSA.
+
+    Returns
+    -------
+    outputs : dict
+        Maps each name in COHORT_OUTPUTS to an array. Float outputs are NaN
+        where valid_inputs is False; status is the uint8 bitwise OR of the
+        input and output status codes of validation.py.
+    """
+    missing = [name for name in COHORT_INPUTS if name not in columns]
+    if missing:
+        raise ValueError(f"Missing input columns: {', '.join(missing)}.")
+
+    inputs = {name: np.asarray(columns[name], dtype=float) for name in COHORT_INPUTS}
+
+    bsa = resolve_bsa(
+        *(columns.get(name) for name in COHORT_SIZE_INPUTS), formula=bsa_formula,
+    )
+    status = combine_codes(input_codes({**inputs, "BSA": bsa}))
+    valid = status == STATUS_OK
+    bsa = np.broadcast_to(bsa, valid.shape)
+
+    # Invalid rows come out as NaN instead of aborting their chunk
+    Q_s, Q_p, P_a, P_v = flow_pressure_solver_2_batch(
+        inputs["C_dia"], inputs["C_A"], inputs["C_V"], inputs["HR"],
+        inputs["R_p"], inputs["R_s"], inputs["V_total"], inputs["EF"], errors="mask",
+    )
+    oxygen = oxygenation_batch(Q_s, Q_p, inputs["Hb"], inputs["CVO2"], bsa, check_inputs=False)
+    S_m, S_sv, OD2 = oxygen["S_m"], oxygen["S_sv"], oxygen["OD2"]
+
+    outputs = {
+        "BSA_used": bsa.copy(),
+        "VO2": oxygen["VO2"],
+        "Q_s": Q_s,
+        "Q_p": Q_p,
+        "Q_total": Q_s + Q_p,
+        "Qp_Qs": Q_p / Q_s,
+        "P_a": P_a,
+        "P_v": P_v,
+        "S_m": S_m,
+        "S_sv": S_sv,
+        "OD2": OD2,
+    }
+    for values in outputs.values():
+        values[~valid] = np.nan
+
+    status[valid] |= output_status(S_m, S_sv, OD2, Q_s, Q_p)[valid]
+    outputs["valid_inputs"] = valid
+    outputs["physiologic"] = status == STATUS_OK
+    outputs["status"] = status
+    return outputs
+
+
+def _table_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".parquet", ".pq"):
+        return "parquet"
+    raise ValueError(f"Unsupported table format {extension!r}; use .csv or .parquet.")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet tables need the optional pyarrow package: pip install pyarrow"
+        ) from e
+    return pyarrow
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield a CSV or Parquet table as pandas DataFrames of up to chunk_size rows.
+    """
+    import pandas as pd
+
+    if _table_format(path) == "csv":
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    else:
+        pa = _import_pyarrow()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+
+class TableWriter:
+    """
+    Append DataFrames to a CSV or Parquet file. The first chunk fixes the
+    columns and, for Parquet, the schema that later chunks are cast to.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = _table_format(path)
+        self._parquet = None
+        self._started = False
+
+    def write(self, frame):
+        if self.format == "csv":
+            frame.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        else:
+            pa = _import_pyarrow()
+            if self._parquet is None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                self._parquet = pa.parquet.ParquetWriter(self.path, table.schema)
+            else:
+                table = pa.Table.from_pandas(frame, schema=self._parquet.schema, preserve_index=False)
+            self._parquet.write_table(table)
+        self._started = True
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_cohort(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, bsa_formula="mosteller"):
+    """
+    Evaluate every row of input_path and write the results to output_path.
+    bsa_formula is passed to evaluate_cohort.
+
+    Returns
+    -------
+    summary : dict
+        "rows", "valid_inputs" and "physiologic" counts, and "problems",
+        the number of rows with each validation problem.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1 (got {chunk_size}).")
+
+    summary = {"rows": 0, "valid_inputs": 0, "physiologic": 0, "problems": {}}
+    with TableWriter(output_path) as writer:
+        for frame in read_chunks(input_path, chunk_size):
+            names = [name for name in COHORT_INPUTS + COHORT_SIZE_INPUTS if name in frame.columns]
+            outputs = evaluate_cohort({name: frame[name].to_numpy(dtype=float) for name in names},
+                                      bsa_formula)
+
+            # Inputs as float so every chunk has the same column types
+            result = frame.astype({name: float for name in names})
+            result = result.assign(**outputs)
+            writer.write(result)
+
+            summary["rows"] += len(frame)
+            summary["valid_inputs"] += int(np.count_nonzero(outputs["valid_inputs"]))
+            summary["physiologic"] += int(np.count_nonzero(outputs["physiologic"]))
+            for message, count in status_counts(outputs["status"]).items():
+                summary["problems"][message] = summary["problems"].get(message, 0) + count
+
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Patient table (.csv or .parquet).")
+    parser.add_argument("output", help="Results table (.csv or .parquet).")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Rows per chunk (default {DEFAULT_CHUNK_SIZE}).")
+    parser.add_argument("--bsa-formula", choices=BSA_FORMULAS, default="mosteller",
+                        help="BSA formula for rows with weight_kg and height_cm but no BSA (default mosteller).")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summary = run_cohort(args.input, args.output, args.chunk_size, args.bsa_formula)
+    seconds = time.perf_counter() - start
+
+    print(f"Wrote {summary['rows']} rows to {args.output} in {seconds:.2f} s: "
+          f"{summary['valid_inputs']} with valid inputs, {summary['physiologic']} physiologic")
+    for message, count in summary["problems"].items():
+        print(f"  {count} rows: {message}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
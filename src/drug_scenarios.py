@@ -0,0 +1,245 @@
+import itertools
+import math
+
+import numpy as np
+
+from Norwood_Circulation_Solver_Functions import (
+    flow_pressure_solver_2_batch,
+    saturation_solver_batch,
+    indexed_cvo2_to_vo2,
+    physiologic_mask,
+)
+
+# Fractional SVR/PVR reductions at the standard dose of each drug
+DRUG_EFFECTS = {
+    "nicardipine": {
+        "svr_reduction": 0.30,
+        "pvr_reduction": 0.05,
+        "selectivity": "Poor pulmonary selectivity",
+    },
+    "milrinone": {
+        "svr_reduction": 0.175,
+        "pvr_reduction": 0.225,
+        "selectivity": "Moderate pulmonary selectivity",
+    },
+    "sildenafil": {
+        "svr_reduction": 0.10,
+        "pvr_reduction": 0.30,
+        "selectivity": "Good pulmonary selectivity",
+    },
+    "ino": {
+        "svr_reduction": 0.00,
+        "pvr_reduction": 0.45,
+        "selectivity": "Excellent pulmonary selectivity",
+    },
+    "epoprostenol": {
+        "svr_reduction": 0.15,
+        "pvr_reduction": 0.40,
+        "selectivity": "Good pulmonary selectivity",
+    },
+}
+
+# Doses are expressed as multiples of the standard dose
+DEFAULT_DOSE_LEVELS = (0.0, 0.5, 1.0, 1.5)
+DEFAULT_ED50 = 0.5
+MAX_REDUCTION = 0.95
+
+
+def dose_response(standard_reduction, dose, ed50=DEFAULT_ED50):
+    """
+    Fractional resistance reduction at a given dose.
+
+    Uses an Emax model, reduction = E_max*dose/(ED50 + dose), with E_max
+    chosen so a dose of 1 (the standard dose) reproduces the tabulated
+    reduction. The result is capped at MAX_REDUCTION.
+
+    Parameters
+    ----------
+    standard_reduction : float or array_like
+        Reduction at the standard dose (0 to 1).
+    dose : float or array_like
+        Dose as a multiple of the standard dose. Must be >= 0.
+    ed50 : float, optional
+        Dose giving half the maximal effect. Default is 0.5.
+
+    Returns
+    -------
+    reduction : ndarray
+        Fractional reduction with the broadcast shape of the inputs.
+    """
+    dose = np.asarray(dose, dtype=float)
+    if np.any(dose < 0):
+        raise ValueError("dose must be non-negative.")
+    if ed50 <= 0:
+        raise ValueError(f"ed50 must be positive (got {ed50}).")
+
+    e_max = np.asarray(standard_reduction, dtype=float) * (1 + ed50)
+    return np.minimum(e_max * dose / (ed50 + dose), MAX_REDUCTION)
+
+
+def _split_levels(dose_levels):
+    levels = np.asarray(dose_levels, dtype=float)
+    if np.unique(levels).size != levels.size:
+        raise ValueError("dose_levels must not repeat.")
+    return bool(np.any(levels == 0)), levels[levels != 0]
+
+
+def _combination_sizes(n_drugs, has_zero, n_nonzero, max_drugs):
+    max_drugs = n_drugs if max_drugs is None else min(max_drugs, n_drugs)
+    if n_nonzero == 0:
+        return [0] if has_zero else []
+    if not has_zero:
+        # Without a zero dose every drug is always given
+        return [n_drugs] if max_drugs >= n_drugs else []
+    return list(range(max_drugs + 1))
+
+
+def count_combinations(n_drugs, dose_levels=DEFAULT_DOSE_LEVELS, max_drugs=None):
+    """
+    Number of rows combination_grid returns, without building them.
+    """
+    has_zero, nonzero = _split_levels(dose_levels)
+    return sum(math.comb(n_drugs, k) * nonzero.size**k for k in _combination_sizes(n_drugs, has_zero, nonzero.size, max_drugs))
+
+
+def combination_grid(n_drugs, dose_levels=DEFAULT_DOSE_LEVELS, max_drugs=None):
+    """
+    Every assignment of a dose level to each drug.
+
+    Only combinations with at most max_drugs drugs at a non-zero dose are
+    built, as each subset of drugs times the non-zero levels, so the cost
+    follows count_combinations rather than len(dose_levels)**n_drugs.
+
+    Parameters
+    ----------
+    n_drugs : int
+        Number of drugs.
+    dose_levels : sequence of float, optional
+        Candidate doses for each drug, without repeats. Include 0 to allow
+        leaving a drug out.
+    max_drugs : int, optional
+        If given, drop combinations with more than this many drugs at a
+        non-zero dose.
+
+    Returns
+    -------
+    doses : ndarray, shape (n_combinations, n_drugs)
+    """
+    has_zero, nonzero = _split_levels(dose_levels)
+
+    blocks = []
+    for k in _combination_sizes(n_drugs, has_zero, nonzero.size, max_drugs):
+        if k == 0:
+            blocks.append(np.zeros((1, n_drugs)))
+            continue
+        subsets = np.array(list(itertools.combinations(range(n_drugs), k)))
+        levels = np.array(list(itertools.product(nonzero, repeat=k)))
+        block = np.zeros((len(subsets), len(levels), n_drugs))
+        rows = np.arange(len(subsets))[:, None, None]
+        cols = np.arange(len(levels))[None, :, None]
+        block[rows, cols, subsets[:, None, :]] = levels[None]
+        blocks.append(block.reshape(-1, n_drugs))
+
+    return np.concatenate(blocks) if blocks else np.zeros((0, n_drugs))
+
+
+def pareto_front(DO2, imbalance, valid=None):
+    """
+    Indices of options not dominated in (maximize DO2, minimize imbalance).
+
+    Sorting by DO2 reduces the search to a single pass: an option is on
+    the front if its imbalance is lower than every option with higher DO2.
+
+    Returns
+    -------
+    front : ndarray of int
+        Indices into the inputs, ordered by decreasing DO2.
+    """
+    DO2 = np.asarray(DO2, dtype=float)
+    imbalance = np.asarray(imbalance, dtype=float)
+    candidates = np.arange(DO2.size)
+    if valid is not None:
+        candidates = candidates[np.asarray(valid, dtype=bool)]
+    if candidates.size == 0:
+        return candidates
+
+    order = candidates[np.lexsort((imbalance[candidates], -DO2[candidates]))]
+    best_before = np.minimum.accumulate(np.concatenate(([np.inf], imbalance[order][:-1])))
+
+    return order[imbalance[order] < best_before]
+
+
+def evaluate_drug_combinations(baseline, drugs=None, dose_levels=DEFAULT_DOSE_LEVELS,
+                               max_drugs=2, ed50=DEFAULT_ED50, target_qp_qs=1.0):
+    """
+    Evaluate every dose combination of the given drugs with one vectorized
+    solve of flow_pressure_solver_2 and saturation_solver.
+
+    Combined effects assume Bliss independence, so resistance multipliers
+    of the individual drugs multiply.
+
+    Parameters
+    ----------
+    baseline : dict
+        Inputs of the conditions page: HR, EF, C_dia, C_A, C_V, R_s, R_p,
+        V_total, Hb, CVO2.
+    drugs : sequence of str, optional
+        Keys of DRUG_EFFECTS, each at most once. Default is every drug.
+    dose_levels : sequence of float, optional
+        Candidate doses as multiples of the standard dose.
+    max_drugs : int, optional
+        Maximum number of drugs given together. Default is 2.
+    ed50 : float, optional
+        ED50 of the dose-response curve. Default is 0.5.
+    target_qp_qs : float, optional
+        Desired pulmonary-to-systemic flow ratio. Default is 1.0.
+
+    Returns
+    -------
+    result : dict
+        "drugs", "doses" (n, n_drugs), "R_s", "R_p", "Q_s", "Q_p", "P_a",
+        "P_v", "S_m", "S_sv", "OD2", "Qp_Qs", "imbalance" (|Qp/Qs - target|),
+        "physiologic" mask, and "pareto" indices ordered by decreasing OD2.
+    """
+    drugs = tuple(DRUG_EFFECTS) if drugs is None else tuple(d.strip().lower() for d in drugs)
+    for drug in drugs:
+        if drug not in DRUG_EFFECTS:
+            raise ValueError(f"Unknown drug: {drug}")
+    if len(set(drugs)) != len(drugs):
+        raise ValueError(f"Each drug may be listed once (got {', '.join(drugs)}).")
+
+    doses = combination_grid(len(drugs), dose_levels, max_drugs)
+    svr = np.array([DRUG_EFFECTS[d]["svr_reduction"] for d in drugs])
+    pvr = np.array([DRUG_EFFECTS[d]["pvr_reduction"] for d in drugs])
+
+    R_s = baseline["R_s"] * np.prod(1 - dose_response(svr, doses, ed50), axis=1)
+    R_p = baseline["R_p"] * np.prod(1 - dose_response(pvr, doses, ed50), axis=1)
+
+    Q_s, Q_p, P_a, P_v = flow_pressure_solver_2_batch(
+        baseline["C_dia"], baseline["C_A"], baseline["C_V"], baseline["HR"],
+        R_p, R_s, baseline["V_total"], baseline["EF"],
+    )
+    VO2 = indexed_cvo2_to_vo2(baseline["CVO2"])
+    S_m, S_sv, OD2 = saturation_solver_batch(Q_s, Q_p, baseline["Hb"], VO2)
+
+    Qp_Qs = Q_p / Q_s
+    imbalance = np.abs(Qp_Qs - target_qp_qs)
+    physiologic = physiologic_mask(S_m, S_sv, OD2)
+
+    return {
+        "drugs": drugs,
+        "doses": doses,
+        "R_s": R_s,
+        "R_p": R_p,
+        "Q_s": Q_s,
+        "Q_p": Q_p,
+        "P_a": P_a,
+        "P_v": P_v,
+        "S_m": S_m,
+        "S_sv": S_sv,
+        "OD2": OD2,
+        "Qp_Qs": Qp_Qs,
+        "imbalance": imbalance,
+        "physiologic": physiologic,
+        "pareto": pareto_front(OD2, imbalance, physiologic),
+    }
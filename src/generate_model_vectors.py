@@ -0,0 +1,185 @@
+"""
+Shared test vectors for the client-side model in static/norwood_model.js.
+
+Evaluates the Python solvers and the /process and
+/calculate_condition_values routes on random and edge-case inputs and
+writes the results to static/norwood_model_vectors.json.
+
+Usage:
+    python generate_model_vectors.py           write the vectors
+    python generate_model_vectors.py --check   fail if the stored vectors are
+                                               stale or the JS port disagrees
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+
+from Norwood_Circulation_Solver_Functions import (
+    flow_pressure_solver_1,
+    flow_pressure_solver_2,
+    saturation_solver,
+)
+from norwood_plots import baseline_values_1, baseline_values_2
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+VECTORS_PATH = os.path.join(BASE_DIR, "static", "norwood_model_vectors.json")
+MODEL_JS_PATH = os.path.join(BASE_DIR, "static", "norwood_model.js")
+
+SLIDER_INPUTS = ("HR", "C_sys", "C_dia", "C_A", "C_V", "R_s", "R_p", "V_total", "Hb", "CVO2")
+CONDITION_INPUTS = ("HR", "EF", "C_dia", "C_A", "C_V", "R_s", "R_p", "V_total", "Hb", "CVO2")
+
+PROCESS_DECIMALS = {"Q_s": 2, "Q_p": 2, "P_a": 2, "P_v": 2, "S_m": 4, "S_sv": 4, "OD2": 2}
+CONDITION_DECIMALS = {**PROCESS_DECIMALS, "Q_RV": 2, "Qp_Qs": 4}
+
+N_RANDOM = 40
+SEED = 2025
+
+
+def _call(function, inputs):
+    """
+    Run a scalar solver and record its outputs or its error message.
+    """
+    names = {
+        flow_pressure_solver_1: ("Q_s", "Q_p", "P_a", "P_v"),
+        flow_pressure_solver_2: ("Q_s", "Q_p", "P_a", "P_v"),
+        saturation_solver: ("S_m", "S_sv", "OD2"),
+    }[function]
+    case = {"function": function.__name__, "inputs": inputs}
+    try:
+        case["outputs"] = dict(zip(names, (float(v) for v in function(**inputs))))
+    except ValueError as e:
+        case["error"] = str(e)
+    return case
+
+
+def _route(client, function, url, inputs, decimals):
+    response = client.post(url, json=inputs)
+    case = {"function": function, "inputs": inputs}
+    if response.status_code == 200:
+        case["outputs"] = response.get_json()
+        case["decimals"] = decimals
+    else:
+        case["error"] = response.get_json()["error"]
+    return case
+
+
+def build_vectors():
+    from app import app, get_clinical_baseline
+
+    rng = np.random.default_rng(SEED)
+    slider_baseline = {**baseline_values_1, **baseline_values_2}
+    condition_baseline = get_clinical_baseline()
+
+    def perturb(baseline, names):
+        values = {name: float(baseline[name] * rng.uniform(0.3, 1.7)) for name in names}
+        if "EF" in values:
+            values["EF"] = float(rng.uniform(0.1, 1.0))
+        return values
+
+    slider_inputs = [perturb(slider_baseline, SLIDER_INPUTS) for _ in range(N_RANDOM)]
+    condition_inputs = [perturb(condition_baseline, CONDITION_INPUTS) for _ in range(N_RANDOM)]
+
+    # Edge cases: every error path of the solvers and of validate_physiology
+    slider_inputs += [
+        {**slider_baseline, "R_p": 0.0},
+        {**slider_baseline, "C_A": -1.5},
+        {**slider_baseline, "C_sys": 8.0, "C_dia": 0.5},
+        {**slider_baseline, "CVO2": 3000.0},
+        {**slider_baseline, "V_total": 1e-5},
+    ]
+    condition_inputs += [
+        {**condition_baseline, "EF": 1.2},
+        {**condition_baseline, "EF": 0.0},
+        {**condition_baseline, "Hb": -2.0},
+        {**condition_baseline, "CVO2": 2000.0},
+        {**condition_baseline, "R_s": 2e16},
+    ]
+
+    cases = []
+    for inputs in slider_inputs:
+        cases.append(_call(flow_pressure_solver_1, {name: inputs[name] for name in
+                           ("C_dia", "C_sys", "C_A", "C_V", "HR", "R_p", "R_s", "V_total")}))
+    for inputs in condition_inputs:
+        cases.append(_call(flow_pressure_solver_2, {name: inputs[name] for name in
+                           ("C_dia", "C_A", "C_V", "HR", "R_p", "R_s", "V_total", "EF")}))
+    for _ in range(N_RANDOM):
+        cases.append(_call(saturation_solver, {
+            "Q_s": float(rng.uniform(0.2, 20)),
+            "Q_p": float(rng.uniform(0.2, 400)),
+            "Hb": float(rng.uniform(5, 25)),
+            "VO2": float(rng.uniform(10, 80)),
+        }))
+    cases.append(_call(saturation_solver, {"Q_s": -0.5, "Q_p": 1.0, "Hb": 15.0, "VO2": 40.0}))
+
+    client = app.test_client()
+    for inputs in slider_inputs:
+        cases.append(_route(client, "process", "/process", inputs, PROCESS_DECIMALS))
+    for inputs in condition_inputs:
+        cases.append(_route(client, "calculate_condition_values", "/calculate_condition_values",
+                            inputs, CONDITION_DECIMALS))
+
+    return {"seed": SEED, "cases": cases}
+
+
+def check_js(path=VECTORS_PATH):
+    """
+    Run the vectors through static/norwood_model.js with node.
+
+    Returns
+    -------
+    failures : list of str, or None if node is not installed.
+    """
+    node = shutil.which("node")
+    if node is None:
+        return None
+
+    script = (
+        "const model = require(process.argv[1]);"
+        "const vectors = require(process.argv[2]);"
+        "console.log(JSON.stringify(model.checkVectors(vectors)));"
+    )
+    proc = subprocess.run([node, "-e", script, MODEL_JS_PATH, path],
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true",
+                        help="Verify the stored vectors and the JS port instead of writing.")
+    args = parser.parse_args(argv)
+
+    vectors = build_vectors()
+    text = json.dumps(vectors, indent=1) + "\n"
+
+    if not args.check:
+        with open(VECTORS_PATH, "w") as f:
+            f.write(text)
+        print(f"Wrote {len(vectors['cases'])} cases to {VECTORS_PATH}")
+        return 0
+
+    failures = []
+    with open(VECTORS_PATH) as f:
+        if f.read() != text:
+            failures.append("stored vectors are out of date with the Python solvers; regenerate them")
+
+    js_failures = check_js()
+    if js_failures is None:
+        print("node not found; skipping the JS check")
+    else:
+        failures.extend(js_failures)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"OK: {len(vectors['cases'])} cases")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import numpy as np
+
+from Norwood_Circulation_Solver_Functions import (
+    flow_pressure_solver_1_batch,
+    flow_pressure_solver_2_batch,
+    saturation_solver_batch,
+    indexed_cvo2_to_vo2,
+    DEFAULT_BSA,
+)
+
+# Inputs of each steady-state model, including the saturation solver inputs
+MODEL_INPUTS = {
+    1: ("C_dia", "C_sys", "C_A", "C_V", "HR", "R_p", "R_s", "V_total", "Hb", "CVO2"),
+    2: ("C_dia", "C_A", "C_V", "HR", "R_p", "R_s", "V_total", "EF", "Hb", "CVO2"),
+}
+
+GLOBAL_OUTPUTS = ("Q_s", "Q_p", "Q_total", "P_a", "P_v", "S_m", "S_sv", "OD2")
+
+
+def evaluate_steady_state(samples, model=2):
+    """
+    Evaluate every steady-state output for arrays of parameter sets.
+
+    Parameters
+    ----------
+    samples : dict or structured ndarray
+        Maps each name in MODEL_INPUTS[model] to an array, e.g. a batch
+        from parameters.to_batch. CVO2 is indexed
+        oxygen consumption (mL/m^2/min). An optional "BSA" array (m^2)
+        gives each set's body surface area; DEFAULT_BSA otherwise.
+    model : int, optional
+        1 for flow_pressure_solver_1 (C_sys based), 2 for
+        flow_pressure_solver_2 (EF based). Default is 2.
+
+    Returns
+    -------
+    outputs : dict
+        Maps each name in GLOBAL_OUTPUTS to an array.
+    """
+    if model == 1:
+        Q_s, Q_p, P_a, P_v = flow_pressure_solver_1_batch(
+            samples["C_dia"], samples["C_sys"], samples["C_A"], samples["C_V"],
+            samples["HR"], samples["R_p"], samples["R_s"], samples["V_total"],
+        )
+    elif model == 2:
+        Q_s, Q_p, P_a, P_v = flow_pressure_solver_2_batch(
+            samples["C_dia"], samples["C_A"], samples["C_V"], samples["HR"],
+            samples["R_p"], samples["R_s"], samples["V_total"], samples["EF"],
+        )
+    else:
+        raise ValueError(f"model must be 1 or 2 (got {model}).")
+
+    names = samples.dtype.names if isinstance(samples, np.ndarray) else samples
+    VO2 = indexed_cvo2_to_vo2(samples["CVO2"], samples["BSA"] if "BSA" in names else DEFAULT_BSA)
+    S_m, S_sv, OD2 = saturation_solver_batch(Q_s, Q_p, samples["Hb"], VO2, check_inputs=False)
+
+    return {
+        "Q_s": Q_s,
+        "Q_p": Q_p,
+        "Q_total": Q_s + Q_p,
+        "P_a": P_a,
+        "P_v": P_v,
+        "S_m": S_m,
+        "S_sv": S_sv,
+        "OD2": OD2,
+    }
+
+
+def parameter_bounds(baseline, inputs, spread=0.5):
+    """
+    Sampling box of (1 - spread)x to (1 + spread)x each baseline value.
+    EF is capped at 1.
+
+    Returns
+    -------
+    lower, upper : ndarray, shape (n_inputs,)
+    """
+    if not (0 < spread < 1):
+        raise ValueError(f"spread must be in (0, 1) (got {spread}).")
+
+    center = np.array([baseline[name] for name in inputs], dtype=float)
+    lower = center * (1 - spread)
+    upper = center * (1 + spread)
+    if "EF" in inputs:
+        i = inputs.index("EF")
+        upper[i] = min(upper[i], 1.0)
+
+    return lower, upper
+
+
+def _scale(unit, lower, upper, inputs):
+    values = lower + unit * (upper - lower)
+    return {name: values[:, i] for i, name in enumerate(inputs)}
+
+
+def sobol_indices(baseline, model=2, n_samples=4096, spread=0.5, seed=None):
+    """
+    First-order and total Sobol indices of every output with respect to
+    every model input.
+
+    Uses Saltelli's design on a scrambled Sobol sequence: matrices A and B
+    plus the d matrices AB_i (A with column i taken from B), all evaluated
+    in one batched solve of n_samples*(d + 2) points. First-order indices
+    use the Saltelli (2010) estimator and total indices the Jansen
+    estimator.
+
+    Parameters
+    ----------
+    baseline : dict
+        Center values for every name in MODEL_INPUTS[model].
+    model : int, optional
+        Steady-state model, 1 or 2. Default is 2.
+    n_samples : int, optional
+        Base sample size, rounded up to a power of two. Default is 4096.
+    spread : float, optional
+        Relative half-width of the uniform sampling box. Default is 0.5.
+    seed : int, optional
+        Seed for scrambling the sequence.
+
+    Returns
+    -------
+    result : dict
+        "inputs", "first_order" and "total" (dicts from output name to an
+        array over inputs), and "n_evaluations".
+    """
+    from scipy.stats import qmc
+
+    inputs = MODEL_INPUTS[model]
+    d = len(inputs)
+    lower, upper = parameter_bounds(baseline, inputs, spread)
+
+    m = int(np.ceil(np.log2(max(n_samples, 2))))
+    unit = qmc.Sobol(d=2*d, scramble=True, seed=seed).random_base2(m)
+    n = unit.shape[0]
+    A = unit[:, :d]
+    B = unit[:, d:]
+
+    # Stack A, B and every AB_i into one (n*(d + 2), d) design
+    AB = np.repeat(A[None], d, axis=0)
+    AB[np.arange(d), :, np.arange(d)] = B.T
+    design = np.concatenate([A, B, AB.reshape(-1, d)])
+
+    outputs = evaluate_steady_state(_scale(design, lower, upper, inputs), model)
+
+    first_order = {}
+    total = {}
+    for name in GLOBAL_OUTPUTS:
+        y = outputs[name]
+        f_A = y[:n]
+        f_B = y[n:2*n]
+        f_AB = y[2*n:].reshape(d, n)
+        variance = np.var(np.concatenate([f_A, f_B]))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            first_order[name] = np.mean(f_B * (f_AB - f_A), axis=1) / variance
+            total[name] = 0.5 * np.mean((f_A - f_AB)**2, axis=1) / variance
+
+    return {
+        "inputs": inputs,
+        "first_order": first_order,
+        "total": total,
+        "n_evaluations": design.shape[0],
+    }
+
+
+def morris_screening(baseline, model=2, n_trajectories=100, levels=4, spread=0.5, seed=None):
+    """
+    Morris elementary-effects screening of every output with respect to
+    every model input.
+
+    Each trajectory starts at a random grid point and moves one input at a
+    time, in random order, by delta = levels/(2*(levels - 1)) in the unit
+    cube. All trajectories are evaluated in one batched solve of
+    n_trajectories*(d + 1) points.
+
+    Parameters
+    ----------
+    baseline : dict
+        Center values for every name in MODEL_INPUTS[model].
+    model : int, optional
+        Steady-state model, 1 or 2. Default is 2.
+    n_trajectories : int, optional
+        Number of trajectories. Default is 100.
+    levels : int, optional
+        Number of grid levels per input (even). Default is 4.
+    spread : float, optional
+        Relative half-width of the sampling box. Default is 0.5.
+    seed : int, optional
+        Random seed.
+
+    Returns
+    -------
+    result : dict
+        "inputs", and "mu_star", "mu", "sigma" (dicts from output name to an
+        array over inputs, in output units per unit of normalized input),
+        and "n_evaluations".
+    """
+    if levels < 2 or levels % 2:
+        raise ValueError(f"levels must be an even integer >= 2 (got {levels}).")
+
+    rng = np.random.default_rng(seed)
+    inputs = MODEL_INPUTS[model]
+    d = len(inputs)
+    lower, upper = parameter_bounds(baseline, inputs, spread)
+    delta = levels / (2 * (levels - 1))
+
+    # Start in the lower half of the grid so every step of +delta stays inside
+    start = rng.integers(0, levels // 2, size=(n_trajectories, d)) / (levels - 1)
+    order = np.argsort(rng.random((n_trajectories, d)), axis=1)
+
+    steps = np.zeros((n_trajectories, d + 1, d))
+    moved = np.zeros((n_trajectories, d, d))
+    moved[np.arange(n_trajectories)[:, None], np.arange(d)[None, :], order] = delta
+    steps[:, 1:, :] = np.cumsum(moved, axis=1)
+    trajectories = start[:, None, :] + steps
+
+    outputs = evaluate_steady_state(_scale(trajectories.reshape(-1, d), lower, upper, inputs), model)
+
+    mu_star = {}
+    mu = {}
+    sigma = {}
+    for name in GLOBAL_OUTPUTS:
+        y = outputs[name].reshape(n_trajectories, d + 1)
+        effects_in_order = np.diff(y, axis=1) / delta
+        effects = np.empty_like(effects_in_order)
+        np.put_along_axis(effects, order, effects_in_order, axis=1)
+
+        mu_star[name] = np.mean(np.abs(effects), axis=0)
+        mu[name] = np.mean(effects, axis=0)
+        sigma[name] = np.std(effects, axis=0, ddof=1) if n_trajectories > 1 else np.zeros(d)
+
+    return {
+        "inputs": inputs,
+        "mu_star": mu_star,
+        "mu": mu,
+        "sigma": sigma,
+        "n_evaluations": trajectories.shape[0] * trajectories.shape[1],
+    }
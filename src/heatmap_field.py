@@ -0,0 +1,128 @@
+"""
+Vectorized solution fields of the C_sys-based steady-state model over two
+inputs, as shown on the heatmap page.
+
+evaluate_field solves any set of points in one batched call and returns
+every output at once; heatmap_grid caches the uniform grid of the heatmap
+page, so switching the displayed output only re-renders.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from Norwood_Circulation_Solver_Functions import (
+    flow_pressure_solver_1_batch,
+    saturation_solver_batch,
+    indexed_cvo2_to_vo2,
+)
+from parameters import get_baseline
+from validation import STATUS_OK, input_status
+
+# D20 is oxygen delivery, named as on the heatmap page
+HEATMAP_OUTPUTS = ("Q_s", "Q_p", "Q_total", "Qp_Qs", "P_a", "P_v", "S_m", "S_sv", "D20")
+
+HEATMAP_INPUTS = tuple(get_baseline("heatmap"))
+
+DEFAULT_GRID_SIZE = 50
+DEFAULT_SPREAD = 0.5
+
+
+def _check_names(input1, input2, output=None):
+    for name in (input1, input2):
+        if name not in HEATMAP_INPUTS:
+            raise ValueError(f"Invalid input {name!r}; choose from {HEATMAP_INPUTS}.")
+    if output is not None and output not in HEATMAP_OUTPUTS:
+        raise ValueError(f"Invalid output {output!r}; choose from {HEATMAP_OUTPUTS}.")
+
+
+def evaluate_field(input1, values1, input2, values2, baseline=None):
+    """
+    Every heatmap output at points of the (input1, input2) plane.
+
+    Parameters
+    ----------
+    input1, input2 : str
+        Names in HEATMAP_INPUTS. If they are the same, values2 wins, as
+        when the page sets input1 and then input2.
+    values1, values2 : float or array
+        Coordinates of the points, broadcast against each other.
+    baseline : dict, optional
+        Values of the other inputs. Default is the "heatmap" profile.
+
+    Returns
+    -------
+    fields : dict
+        Maps each name in HEATMAP_OUTPUTS to an array with the broadcast
+        shape of values1 and values2. Points with invalid inputs, or whose
+        flows are not positive, are NaN.
+    """
+    _check_names(input1, input2)
+    params = dict(get_baseline("heatmap") if baseline is None else baseline)
+    params[input1] = np.asarray(values1, dtype=float)
+    params[input2] = np.asarray(values2, dtype=float)
+    shape = np.broadcast_shapes(np.shape(values1), np.shape(values2))
+
+    Q_s, Q_p, P_a, P_v = flow_pressure_solver_1_batch(
+        params["C_dia"], params["C_sys"], params["C_A"], params["C_V"],
+        params["HR"], params["R_p"], params["R_s"], params["V_total"], errors="mask",
+    )
+    VO2 = indexed_cvo2_to_vo2(params["CVO2"])
+    S_m, S_sv, D20 = saturation_solver_batch(Q_s, Q_p, params["Hb"], VO2, check_inputs=False)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fields = {
+            "Q_s": Q_s,
+            "Q_p": Q_p,
+            "Q_total": Q_s + Q_p,
+            "Qp_Qs": Q_p / Q_s,
+            "P_a": P_a,
+            "P_v": P_v,
+            "S_m": S_m,
+            "S_sv": S_sv,
+            "D20": D20,
+        }
+
+    invalid = (input_status(params) != STATUS_OK) | ~((Q_s > 0) & (Q_p > 0))
+    invalid = np.broadcast_to(invalid, shape)
+    return {name: np.where(invalid, np.nan, np.broadcast_to(values, shape)) for name, values in fields.items()}
+
+
+def grid_axes(input1, input2, n=DEFAULT_GRID_SIZE, spread=DEFAULT_SPREAD, baseline=None):
+    """
+    Axis values of the heatmap grid: (1 - spread)x to (1 + spread)x the
+    baseline value of each input, n points each.
+    """
+    baseline = get_baseline("heatmap") if baseline is None else baseline
+    x = np.linspace(baseline[input1] * (1 - spread), baseline[input1] * (1 + spread), n)
+    y = np.linspace(baseline[input2] * (1 - spread), baseline[input2] * (1 + spread), n)
+    return x, y
+
+
+def heatmap_grid(input1, input2, n=DEFAULT_GRID_SIZE, spread=DEFAULT_SPREAD):
+    """
+    Every heatmap output on the page's uniform grid around the "heatmap"
+    baseline, solved once per (input1, input2, n, spread) and cached.
+
+    Returns
+    -------
+    grid : dict
+        "x" and "y" (axis values of input1 and input2) and "fields", which
+        maps each name in HEATMAP_OUTPUTS to an array of shape (n, n) with
+        rows along y. Arrays are shared between calls and read-only.
+    """
+    _check_names(input1, input2)
+    if n < 2:
+        raise ValueError(f"n must be at least 2 (got {n}).")
+    if not (0 < spread < 1):
+        raise ValueError(f"spread must be in (0, 1) (got {spread}).")
+    return _heatmap_grid(input1, input2, int(n), float(spread))
+
+
+@lru_cache(maxsize=64)
+def _heatmap_grid(input1, input2, n, spread):
+    x, y = grid_axes(input1, input2, n, spread)
+    fields = evaluate_field(input1, x[None, :], input2, y[:, None])
+
+    for values in (x, y, *fields.values()):
+        values.flags.writeable = False
+    return {"x": x, "y": y, "fields": fields}
@@ -0,0 +1,198 @@
+"""
+Fixed-size tiles of the heatmap solution field for panning and zooming.
+
+The (input1, input2) plane spans TILE_DOMAIN times the "heatmap" baseline
+of each input. At zoom level z it is cut into 2**z x 2**z tiles of
+TILE_SIZE x TILE_SIZE pixels, numbered like web map tiles: x from the left
+and y from the top, so tile (0, 0) holds the largest input2 values. Each
+tile solves every heatmap output at its pixel centers in one batched call,
+and a TileCache keeps recent tiles so panning back or switching outputs
+does not solve again.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from coalesce import RequestCoalescer
+from heatmap_field import HEATMAP_OUTPUTS, _check_names, evaluate_field
+from parameters import get_baseline
+
+TILE_SIZE = 64
+
+# Multiples of the baseline value spanned by each axis at zoom 0
+TILE_DOMAIN = (0.1, 2.0)
+
+MAX_ZOOM = 12
+
+DEFAULT_CACHE_TILES = int(os.environ.get("NORWOOD_TILE_CACHE_SIZE", 256))
+
+
+class TileCache:
+    """
+    Thread-safe LRU cache of tiles.
+
+    Parameters
+    ----------
+    max_tiles : int
+        Tiles kept; the least recently used is evicted beyond that.
+    """
+
+    def __init__(self, max_tiles=DEFAULT_CACHE_TILES):
+        if max_tiles < 1:
+            raise ValueError(f"max_tiles must be at least 1 (got {max_tiles}).")
+        self.max_tiles = max_tiles
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Cached tile for key, or None. A hit makes the tile most recently used.
+        """
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+    def put(self, key, tile):
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tiles": len(self._tiles),
+                "max_tiles": self.max_tiles,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+tile_cache = TileCache()
+
+# Concurrent requests for the same missing tile solve it once
+_tile_coalescer = RequestCoalescer()
+
+
+def tile_extent(input1, input2, zoom, x, y):
+    """
+    Input ranges covered by a tile.
+
+    Returns
+    -------
+    (x0, x1), (y0, y1) : tuple of float
+        input1 range from left to right and input2 range from bottom to top.
+    """
+    if not (0 <= zoom <= MAX_ZOOM):
+        raise ValueError(f"zoom must be between 0 and {MAX_ZOOM} (got {zoom}).")
+    n = 2**zoom
+    if not (0 <= x < n and 0 <= y < n):
+        raise ValueError(f"Tile ({x}, {y}) is outside zoom level {zoom} (0 to {n - 1}).")
+
+    baseline = get_baseline("heatmap")
+    low, high = TILE_DOMAIN
+    x_lo, x_hi = baseline[input1] * low, baseline[input1] * high
+    y_lo, y_hi = baseline[input2] * low, baseline[input2] * high
+
+    dx = (x_hi - x_lo) / n
+    dy = (y_hi - y_lo) / n
+    return (x_lo + x * dx, x_lo + (x + 1) * dx), (y_hi - (y + 1) * dy, y_hi - y * dy)
+
+
+def compute_tile(input1, input2, zoom, x, y):
+    """
+    Every heatmap output at the pixel centers of one tile.
+
+    Returns
+    -------
+    fields : dict
+        Maps each name in HEATMAP_OUTPUTS to a float32 array of shape
+        (TILE_SIZE, TILE_SIZE), first row at the top of the tile. Invalid
+        points are NaN.
+    """
+    (x0, x1), (y0, y1) = tile_extent(input1, input2, zoom, x, y)
+    centers = (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE
+    xs = x0 + centers * (x1 - x0)
+    ys = y1 - centers * (y1 - y0)
+
+    fields = evaluate_field(input1, xs[None, :], input2, ys[:, None])
+    return {name: values.astype(np.float32) for name, values in fields.items()}
+
+
+def get_tile(input1, input2, zoom, x, y, cache=None):
+    """
+    compute_tile through the tile cache (the module's tile_cache by
+    default). Tiles hold every output, so switching outputs hits the cache.
+    """
+    _check_names(input1, input2)
+    cache = tile_cache if cache is None else cache
+    key = (input1, input2, int(zoom), int(x), int(y))
+
+    tile = cache.get(key)
+    if tile is None:
+        def compute():
+            tile = compute_tile(input1, input2, zoom, x, y)
+            cache.put(key, tile)
+            return tile
+
+        tile = _tile_coalescer.run((id(cache), key), compute)
+    return tile
+
+
+def color_range(input1, input2, output, cache=None):
+    """
+    Color scale shared by every tile of an (input1, input2, output) plane:
+    the 2nd to 98th percentile of the zoom-0 tile, so that tiles join
+    seamlessly and outputs that diverge near singular parameter
+    combinations do not wash out the rest of the field.
+    """
+    values = get_tile(input1, input2, 0, 0, 0, cache)[output]
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return 0.0, 1.0
+    low, high = (float(v) for v in np.percentile(finite, [2, 98]))
+    return (low - 0.5, high + 0.5) if high <= low else (low, high)
+
+
+def render_tile_png(input1, input2, output, zoom, x, y, cache=None):
+    """
+    One tile of output as PNG bytes, colored with the coolwarm map on the
+    plane's color_range. Invalid points are transparent.
+    """
+    _check_names(input1, input2, output)
+    from matplotlib import colormaps
+    from matplotlib.image import imsave
+
+    values = get_tile(input1, input2, zoom, x, y, cache)[output]
+    low, high = color_range(input1, input2, output, cache)
+
+    rgba = colormaps["coolwarm"]((values - low) / (high - low), bytes=True)
+    rgba[np.isnan(values)] = 0
+
+    png = io.BytesIO()
+    imsave(png, rgba, format="png")
+    return png.getvalue()
+
+
+__all__ = [
+    "HEATMAP_OUTPUTS", "MAX_ZOOM", "TILE_DOMAIN", "TILE_SIZE", "TileCache", "color_range",
+    "compute_tile", "get_tile", "render_tile_png", "tile_cache", "tile_extent",
+]
@@ -0,0 +1,166 @@
+import contextvars
+import cProfile
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ("parse", "solve", "render", "encode", "serialize")
+
+# Phase timings of the request being handled. Executor threads that run
+# inside a copy of the request's context (see coalesce.py) add to the same dict.
+_request_phases = contextvars.ContextVar("request_phases", default=None)
+_request_route = contextvars.ContextVar("request_route", default=None)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of observations per label set, as in the
+    Prometheus exposition format.
+    """
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: {**s, "counts": list(s["counts"])} for key, s in sorted(self._series.items())}
+
+        for key, s in series.items():
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, key))
+            for bound, count in zip(self.buckets, s["counts"]):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {s["count"]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {s['sum']:.9g}")
+            lines.append(f"{self.name}_count{{{labels}}} {s['count']}")
+        return "\n".join(lines)
+
+
+REQUEST_DURATION = Histogram(
+    "norwood_request_duration_seconds",
+    "Wall time of each request by route, method and status.",
+    ("route", "method", "status"),
+)
+PHASE_DURATION = Histogram(
+    "norwood_phase_duration_seconds",
+    "Wall time of each phase (parse, solve, render, encode, serialize) by route.",
+    ("route", "phase"),
+)
+
+
+@contextmanager
+def phase(name):
+    """
+    Time a block as one phase of the current request.
+
+    Outside a request the block still runs, labelled with route "none".
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        PHASE_DURATION.observe(elapsed, route=_request_route.get() or "none", phase=name)
+        phases = _request_phases.get()
+        if phases is not None:
+            phases[name] = phases.get(name, 0.0) + elapsed
+
+
+def render_metrics():
+    """
+    Every histogram in the Prometheus text format.
+    """
+    return "\n".join(h.render() for h in (REQUEST_DURATION, PHASE_DURATION)) + "\n"
+
+
+_profile_lock = threading.Lock()
+
+
+def init_app(app):
+    """
+    Time every request of a Flask app, add a Server-Timing header with its
+    phases, and register GET /metrics.
+
+    If NORWOOD_PROFILE_DIR is set, a request with ?profile=1 is run under
+    cProfile and its stats are written to that directory (one request at a
+    time; only the request thread is profiled).
+    """
+    from flask import Response, g, request
+
+    profile_dir = os.environ.get("NORWOOD_PROFILE_DIR")
+
+    @app.before_request
+    def _start_timer():
+        g._instrumentation_start = time.perf_counter()
+        g._instrumentation_tokens = (
+            _request_route.set(request.endpoint or "unmatched"),
+            _request_phases.set({}),
+        )
+
+        g._profiler = None
+        if profile_dir and request.args.get("profile") == "1" and _profile_lock.acquire(blocking=False):
+            g._profiler = cProfile.Profile()
+            g._profiler.enable()
+
+    @app.after_request
+    def _record(response):
+        start = g.pop("_instrumentation_start", None)
+        if start is None:
+            return response
+
+        elapsed = time.perf_counter() - start
+        route = _request_route.get() or "unmatched"
+        REQUEST_DURATION.observe(elapsed, route=route, method=request.method, status=response.status_code)
+
+        phases = _request_phases.get() or {}
+        timings = [f"{name};dur={1000 * seconds:.3f}" for name, seconds in phases.items()]
+        timings.append(f"total;dur={1000 * elapsed:.3f}")
+        response.headers["Server-Timing"] = ", ".join(timings)
+
+        logger.debug("request route=%s status=%s duration_ms=%.3f %s", route, response.status_code,
+                     1000 * elapsed, " ".join(f"{k}_ms={1000 * v:.3f}" for k, v in phases.items()))
+        return response
+
+    @app.teardown_request
+    def _finish(exc):
+        profiler = g.pop("_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(profile_dir, exist_ok=True)
+            path = os.path.join(profile_dir, f"{request.endpoint or 'unmatched'}-{time.time_ns()}.prof")
+            profiler.dump_stats(path)
+            _profile_lock.release()
+            logger.info("profile written path=%s", path)
+
+        tokens = g.pop("_instrumentation_tokens", None)
+        if tokens is not None:
+            _request_phases.reset(tokens[1])
+            _request_route.reset(tokens[0])
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
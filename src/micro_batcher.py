@@ -0,0 +1,137 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+DEFAULT_WINDOW_MS = 2.0
+DEFAULT_MAX_BATCH = 64
+
+
+class MicroBatcher:
+    """
+    Collect single-item requests from many threads and solve them together.
+
+    A background thread takes the first waiting item, keeps collecting for
+    up to window_ms or until max_batch items have arrived, and hands the
+    whole batch to solve_batch. Each caller gets its own result (or
+    exception) back through a future.
+
+    Parameters
+    ----------
+    solve_batch : callable
+        Takes a list of items and returns a list of the same length. An
+        entry that is an Exception instance is raised to that item's caller.
+    window_ms : float, optional
+        How long to wait for more items after the first. Default is 2.
+    max_batch : int, optional
+        Maximum items per batch. Default is 64.
+    """
+
+    def __init__(self, solve_batch, window_ms=DEFAULT_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH):
+        if window_ms < 0:
+            raise ValueError(f"window_ms must be non-negative (got {window_ms}).")
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be at least 1 (got {max_batch}).")
+
+        self.solve_batch = solve_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._batch_sizes = {}
+
+    def submit(self, item):
+        future = Future()
+        self._ensure_started()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """
+        Solve one item as part of a batch and return its result.
+        """
+        return self.submit(item).result(timeout)
+
+    def stats(self):
+        """
+        Batch size distribution so far.
+
+        Returns
+        -------
+        stats : dict
+            "batches", "items", "mean_batch_size", "max_batch_size" and
+            "batch_sizes" (batch size -> number of batches).
+        """
+        with self._lock:
+            sizes = dict(sorted(self._batch_sizes.items()))
+        batches = sum(sizes.values())
+        items = sum(size * count for size, count in sizes.items())
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": items / batches if batches else 0.0,
+            "max_batch_size": max(sizes) if sizes else 0,
+            "batch_sizes": sizes,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+
+            with self._lock:
+                self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+
+            try:
+                results = self.solve_batch(items)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+def batcher_from_env(solve_batch):
+    """
+    MicroBatcher configured from the environment, or None when batching is
+    off (the default).
+
+    NORWOOD_MICRO_BATCH=1 turns it on; NORWOOD_BATCH_WINDOW_MS and
+    NORWOOD_MAX_BATCH set the window and batch size.
+    """
+    if os.environ.get("NORWOOD_MICRO_BATCH", "0").lower() not in ("1", "true", "yes", "on"):
+        return None
+    return MicroBatcher(
+        solve_batch,
+        window_ms=float(os.environ.get("NORWOOD_BATCH_WINDOW_MS", DEFAULT_WINDOW_MS)),
+        max_batch=int(os.environ.get("NORWOOD_MAX_BATCH", DEFAULT_MAX_BATCH)),
+    )
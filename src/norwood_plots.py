@@ -1,171 +1,123 @@
 # Get Dependencies
-import pandas as pd
+# Plotting libraries are imported inside the plotting helpers so that
+# importing this module (e.g. from app.py) stays cheap and side-effect free.
 import numpy as np
-import math as math
-import seaborn as sns
-import matplotlib.pyplot as plt
-import os
-
-import scipy as sp
-from Norwood_Circulation_Solver_Functions import flow_pressure_solver_1, flow_pressure_solver_2, saturation_solver
-from arterial_and_venous_compliance_solver import arterial_and_venous_compliance_solver
-from systolic_and_diastolic_compliance_solver import systolic_and_diastolic_compliance_solver
+from functools import lru_cache
+from Norwood_Circulation_Solver_Functions import (
+    flow_pressure_solver_1_batch,
+    saturation_solver_batch,
+)
+from parameters import get_baseline
 
 # Global variables
-# Change as needed
-baseline_values_1 = {"C_sys":1.4,
-                   "C_dia":6,
-                   "C_A":1.4,
-                   "C_V":6,
-                   "HR":140,
-                   "R_s":7.74,
-                   "R_p":0.34,
-                   "V_total":420}
-
-baseline_values_2 = {
-                   "Hb":15,
-                   "CVO2":150}
+# Change the "sensitivity" profile in parameters.py as needed
+baseline_values_1 = get_baseline("sensitivity", ("C_sys", "C_dia", "C_A", "C_V", "HR", "R_s", "R_p", "V_total"))
+
+baseline_values_2 = get_baseline("sensitivity", ("Hb", "CVO2"))
 
 factors = np.arange(0.5, 1.55, 0.05)
 
+SENSITIVITY_OUTPUTS = ("Q_s", "Q_p", "Q_total", "P_a", "P_v", "S_m", "S_sv", "OD2")
+
+def sensitivity_sweep(flow_baseline=None, oxygen_baseline=None, sweep_factors=None):
+    """
+    One-at-a-time sensitivity of every steady-state output to every input.
+
+    Builds the full (n_params, n_factors, n_inputs) perturbation tensor,
+    where slice [i, j] is the baseline with input i scaled by factor j, and
+    solves it with a single call to flow_pressure_solver_1_batch and
+    saturation_solver_batch.
+
+    Parameters
+    ----------
+    flow_baseline : dict, optional
+        Inputs of flow_pressure_solver_1. Default is baseline_values_1.
+    oxygen_baseline : dict, optional
+        Hb and CVO2. CVO2 is passed to the saturation solver as VO2.
+        Default is baseline_values_2.
+    sweep_factors : array_like, optional
+        Multipliers applied to each input. Default is factors.
+
+    Returns
+    -------
+    sweep : dict
+        Maps each name in SENSITIVITY_OUTPUTS to a dict from input name to
+        an array of shape (n_factors,). Calls with the default arguments
+        share one cached, read-only result.
+    """
+    if flow_baseline is None and oxygen_baseline is None and sweep_factors is None:
+        return _default_sensitivity_sweep()
+
+    return _sensitivity_sweep(
+        baseline_values_1 if flow_baseline is None else flow_baseline,
+        baseline_values_2 if oxygen_baseline is None else oxygen_baseline,
+        factors if sweep_factors is None else sweep_factors,
+    )
+
+def _sensitivity_sweep(flow_baseline, oxygen_baseline, sweep_factors):
+    names = list(flow_baseline) + list(oxygen_baseline)
+    base = np.array([flow_baseline[name] for name in flow_baseline]
+                    + [oxygen_baseline[name] for name in oxygen_baseline], dtype=float)
+    sweep_factors = np.asarray(sweep_factors, dtype=float)
+    n_params = len(names)
+
+    # X[i, j, :] is the baseline with input i multiplied by sweep_factors[j]
+    X = np.broadcast_to(base, (n_params, sweep_factors.size, n_params)).copy()
+    idx = np.arange(n_params)
+    X[idx, :, idx] = base[:, None] * sweep_factors
+    inputs = dict(zip(names, np.moveaxis(X, -1, 0)))
+
+    Q_s, Q_p, P_a, P_v = flow_pressure_solver_1_batch(
+        **{name: inputs[name] for name in flow_baseline}
+    )
+    S_m, S_sv, OD2 = saturation_solver_batch(Q_s, Q_p, inputs["Hb"], inputs["CVO2"])
+
+    outputs = {
+        "Q_s": Q_s,
+        "Q_p": Q_p,
+        "Q_total": Q_s + Q_p,
+        "P_a": P_a,
+        "P_v": P_v,
+        "S_m": S_m,
+        "S_sv": S_sv,
+        "OD2": OD2,
+    }
+    return {
+        output: {name: values[i] for i, name in enumerate(names)}
+        for output, values in outputs.items()
+    }
+
+@lru_cache(maxsize=1)
+def _default_sensitivity_sweep():
+    sweep = _sensitivity_sweep(baseline_values_1, baseline_values_2, factors)
+    for per_input in sweep.values():
+        for values in per_input.values():
+            values.flags.writeable = False
+    return sweep
+
 def yaxis_class1(desired_output):
-    baseline_values_1 = {"C_sys":1.4,
-                   "C_dia":6,
-                   "C_A":1.4,
-                   "C_V":6,
-                   "HR":140,
-                   "R_s":7.74,
-                   "R_p":0.34,
-                   "V_total":420}
-
-    baseline_values_2 = {
-                   "Hb":15,
-                   "CVO2":150}
-
-    factors = np.arange(0.5, 1.55, 0.05)
-
-    # Create return dictionary
-    yaxis = {key : [] for key in baseline_values_1.keys()}
-
-    # Iterate over each input value
-    for input in baseline_values_1.keys():
-        baseline = baseline_values_1[input]
-
-        # Copy so we can access other values easily
-        other_values = baseline_values_1.copy()
-
-        # Iterate over each factor that we plot for
-        for factor in factors:
-            multiplied = baseline * factor
-            other_values[input] = multiplied
-
-            # Solve for output
-            Q_s, Q_p, P_a, P_v = flow_pressure_solver_1(**other_values)
-
-            # Pick output
-            if desired_output == "Q_s":
-                val = Q_s
-            elif desired_output == "Q_p":
-                val = Q_p
-            elif desired_output == "Q_total":
-                val = Q_p + Q_s
-            elif desired_output == "P_a":
-                val = P_a
-            else:
-                val = P_v
-
-            # Add to return dict
-            yaxis[input].append(val)
-
-    return yaxis
+    """
+    Flow/pressure output for each flow_pressure_solver_1 input scaled by
+    each factor. Returns a dict from input name to a list of values.
+    """
+    if desired_output not in ("Q_s", "Q_p", "Q_total", "P_a"):
+        desired_output = "P_v"
+    sweep = sensitivity_sweep()[desired_output]
+    return {key: sweep[key].tolist() for key in baseline_values_1}
 
 def yaxis_class2(desired_output):
-    baseline_values_1 = {"C_sys":1.4,
-                   "C_dia":6,
-                   "C_A":1.4,
-                   "C_V":6,
-                   "HR":140,
-                   "R_s":7.74,
-                   "R_p":0.34,
-                   "V_total":420}
-
-    baseline_values_2 = {
-                   "Hb":15,
-                   "CVO2":150}
-
-    factors = np.arange(0.5, 1.55, 0.05)
-
-    # All keys
-    first_phase_keys = set(baseline_values_1.keys())
-    second_phase_keys = set(baseline_values_2.keys())
-    all_keys = first_phase_keys.union(second_phase_keys)
-
-    # Create return dictionary
-    yaxis = {key : [] for key in all_keys}
-
-    # Default Q_s, Q_p
-    Q_s0, Q_p0, P_a0, P_v0 = flow_pressure_solver_1(**baseline_values_1)
-
-    # Iterate over each input value
-    for input in all_keys:
-        if input in baseline_values_1.keys():
-            baseline = baseline_values_1[input]
-
-            # Process step for input dictionary
-            phase_1_input = baseline_values_1.copy()
-            phase_2_input = baseline_values_2.copy()
-
-            # Iterate over each factor that we plot for
-            for factor in factors:
-                multiplied = baseline * factor
-                phase_1_input[input] = multiplied
-
-                # Solve for output
-                Q_s, Q_p, P_a, P_v = flow_pressure_solver_1(**phase_1_input)
-
-                phase_2_input["Q_s"] = Q_s
-                phase_2_input["Q_p"] = Q_p
-
-                S_m, S_sv, OD2 = saturation_solver(**phase_2_input)
-
-                # Pick output
-                if desired_output == "S_m":
-                    val = S_m
-                elif desired_output == "S_sv":
-                    val = S_sv
-                else:
-                    val = OD2
-
-                yaxis[input].append(val)
-
-        else:
-            baseline = baseline_values_2[input]
-
-            # Process step
-            input_vals = baseline_values_2.copy()
-            input_vals["Q_s"] = Q_s0
-            input_vals["Q_p"] = Q_p0
-
-            for factor in factors:
-                multiplied = baseline * factor
-                input_vals[input] = multiplied
-
-                # Solve for output
-                S_m, S_sv, OD2 = saturation_solver(**input_vals)
-
-                # Pick output
-                if desired_output == "S_m":
-                    val = S_m
-                elif desired_output == "S_sv":
-                    val = S_sv
-                else:
-                    val = OD2
-
-                yaxis[input].append(val)
-
-    return yaxis
+    """
+    Oxygenation output for each input (flow and oxygen) scaled by each
+    factor. Returns a dict from input name to a list of values.
+    """
+    if desired_output not in ("S_m", "S_sv"):
+        desired_output = "OD2"
+    sweep = sensitivity_sweep()[desired_output]
+    return {key: values.tolist() for key, values in sweep.items()}
 
 def plot_helper(yaxis, title):
+    import matplotlib.pyplot as plt
+
     plot = plt.figure(figsize=(9,6))
 
     for label, y in yaxis.items():
@@ -183,16 +135,20 @@ def plot_helper(yaxis, title):
 def plotter(desired_output):
     if desired_output in ("Q_s", "Q_p", "Q_total", "P_a", "P_v"):
         yaxis = yaxis_class1(desired_output)
-        plot_helper(yaxis, desired_output)
+        return plot_helper(yaxis, desired_output)
 
     elif desired_output in ("S_m", "S_sv", "OD2"):
         yaxis = yaxis_class2(desired_output)
-        plot_helper(yaxis, desired_output)
+        return plot_helper(yaxis, desired_output)
+
+    raise ValueError(f"Unknown output {desired_output}; choose from {SENSITIVITY_OUTPUTS}.")
 
 
-plotter("Q_total")
+# ---- demo entry point: python src/norwood_plots.py [output] ----
+if __name__ == "__main__":
+    import sys
+    import matplotlib.pyplot as plt
 
-yaxis = yaxis_class1("Q_total")
-test = plot_helper(yaxis, "Q_total")
-test.show()
-print(test)
\ No newline at end of file
+    desired_output = sys.argv[1] if len(sys.argv) > 1 else "Q_total"
+    plotter(desired_output)
+    plt.show()
@@ -0,0 +1,150 @@
+import numpy as np
+
+
+class RecursiveLeastSquares:
+    """
+    Recursive least-squares estimate of x in the one-parameter model b = x*a
+    with exponential forgetting.
+
+    Each call to update costs O(1) per estimate, so live monitor feeds can
+    keep the fit current without storing or re-reading past samples.
+    Scalars track one patient; arrays of shape (n_patients,) track many
+    patients at once. NaN samples leave the corresponding estimate unchanged.
+
+    Parameters
+    ----------
+    forgetting : float, optional
+        Forgetting factor lambda in (0, 1]. A sample that is k updates old is
+        weighted by lambda**k. Default is 0.99 (about 100-sample memory).
+    x0 : float or array_like, optional
+        Initial estimate. Default is 0.
+    P0 : float or array_like, optional
+        Initial covariance. A large value means a weak prior. Default is 1e6.
+    """
+
+    def __init__(self, forgetting=0.99, x0=0.0, P0=1e6):
+        if not (0 < forgetting <= 1):
+            raise ValueError(f"forgetting must be in (0, 1] (got {forgetting}).")
+        if np.any(np.asarray(P0) <= 0):
+            raise ValueError(f"P0 must be positive (got {P0}).")
+
+        self.forgetting = forgetting
+        self.x = np.array(x0, dtype=float)
+        self.P = np.array(P0, dtype=float) * np.ones_like(self.x)
+        self.n_samples = np.zeros(self.x.shape, dtype=int)
+
+    def update(self, a, b):
+        """
+        Incorporate one new sample (a, b) per tracked estimate.
+
+        Returns
+        -------
+        x : float or ndarray
+            Updated estimate.
+        """
+        a = np.asarray(a, dtype=float)
+        b = np.asarray(b, dtype=float)
+        lam = self.forgetting
+
+        valid = np.isfinite(a) & np.isfinite(b)
+        a = np.where(valid, a, 0.0)
+        b = np.where(valid, b, 0.0)
+
+        Pa = self.P * a
+        gain = Pa / (lam + a * Pa)
+        x_new = self.x + gain * (b - a * self.x)
+        P_new = (self.P - gain * Pa) / lam
+
+        self.x = np.where(valid, x_new, self.x)
+        self.P = np.where(valid, P_new, self.P)
+        self.n_samples = self.n_samples + valid
+
+        return self.estimate
+
+    @property
+    def estimate(self):
+        """Current estimate (float for a single patient)."""
+        return float(self.x) if self.x.ndim == 0 else self.x.copy()
+
+    @property
+    def covariance(self):
+        """Current RLS covariance P (scaled by the noise variance)."""
+        return float(self.P) if self.P.ndim == 0 else self.P.copy()
+
+
+class OnlineArterialVenousCompliance:
+    """
+    Streaming counterpart of arterial_and_venous_compliance_solver.
+
+    Uses P_a*C_A + P_v*C_V = V_total with C_V ~= 7*C_A, updated one
+    (P_a, P_v) sample at a time. If V_total is None the ratios C_A/V_total
+    and C_V/V_total are tracked instead.
+
+    Parameters
+    ----------
+    V_total : float or array_like, optional
+        Total blood volume (L). Default is None.
+    forgetting : float, optional
+        Forgetting factor in (0, 1]. Default is 0.99.
+    C_A0 : float or array_like, optional
+        Initial guess for C_A. Default is 0.
+    """
+
+    def __init__(self, V_total=None, forgetting=0.99, C_A0=0.0):
+        self.V_total = 1.0 if V_total is None else V_total
+        self._rls = RecursiveLeastSquares(forgetting=forgetting, x0=C_A0)
+
+    def update(self, P_a, P_v):
+        """
+        Incorporate one arterial/venous pressure sample (mmHg).
+
+        Returns
+        -------
+        C_A_hat : float or ndarray
+            Current arterial compliance estimate.
+        C_V_hat : float or ndarray
+            Current venous compliance estimate.
+        """
+        a = np.asarray(P_a, dtype=float) + 7*np.asarray(P_v, dtype=float)
+        self._rls.update(a, self.V_total)
+        return self.estimate
+
+    @property
+    def estimate(self):
+        C_A_hat = self._rls.estimate
+        return C_A_hat, 7*C_A_hat
+
+
+class OnlineDiastolicCompliance:
+    """
+    Streaming counterpart of systolic_and_diastolic_compliance_solver.
+
+    Uses Q_s + Q_p = HR*EF*P_v*C_dia, updated one sample at a time.
+
+    Parameters
+    ----------
+    forgetting : float, optional
+        Forgetting factor in (0, 1]. Default is 0.99.
+    C_dia0 : float or array_like, optional
+        Initial guess for C_dia. Default is 0.
+    """
+
+    def __init__(self, forgetting=0.99, C_dia0=0.0):
+        self._rls = RecursiveLeastSquares(forgetting=forgetting, x0=C_dia0)
+
+    def update(self, P_v, HR, EF, Q_s, Q_p):
+        """
+        Incorporate one bedside sample.
+
+        Returns
+        -------
+        C_dia : float or ndarray
+            Current diastolic compliance estimate.
+        """
+        a = np.asarray(HR, dtype=float)*np.asarray(EF, dtype=float)*np.asarray(P_v, dtype=float)
+        b = np.asarray(Q_s, dtype=float) + np.asarray(Q_p, dtype=float)
+        return self._rls.update(a, b)
+
+    @property
+    def estimate(self):
+        return self._rls.estimate
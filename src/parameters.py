@@ -0,0 +1,189 @@
+"""
+Parameter schema and named baseline profiles.
+
+Every model input has one Parameter entry (unit and description; see
+get_unit for profiles stored in other units), and every baseline the tool
+uses is a named profile stored as a read-only record of a structured NumPy
+dtype. Batches of parameter sets are structured arrays of
+the same dtype: batch["R_s"] is a view of one column, so the vectorized
+solvers and samplers take them wherever they take a dict of arrays.
+"""
+import numpy as np
+
+
+class Parameter:
+    """
+    One model input.
+    """
+
+    __slots__ = ("name", "unit", "description")
+
+    def __init__(self, name, unit, description):
+        self.name = name
+        self.unit = unit
+        self.description = description
+
+    def __repr__(self):
+        return f"Parameter({self.name!r}, {self.unit!r}, {self.description!r})"
+
+
+# Units follow the model equations: flows in L/min, pressures in mmHg and
+# time in minutes, so volumes are in L, compliances in L/mmHg and
+# resistances in mmHg min/L (Wood units, not indexed to BSA)
+PARAMETERS = {p.name: p for p in (
+    # Steady-state models
+    Parameter("HR", "beats/min", "heart rate"),
+    Parameter("EF", "fraction", "ejection fraction"),
+    Parameter("C_sys", "L/mmHg", "systolic ventricular compliance"),
+    Parameter("C_dia", "L/mmHg", "diastolic ventricular compliance"),
+    Parameter("C_A", "L/mmHg", "arterial compliance"),
+    Parameter("C_V", "L/mmHg", "venous compliance"),
+    Parameter("R_s", "mmHg min/L", "systemic vascular resistance"),
+    Parameter("R_p", "mmHg min/L", "pulmonary vascular resistance"),
+    Parameter("V_total", "L", "total blood volume"),
+    Parameter("Hb", "g/dL", "hemoglobin concentration"),
+    Parameter("CVO2", "mL/min/m^2", "indexed oxygen consumption"),
+    Parameter("BSA", "m^2", "body surface area"),
+    # Time-dependent circuit
+    Parameter("R_BTS", "mmHg min/L", "Blalock-Taussig shunt resistance"),
+    Parameter("C_s", "L/mmHg", "systemic arterial compliance"),
+    Parameter("C_p", "L/mmHg", "pulmonary arterial compliance"),
+    Parameter("P_sa_0", "mmHg", "initial systemic arterial pressure"),
+    Parameter("P_pa_0", "mmHg", "initial pulmonary arterial pressure"),
+    # Aortic inflow waveform (time_dependent_model.Q_Ao_2)
+    Parameter("weight_kg", "kg", "body weight"),
+    Parameter("CO_per_kg", "mL/min/kg", "cycle-mean cardiac output per kg"),
+    Parameter("ejection_fraction_of_cycle", "fraction", "fraction of the cardiac cycle spent ejecting"),
+    Parameter("alpha", "-", "upstroke shape exponent"),
+    Parameter("beta", "-", "downslope shape exponent"),
+)}
+
+
+def parameter_dtype(names):
+    """
+    Structured dtype with one float64 field per parameter name.
+    """
+    unknown = [name for name in names if name not in PARAMETERS]
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(unknown)}.")
+    return np.dtype([(name, np.float64) for name in names])
+
+
+def _profile(**values):
+    record = np.array(tuple(float(v) for v in values.values()), dtype=parameter_dtype(list(values)))
+    record.flags.writeable = False
+    return record
+
+
+BASELINES = {
+    # /calculate_condition_values and the EF-based model pages
+    "clinical": _profile(
+        HR=120.0, EF=0.45, C_dia=0.01, C_A=0.03, C_V=0.20, R_s=25.0, R_p=20.0, V_total=1.0,
+        Hb=15.0, CVO2=160.0,
+    ),
+    # /generate_custom_plot (C_sys-based model)
+    "heatmap": _profile(
+        HR=100.0, C_dia=0.02, C_sys=0.01, C_A=1 / 135, C_V=30 / 135, R_p=10.0, R_s=80.0, V_total=5.0,
+        EF=0.55, Hb=15.0, CVO2=200.0,
+    ),
+    # One-at-a-time sensitivity plots, in the mL-based units of PROFILE_UNITS
+    "sensitivity": _profile(
+        C_sys=1.4, C_dia=6.0, C_A=1.4, C_V=6.0, HR=140.0, R_s=7.74, R_p=0.34, V_total=420.0,
+        Hb=15.0, CVO2=150.0,
+    ),
+    # /generate_timedep_plot defaults
+    "circuit": _profile(
+        R_s=62.0, R_p=6.0, R_BTS=48.0, C_s=0.0004, C_p=0.0007, P_sa_0=20.0, P_pa_0=20.0,
+    ),
+    # Neonatal aortic inflow of Q_Ao_2
+    "aortic_inflow": _profile(
+        HR=140.0, weight_kg=3.5, CO_per_kg=250.0, ejection_fraction_of_cycle=0.5, alpha=2.2, beta=3.8,
+    ),
+}
+
+# Profiles whose values are not in the PARAMETERS units. The sensitivity
+# profile is consistent in mL: with HR per minute, flows come out in
+# mL/min, and its CVO2 is passed to the saturation solver unindexed, as VO2.
+PROFILE_UNITS = {
+    "sensitivity": {
+        "C_sys": "mL/mmHg",
+        "C_dia": "mL/mmHg",
+        "C_A": "mL/mmHg",
+        "C_V": "mL/mmHg",
+        "R_s": "mmHg min/mL",
+        "R_p": "mmHg min/mL",
+        "V_total": "mL",
+        "CVO2": "mL/min",
+    },
+}
+
+
+def get_unit(name, profile=None):
+    """
+    Unit of a parameter, in a given profile if its values use other units.
+    """
+    if name not in PARAMETERS:
+        raise ValueError(f"Unknown parameter {name!r}.")
+    return PROFILE_UNITS.get(profile, {}).get(name, PARAMETERS[name].unit)
+
+
+def _get_profile(profile):
+    try:
+        return BASELINES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown baseline profile {profile!r}; choose from {tuple(BASELINES)}.") from None
+
+
+def get_baseline(profile, names=None):
+    """
+    A baseline profile as a new dict of floats.
+
+    Parameters
+    ----------
+    profile : str
+        Name in BASELINES.
+    names : sequence of str, optional
+        Parameters to include, in this order. Default is every parameter of
+        the profile.
+    """
+    record = _get_profile(profile)
+    names = record.dtype.names if names is None else names
+    return {name: float(record[name]) for name in names}
+
+
+def to_batch(values, n=None, names=None):
+    """
+    Structured array of parameter sets.
+
+    Parameters
+    ----------
+    values : mapping
+        Parameter name -> float or array (a dict, a baseline record or
+        another batch). All are broadcast against each other.
+    n : int, optional
+        Number of rows. Default is the broadcast shape of the values.
+    names : sequence of str, optional
+        Fields of the batch. Default is every name in values.
+
+    Returns
+    -------
+    batch : ndarray
+        Structured array with one float64 field per name.
+    """
+    if names is None:
+        names = values.dtype.names if isinstance(values, np.ndarray) else list(values)
+    columns = [np.asarray(values[name], dtype=float) for name in names]
+    shape = np.broadcast_shapes(*(c.shape for c in columns)) if n is None else (n,)
+
+    batch = np.empty(shape, dtype=parameter_dtype(names))
+    for name, column in zip(names, columns):
+        batch[name] = column
+    return batch
+
+
+def baseline_batch(profile, n, names=None):
+    """
+    n copies of a baseline profile as a structured array (see to_batch),
+    ready to have some columns overwritten by samples.
+    """
+    return to_batch(_get_profile(profile), n, names)
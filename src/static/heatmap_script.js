@@ -6,6 +6,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const inputDropdown1 = document.getElementById('inputDropdown1');
     const inputDropdown2 = document.getElementById('inputDropdown2');
     const outputDropdown = document.getElementById('outputDropdown');
+    const adaptiveToggle = document.getElementById('adaptiveToggle');
     const customPlotContainer = document.getElementById('customPlotContainer');  // Targeting the second plot container
 
     generatePlotButton.addEventListener('click', async () => {
@@ -14,17 +15,91 @@ document.addEventListener('DOMContentLoaded', () => {
         const output = outputDropdown.value;
 
         try {
-            const response = await fetch(`/generate_custom_plot?input1=${input1}&input2=${input2}&output=${output}`);
+            const route = adaptiveToggle.checked ? '/generate_adaptive_heatmap' : '/generate_custom_plot';
+            const response = await fetch(`${route}?input1=${input1}&input2=${input2}&output=${output}`);
             if (!response.ok) {
                 throw new Error('Failed to fetch the plot');
             }
 
             const data = await response.json();
             customPlotContainer.innerHTML = `<img src="data:image/png;base64,${data.plot}" alt="Generated Custom Plot">`;
+            if (adaptiveToggle.checked) {
+                customPlotContainer.innerHTML += `<p>${data.n_evaluations} of ${data.uniform_evaluations} grid points solved in ${data.cells} cells.</p>`;
+            }
         } catch (error) {
             console.error('Error displaying the plot:', error);
             customPlotContainer.innerHTML = `<p style="color: red;">Error displaying the plot. Check the console for details.</p>`;
         }
     });
 
+    // Tiled pan and zoom view: a window of up to TILES_PER_SIDE x TILES_PER_SIDE
+    // tiles from /heatmap_tiles, with tile (0, 0) at the top left
+    const TILES_PER_SIDE = 4;
+    const TILE_PIXELS = 128;
+    const MAX_ZOOM = 12;
+    const tileGrid = document.getElementById('tileGrid');
+    const tileInfo = document.getElementById('tileInfo');
+    const tileView = { zoom: 0, x: 0, y: 0 };
+
+    function tilesPerSide() {
+        return Math.min(TILES_PER_SIDE, 2 ** tileView.zoom);
+    }
+
+    function clampTileView() {
+        const maxStart = 2 ** tileView.zoom - tilesPerSide();
+        tileView.x = Math.max(0, Math.min(tileView.x, maxStart));
+        tileView.y = Math.max(0, Math.min(tileView.y, maxStart));
+    }
+
+    function showTiles() {
+        const input1 = inputDropdown1.value;
+        const input2 = inputDropdown2.value;
+        const output = outputDropdown.value;
+        const side = tilesPerSide();
+
+        tileGrid.style.gridTemplateColumns = `repeat(${side}, ${TILE_PIXELS * TILES_PER_SIDE / side}px)`;
+        tileGrid.innerHTML = '';
+        for (let row = 0; row < side; row++) {
+            for (let col = 0; col < side; col++) {
+                const img = document.createElement('img');
+                img.src = `/heatmap_tiles/${input1}/${input2}/${output}/${tileView.zoom}/${tileView.x + col}/${tileView.y + row}`;
+                img.style.width = '100%';
+                img.style.imageRendering = 'pixelated';
+                img.alt = `${output} tile`;
+                tileGrid.appendChild(img);
+            }
+        }
+        tileInfo.textContent = `${output} over ${input1} (x) and ${input2} (y), zoom ${tileView.zoom}`;
+    }
+
+    function moveTiles(dx, dy) {
+        tileView.x += dx;
+        tileView.y += dy;
+        clampTileView();
+        showTiles();
+    }
+
+    function zoomTiles(step) {
+        const zoom = Math.max(0, Math.min(MAX_ZOOM, tileView.zoom + step));
+        if (zoom === tileView.zoom) {
+            return;
+        }
+        // Keep the center of the view in place
+        const center = (2 ** step) * (tileView.x + tilesPerSide() / 2);
+        const middle = (2 ** step) * (tileView.y + tilesPerSide() / 2);
+        tileView.zoom = zoom;
+        tileView.x = Math.round(center - tilesPerSide() / 2);
+        tileView.y = Math.round(middle - tilesPerSide() / 2);
+        clampTileView();
+        showTiles();
+    }
+
+    document.getElementById('showTilesButton').addEventListener('click', showTiles);
+    document.getElementById('tileZoomIn').addEventListener('click', () => zoomTiles(1));
+    document.getElementById('tileZoomOut').addEventListener('click', () => zoomTiles(-1));
+    document.getElementById('tileLeft').addEventListener('click', () => moveTiles(-1, 0));
+    document.getElementById('tileRight').addEventListener('click', () => moveTiles(1, 0));
+    document.getElementById('tileUp').addEventListener('click', () => moveTiles(0, -1));
+    document.getElementById('tileDown').addEventListener('click', () => moveTiles(0, 1));
+
 });
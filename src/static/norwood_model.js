@@ -0,0 +1,215 @@
+// =============================================
+// Client-side port of the steady-state model in
+// Norwood_Circulation_Solver_Functions.py, used by script.js to answer
+// /process and /calculate_condition_values without a round trip.
+//
+// The 4x4 flow/pressure system and the 2x2 saturation system are solved
+// in closed form. Error messages match the Python solvers. Keep in sync
+// with the Python side via norwood_model_vectors.json:
+//     python generate_model_vectors.py          (regenerate)
+//     python generate_model_vectors.py --check  (verify Python and JS)
+// =============================================
+
+const NorwoodModel = (() => {
+  const DEFAULT_BSA = 0.25; // representative infant body surface area in m^2
+  const DEFAULT_S_PV = 0.99;
+
+  // Format a number the way Python's repr(float) does, so error messages
+  // read exactly like the server's.
+  function pyFloat(value) {
+    if (Number.isNaN(value)) return "nan";
+    if (!Number.isFinite(value)) return value > 0 ? "inf" : "-inf";
+    if (value === 0) return Object.is(value, -0) ? "-0.0" : "0.0";
+
+    const magnitude = Math.abs(value);
+    if (magnitude < 1e-4 || magnitude >= 1e16) {
+      const [mantissa, exponent] = value.toExponential().split("e");
+      const sign = exponent[0] === "-" ? "-" : "+";
+      const digits = exponent.replace(/^[+-]/, "").padStart(2, "0");
+      return `${mantissa}e${sign}${digits}`;
+    }
+
+    const text = String(value);
+    return Number.isInteger(value) ? `${text}.0` : text;
+  }
+
+  function checkPositive(values) {
+    for (const [name, value] of Object.entries(values)) {
+      if (value <= 0) {
+        throw new Error(`${name} must be positive (got ${pyFloat(value)}).`);
+      }
+    }
+  }
+
+  // Both models reduce to P_a = (1 + a) P_v for a model-specific gain a;
+  // the volume constraint C_A P_a + C_V P_v = V_total then fixes P_v.
+  function solveFromGain(a, C_A, C_V, R_p, R_s, V_total) {
+    const P_v = V_total / (C_A * (1 + a) + C_V);
+    const P_a = (1 + a) * P_v;
+    return {
+      Q_s: (P_a - P_v) / R_s,
+      Q_p: (P_a - P_v) / R_p,
+      P_a,
+      P_v,
+    };
+  }
+
+  function flowPressureSolver1(C_dia, C_sys, C_A, C_V, HR, R_p, R_s, V_total) {
+    checkPositive({ C_dia, C_sys, C_A, C_V, HR, R_p, R_s, V_total });
+
+    const G = 1 / R_s + 1 / R_p;
+    const a = (HR * (C_dia - C_sys)) / (G + HR * C_sys);
+    return solveFromGain(a, C_A, C_V, R_p, R_s, V_total);
+  }
+
+  function flowPressureSolver2(C_dia, C_A, C_V, HR, R_p, R_s, V_total, EF) {
+    checkPositive({ C_dia, C_A, C_V, HR, R_p, R_s, V_total, EF });
+    if (EF > 1) {
+      throw new Error(`EF must be less than or equal to 1 (got ${pyFloat(EF)}).`);
+    }
+
+    const G = 1 / R_s + 1 / R_p;
+    const a = (HR * EF * C_dia) / G;
+    return solveFromGain(a, C_A, C_V, R_p, R_s, V_total);
+  }
+
+  function saturationSolver(Q_s, Q_p, Hb, VO2, S_pv = DEFAULT_S_PV) {
+    checkPositive({ Q_s, Q_p, Hb, VO2, S_pv });
+
+    const oxygenCapacity = 1.34 * Hb * 10.0; // mL O2 / L blood
+    const S_m = S_pv - VO2 / (oxygenCapacity * Q_p);
+    const S_sv = S_m - VO2 / (oxygenCapacity * Q_s);
+    return { S_m, S_sv, OD2: oxygenCapacity * S_m * Q_s };
+  }
+
+  function indexedCvo2ToVo2(indexedCvo2, bsa = DEFAULT_BSA) {
+    return indexedCvo2 * bsa;
+  }
+
+  function validatePhysiology(S_m, S_sv, OD2) {
+    if (!(S_m >= 0 && S_m <= 1)) {
+      throw new Error(`Non-physiologic mixed saturation: ${S_m.toFixed(4)}`);
+    }
+    if (!(S_sv >= 0 && S_sv <= 1)) {
+      throw new Error(`Non-physiologic systemic venous saturation: ${S_sv.toFixed(4)}`);
+    }
+    if (OD2 < 0) {
+      throw new Error(`Non-physiologic oxygen delivery: ${OD2.toFixed(4)}`);
+    }
+  }
+
+  function round(value, digits) {
+    return Number(value.toFixed(digits));
+  }
+
+  // Same result as POST /process (slider page, C_sys model)
+  function process(p) {
+    try {
+      const flow = flowPressureSolver1(p.C_dia, p.C_sys, p.C_A, p.C_V, p.HR, p.R_p, p.R_s, p.V_total);
+      const sat = saturationSolver(flow.Q_s, flow.Q_p, p.Hb, indexedCvo2ToVo2(p.CVO2));
+      validatePhysiology(sat.S_m, sat.S_sv, sat.OD2);
+
+      return {
+        Q_s: round(flow.Q_s, 2),
+        Q_p: round(flow.Q_p, 2),
+        P_a: round(flow.P_a, 2),
+        P_v: round(flow.P_v, 2),
+        S_m: round(sat.S_m, 4),
+        S_sv: round(sat.S_sv, 4),
+        OD2: round(sat.OD2, 2),
+      };
+    } catch (error) {
+      throw new Error(`Failed to process inputs: ${error.message}`);
+    }
+  }
+
+  // Same result as POST /calculate_condition_values (conditions page, EF model)
+  function calculateConditionValues(p) {
+    try {
+      const flow = flowPressureSolver2(p.C_dia, p.C_A, p.C_V, p.HR, p.R_p, p.R_s, p.V_total, p.EF);
+      const sat = saturationSolver(flow.Q_s, flow.Q_p, p.Hb, indexedCvo2ToVo2(p.CVO2));
+      validatePhysiology(sat.S_m, sat.S_sv, sat.OD2);
+
+      return {
+        Q_s: round(flow.Q_s, 2),
+        Q_p: round(flow.Q_p, 2),
+        Q_RV: round(flow.Q_s + flow.Q_p, 2),
+        P_a: round(flow.P_a, 2),
+        P_v: round(flow.P_v, 2),
+        S_m: round(sat.S_m, 4),
+        S_sv: round(sat.S_sv, 4),
+        OD2: round(sat.OD2, 2),
+        Qp_Qs: flow.Q_s !== 0 ? round(flow.Q_p / flow.Q_s, 4) : null,
+      };
+    } catch (error) {
+      throw new Error(`Failed to calculate condition values: ${error.message}`);
+    }
+  }
+
+  // Numbers in error messages may differ in the last bits between numpy
+  // and JS arithmetic, so compare them with a relative tolerance.
+  function messagesMatch(actual, expected, rtol) {
+    const number = /-?\d+(?:\.\d+)?(?:e[+-]\d+)?/g;
+    if (actual.replace(number, "#") !== expected.replace(number, "#")) return false;
+
+    const a = actual.match(number) || [];
+    const b = expected.match(number) || [];
+    return a.every((value, i) => Math.abs(Number(value) - Number(b[i])) <= rtol * Math.abs(Number(b[i])) + 1e-4);
+  }
+
+  // Run the shared test vectors; returns a list of failure descriptions
+  function checkVectors(vectors, rtol = 1e-10) {
+    const runners = {
+      flow_pressure_solver_1: (i) => flowPressureSolver1(i.C_dia, i.C_sys, i.C_A, i.C_V, i.HR, i.R_p, i.R_s, i.V_total),
+      flow_pressure_solver_2: (i) => flowPressureSolver2(i.C_dia, i.C_A, i.C_V, i.HR, i.R_p, i.R_s, i.V_total, i.EF),
+      saturation_solver: (i) => saturationSolver(i.Q_s, i.Q_p, i.Hb, i.VO2),
+      process,
+      calculate_condition_values: calculateConditionValues,
+    };
+
+    const failures = [];
+    vectors.cases.forEach((testCase, index) => {
+      const label = `case ${index} (${testCase.function})`;
+      let result;
+      try {
+        result = runners[testCase.function](testCase.inputs);
+      } catch (error) {
+        if (!("error" in testCase)) {
+          failures.push(`${label}: unexpected error "${error.message}"`);
+        } else if (!messagesMatch(error.message, testCase.error, rtol)) {
+          failures.push(`${label}: error "${error.message}", expected "${testCase.error}"`);
+        }
+        return;
+      }
+
+      if ("error" in testCase) {
+        failures.push(`${label}: expected error "${testCase.error}"`);
+        return;
+      }
+      for (const [key, expected] of Object.entries(testCase.outputs)) {
+        // Rounded outputs may land on the other side of a rounding boundary
+        const tol = testCase.decimals ? 10 ** -testCase.decimals[key] : rtol * Math.abs(expected);
+        if (expected === null ? result[key] !== null : !(Math.abs(result[key] - expected) <= tol)) {
+          failures.push(`${label}: ${key} = ${result[key]}, expected ${expected}`);
+        }
+      }
+    });
+    return failures;
+  }
+
+  return {
+    DEFAULT_BSA,
+    flowPressureSolver1,
+    flowPressureSolver2,
+    saturationSolver,
+    indexedCvo2ToVo2,
+    validatePhysiology,
+    process,
+    calculateConditionValues,
+    checkVectors,
+  };
+})();
+
+if (typeof module !== "undefined" && module.exports) {
+  module.exports = NorwoodModel;
+}
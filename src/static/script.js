@@ -353,6 +353,16 @@ const Conditions = (() => {
   }
 
   async function calculate(payload) {
+    // Solve in the browser when norwood_model.js is loaded; its results and
+    // error messages match the server routes.
+    if (typeof NorwoodModel !== "undefined") {
+      return addFlowRatio(
+        isConditionsPage()
+          ? NorwoodModel.calculateConditionValues(payload)
+          : NorwoodModel.process(payload),
+      );
+    }
+
     const response = await fetch(getCalculateEndpoint(), {
       method: "POST",
       headers: {
@@ -374,6 +384,10 @@ const Conditions = (() => {
       throw new Error(data.error || "Computation failed.");
     }
 
+    return addFlowRatio(data);
+  }
+
+  function addFlowRatio(data) {
     if (
       Number.isFinite(Number(data.Q_p)) &&
       Number.isFinite(Number(data.Q_s)) &&
@@ -387,6 +401,37 @@ const Conditions = (() => {
     return data;
   }
 
+  // One round trip for every scenario; results come back in request order.
+  async function calculateScenarios(baseline, scenarios) {
+    const response = await fetch("/compare_drug_scenarios", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({ baseline, scenarios }),
+    });
+
+    const rawText = await response.text();
+
+    let data;
+    try {
+      data = JSON.parse(rawText);
+    } catch (err) {
+      throw new Error("Backend did not return valid JSON.");
+    }
+
+    if (!response.ok) {
+      throw new Error(data.error || "Computation failed.");
+    }
+
+    return data.scenarios.map((scenario) => {
+      if (scenario.error) {
+        throw new Error(`${scenario.label}: ${scenario.error}`);
+      }
+      return addFlowRatio(scenario.data);
+    });
+  }
+
   function renderSliderResults(result) {
     const resultNode = el("result");
     const sliderResults = el("sliderResults");
@@ -756,20 +801,22 @@ const Conditions = (() => {
       }
 
       const entries = Object.entries(drugEffects);
-      const results = [];
-
-      for (const [key, drug] of entries) {
-        const modifiedInputs = applyDrugToInputs(baselineInputs, key);
-        const result = await calculate(modifiedInputs);
-
-        results.push({
-          key,
-          label: drug.label,
-          RS_pct: drug.RS_pct,
-          RP_pct: drug.RP_pct,
-          data: result,
-        });
-      }
+      const scenarioData = await calculateScenarios(
+        baselineInputs,
+        entries.map(([key, drug]) => ({
+          label: key,
+          R_s_factor: 1 + drug.RS_pct,
+          R_p_factor: 1 + drug.RP_pct,
+        })),
+      );
+
+      const results = entries.map(([key, drug], idx) => ({
+        key,
+        label: drug.label,
+        RS_pct: drug.RS_pct,
+        RP_pct: drug.RP_pct,
+        data: scenarioData[idx],
+      }));
 
       renderAllDrugComparison(results);
       toggleResults(true);
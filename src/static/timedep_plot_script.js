@@ -19,7 +19,7 @@ document.addEventListener('DOMContentLoaded', () => {
     P_sa_0: getVal("P_sa_0"),
     P_pa_0: getVal("P_pa_0"),
     t_end: getVal("t_end"),
-    dt: getVal("dt"),
+    dt: document.getElementById("dt_auto")?.checked ? "auto" : getVal("dt"),
   });
 
   try {
@@ -34,6 +34,9 @@ document.addEventListener('DOMContentLoaded', () => {
 
     const data = await response.json();
     plotContainer.innerHTML = `<img src="data:image/png;base64,${data.plot}" alt="Generated Plot">`;
+    if (data.dt_error !== undefined) {
+      plotContainer.innerHTML += `<p>dt = ${data.dt.toPrecision(3)} min (estimated error ${(100 * data.dt_error).toFixed(2)}%)</p>`;
+    }
   } catch (error) {
     console.error('Error displaying the plot:', error);
     plotContainer.innerHTML = `<p style="color:red;">Error: ${error.message}</p>`;
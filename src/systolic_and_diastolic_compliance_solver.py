@@ -1,6 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy as sp
 
 def systolic_and_diastolic_compliance_solver(P_v, HR, EF, Q_s, Q_p):
     """
@@ -45,8 +43,9 @@ def systolic_and_diastolic_compliance_solver(P_v, HR, EF, Q_s, Q_p):
     A = HR*EF*P_v
     b = (Q_s + Q_p)
 
-    x, residuals, rank, s= sp.linalg.lstsq(A, b)
-    print(x)
+    from scipy import linalg
+
+    x, residuals, rank, s= linalg.lstsq(A, b)
     C_dia = x[0][0]
 
     return C_dia
@@ -1,12 +1,112 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy as sp
 
-def time_dependent_norwood(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_end, dt):
+from parameters import get_baseline
+
+SCHEMES = ("backward_euler", "bdf2", "tr_bdf2")
+
+# TR-BDF2 stage fraction. With this choice the trapezoidal and BDF2 stages
+# have the same coefficient (gamma / 2), so they share one step matrix.
+TR_BDF2_GAMMA = 2 - np.sqrt(2)
+
+
+def _step_matrix(R_s, R_p, R_BTS, C_s, C_p, h):
+    """
+    Inverse of the step matrix: rows (1)-(6) unchanged and rows (7)-(8)
+    discretized as C (P - P_hat) / h = Q_in - Q_out, where P_hat and the
+    right-hand side carry the scheme's history terms. The matrix does not
+    depend on time, so it is inverted once per distinct h.
+    """
+    A = np.array([[R_s, 0, 0, 0, -1, 1, 0, 0],
+                  [0, 0, R_p, 0, 0, 0, -1, 1],
+                  [0, 0, R_BTS, 0, -1, 0, 1, 0],
+                  [0, 0, 0, 0, 0, -1, 0, 1],
+                  [1, 0, 1, 0, 0, 0, 0, 0],
+                  [0, 1, 0, 1, 0, 0, 0, 0],
+                  [-1, 1, 0, 0, C_s / h, 0, 0, 0],
+                  [0, 0, -1, 1, 0, 0, C_p / h, 0]], dtype=float)
+    return np.linalg.inv(A)
+
+
+def _integrate(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_end, dt, scheme, clip):
+    """
+    Time-step the Norwood circuit with the given scheme.
+
+    Unknowns are x = (Q_SA, Q_SV, Q_PA, Q_PV, P_SA, P_SV, P_PA, P_PV). The
+    algebraic rows (1)-(6) always hold at the new time; the schemes differ
+    only in how rows (7)-(8) approximate dP/dt:
+
+        backward_euler  C (P_n - P_{n-1}) = dt F_n
+        bdf2            C (3 P_n - 4 P_{n-1} + P_{n-2}) / 2 = dt F_n
+        tr_bdf2         a trapezoidal stage to t_{n-1} + gamma dt, then a
+                        BDF2 stage through P_{n-1}, P_gamma and P_n
+
+    where F = Q_in - Q_out of each compartment.
+
+    The initial pressures generally violate the algebraic rows, so the
+    first step is always backward Euler; its venous flows absorb the jump.
+    Its F is therefore unusable as history, and the second step of the
+    second-order schemes is a TR-BDF2 step, whose BDF2 stage depends only
+    on pressures.
+
+    If clip is True, negative flows and pressures are set to zero after
+    every solve (closed valves).
     """
-    Simulate the time-dependent Norwood circulation model using a backward
-    Euler discretization of the pressure ODEs and algebraic flow-pressure
-    relationships.
+    if scheme not in SCHEMES:
+        raise ValueError(f"scheme must be one of {SCHEMES}, got {scheme!r}")
+
+    t_vec = np.arange(0, t_end, dt)
+    X = np.full((len(t_vec), 8), np.nan)
+
+    gamma = TR_BDF2_GAMMA
+    h_be = dt
+    h_bdf2 = 2 * dt / 3
+    h_tr = gamma * dt / 2
+    inverses = {}
+
+    def solve(t, h, P_sa_hat, P_pa_hat, F_s=0.0, F_p=0.0):
+        """
+        One linear solve. Returns the reported state (clipped if requested)
+        and the unclipped compartment net inflows F_s, F_p for use as history.
+        """
+        if h not in inverses:
+            inverses[h] = _step_matrix(R_s, R_p, R_BTS, C_s, C_p, h)
+        Q_v = Q_Ao(t)
+        b = np.array([0, 0, 0, 0, Q_v, Q_v, C_s / h * P_sa_hat + F_s, C_p / h * P_pa_hat + F_p])
+        x = inverses[h] @ b
+        F = (x[0] - x[1], x[2] - x[3])
+        if clip:
+            np.maximum(x, 0, out=x)
+        return x, F
+
+    def tr_bdf2_step(t_n, x_prev, F_prev):
+        x_g, F_g = solve(t_n - (1 - gamma) * dt, h_tr, x_prev[4], x_prev[6], *F_prev)
+        w = 1 / (gamma * (2 - gamma))
+        v = (1 - gamma)**2 * w
+        return solve(t_n, h_tr, w * x_g[4] - v * x_prev[4], w * x_g[6] - v * x_prev[6])
+
+    # Clipping changes the reported flows and the pressures carried forward,
+    # as in backward Euler; the flow history F stays unclipped so that the
+    # volume balance of the second-order schemes holds
+    F = None
+    for i, t_n in enumerate(t_vec):
+        if i == 0:
+            X[i], F = solve(t_n, h_be, P_sa_0, P_pa_0)
+        elif scheme == "backward_euler":
+            X[i], F = solve(t_n, h_be, X[i-1, 4], X[i-1, 6])
+        elif i == 1 or scheme == "tr_bdf2":
+            X[i], F = tr_bdf2_step(t_n, X[i-1], F)
+        else:
+            X[i], F = solve(t_n, h_bdf2, (4 * X[i-1, 4] - X[i-2, 4]) / 3, (4 * X[i-1, 6] - X[i-2, 6]) / 3)
+
+    return (t_vec,) + tuple(X[:, k] for k in range(8))
+
+
+def time_dependent_norwood(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_end, dt,
+                           scheme="backward_euler"):
+    """
+    Simulate the time-dependent Norwood circulation model using an implicit
+    discretization (backward Euler by default) of the pressure ODEs and
+    algebraic flow-pressure relationships.
 
     This function solves the following system at each time t:
 
@@ -19,7 +119,7 @@ def time_dependent_norwood(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_en
         (7) C_S dP_SA/dt = Q_SA - Q_SV
         (8) C_P dP_PA/dt = Q_PA - Q_PV
 
-    with finite-difference approximation
+    with, for the default scheme, the finite-difference approximation
 
         dP/dt ≈ (P(t_n) - P(t_{n-1})) / dt.
 
@@ -51,6 +151,12 @@ def time_dependent_norwood(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_en
         End time of the simulation  [min].
     dt : float, >0
         Time step for discretization  [min].
+    scheme : str, optional
+        "backward_euler" (default, first order), or one of the second-order
+        schemes "bdf2" and "tr_bdf2". Both damp errors in the venous flows
+        (the derivatives of algebraic pressures); the plain trapezoidal
+        rule does not, and every valve opening or closing leaves a
+        persistent step-to-step oscillation, so it is not offered.
 
     Returns
     -------
@@ -77,8 +183,8 @@ def time_dependent_norwood(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_en
     -----
     Wood units are defined as mmHg·min/L.
     Compliance units mL/mmHg are equivalent to L/mmHg up to a constant factor.
-    The linear system is solved using scipy.linalg.lstsq to accommodate
-    potential singularity from algebraic constraints.
+    The step matrix does not change between steps, so it is inverted once
+    per step size instead of solved at every step.
     """
     if R_s <= 0:
         raise ValueError(f"R_s must be > 0 (Wood units), got {R_s}")
@@ -109,68 +215,16 @@ def time_dependent_norwood(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_en
     
 
     if dt>t_end:
-        raise print(f'dt > t_end ({dt} > {t_end})\n')
-    
+        raise ValueError(f"dt must be <= t_end, got dt={dt} > t_end={t_end}")
 
+    return _integrate(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_end, dt, scheme, clip=False)
 
-    t_vec = np.arange(0, t_end, dt)
-    Q_sa = np.full(len(t_vec), np.nan)
-    Q_sv = np.full(len(t_vec), np.nan)
-    Q_pa = np.full(len(t_vec), np.nan)
-    Q_pv = np.full(len(t_vec), np.nan)
-    P_sa = np.full(len(t_vec), np.nan)
-    P_sv = np.full(len(t_vec), np.nan)
-    P_pa = np.full(len(t_vec), np.nan)
-    P_pv = np.full(len(t_vec), np.nan)
-
-    for i in range(len(t_vec)):
-        Q_v = Q_Ao(t_vec[i])
-        A = np.array([[R_s, 0, 0, 0, -1, 1, 0, 0],
-                        [0, 0, R_p, 0, 0, 0, -1, 1],
-                        [0, 0, R_BTS, 0, -1, 0, 1, 0],
-                        [0, 0, 0, 0, 0, -1, 0, 1],
-                        [1, 0, 1, 0, 0, 0, 0, 0],
-                        [0, 1, 0, 1, 0, 0, 0, 0],
-                        [-dt, dt, 0, 0, C_s, 0, 0, 0],
-                        [0, 0, -dt, dt, 0, 0, C_p, 0]])
-        if i==0:        
-            b = np.array([[0],
-                        [0],
-                        [0],
-                        [0],
-                        [Q_v],
-                        [Q_v],
-                        [P_sa_0*C_s],
-                        [P_pa_0*C_p]])
-        else:
-            b = np.array([[0],
-                        [0],
-                        [0],
-                        [0],
-                        [Q_v],
-                        [Q_v],
-                        [P_sa[i-1]*C_s],
-                        [P_pa[i-1]*C_p]])
-        
-        x, residuals, rank, s= sp.linalg.lstsq(A, b)
-        Q_sa[i] = x[0, 0]
-        Q_sv[i] = x[1, 0]
-        Q_pa[i] = x[2, 0]
-        Q_pv[i] = x[3, 0]
-        P_sa[i] = x[4, 0]
-        P_sv[i] = x[5, 0]
-        P_pa[i] = x[6, 0]
-        P_pv[i] = x[7, 0]
-
-
-
-    return t_vec, Q_sa, Q_sv, Q_pa, Q_pv, P_sa, P_sv, P_pa, P_pv
-
-def time_dependent_norwood_valve(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_end, dt):
+def time_dependent_norwood_valve(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_end, dt,
+                                 scheme="backward_euler"):
     """
-    Simulate the time-dependent Norwood circulation model using a backward
-    Euler discretization of the pressure ODEs and algebraic flow-pressure
-    relationships.
+    Simulate the time-dependent Norwood circulation model using an implicit
+    discretization (backward Euler by default) of the pressure ODEs and
+    algebraic flow-pressure relationships.
 
     This function solves the following system at each time t:
 
@@ -183,7 +237,7 @@ def time_dependent_norwood_valve(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao
         (7) C_S dP_SA/dt = Q_SA - Q_SV
         (8) C_P dP_PA/dt = Q_PA - Q_PV
 
-    with finite-difference approximation
+    with, for the default scheme, the finite-difference approximation
 
         dP/dt ≈ (P(t_n) - P(t_{n-1})) / dt.
 
@@ -215,6 +269,12 @@ def time_dependent_norwood_valve(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao
         End time of the simulation  [min].
     dt : float, >0
         Time step for discretization  [min].
+    scheme : str, optional
+        "backward_euler" (default, first order), or one of the second-order
+        schemes "bdf2" and "tr_bdf2". Both damp errors in the venous flows
+        (the derivatives of algebraic pressures); the plain trapezoidal
+        rule does not, and every valve opening or closing leaves a
+        persistent step-to-step oscillation, so it is not offered.
 
     Returns
     -------
@@ -241,8 +301,8 @@ def time_dependent_norwood_valve(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao
     -----
     Wood units are defined as mmHg·min/L.
     Compliance units mL/mmHg are equivalent to L/mmHg up to a constant factor.
-    The linear system is solved using scipy.linalg.lstsq to accommodate
-    potential singularity from algebraic constraints.
+    The step matrix does not change between steps, so it is inverted once
+    per step size instead of solved at every step.
     """
     if R_s <= 0:
         raise ValueError(f"R_s must be > 0 (Wood units), got {R_s}")
@@ -273,81 +333,9 @@ def time_dependent_norwood_valve(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao
     
 
     if dt>t_end:
-        raise print(f'dt > t_end ({dt} > {t_end})\n')
-    
-
+        raise ValueError(f"dt must be <= t_end, got dt={dt} > t_end={t_end}")
 
-    t_vec = np.arange(0, t_end, dt)
-    Q_sa = np.full(len(t_vec), np.nan)
-    Q_sv = np.full(len(t_vec), np.nan)
-    Q_pa = np.full(len(t_vec), np.nan)
-    Q_pv = np.full(len(t_vec), np.nan)
-    P_sa = np.full(len(t_vec), np.nan)
-    P_sv = np.full(len(t_vec), np.nan)
-    P_pa = np.full(len(t_vec), np.nan)
-    P_pv = np.full(len(t_vec), np.nan)
-
-    for i in range(len(t_vec)):
-        Q_v = Q_Ao(t_vec[i])
-        A = np.array([[R_s, 0, 0, 0, -1, 1, 0, 0],
-                        [0, 0, R_p, 0, 0, 0, -1, 1],
-                        [0, 0, R_BTS, 0, -1, 0, 1, 0],
-                        [0, 0, 0, 0, 0, -1, 0, 1],
-                        [1, 0, 1, 0, 0, 0, 0, 0],
-                        [0, 1, 0, 1, 0, 0, 0, 0],
-                        [-dt, dt, 0, 0, C_s, 0, 0, 0],
-                        [0, 0, -dt, dt, 0, 0, C_p, 0]])
-        if i==0:        
-            b = np.array([[0],
-                        [0],
-                        [0],
-                        [0],
-                        [Q_v],
-                        [Q_v],
-                        [P_sa_0*C_s],
-                        [P_pa_0*C_p]])
-        else:
-            b = np.array([[0],
-                        [0],
-                        [0],
-                        [0],
-                        [Q_v],
-                        [Q_v],
-                        [P_sa[i-1]*C_s],
-                        [P_pa[i-1]*C_p]])
-        
-        x, residuals, rank, s= sp.linalg.lstsq(A, b)
-        
-
-        if x[0, 0] < 0:
-            x[0, 0] = 0
-        if x[1, 0] < 0:
-            x[1, 0] = 0
-        if x[2, 0] < 0:
-            x[2, 0] = 0
-        if x[3, 0] < 0:
-            x[3, 0] = 0
-        if x[4, 0] < 0:
-            x[4, 0] = 0
-        if x[5, 0] < 0:
-            x[5, 0] = 0
-        if x[6, 0] < 0:
-            x[6, 0] = 0
-        if x[7, 0] < 0:
-            x[7, 0] = 0
-        
-        Q_sa[i] = x[0, 0]
-        Q_sv[i] = x[1, 0]
-        Q_pa[i] = x[2, 0]
-        Q_pv[i] = x[3, 0]
-        P_sa[i] = x[4, 0]
-        P_sv[i] = x[5, 0]
-        P_pa[i] = x[6, 0]
-        P_pv[i] = x[7, 0]
-
-
-
-    return t_vec, Q_sa, Q_sv, Q_pa, Q_pv, P_sa, P_sv, P_pa, P_pv
+    return _integrate(R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0, Q_Ao, t_end, dt, scheme, clip=True)
 
 
 def Q_Ao(t):
@@ -368,6 +356,9 @@ def Q_Ao(t):
 
 import math
 
+# Waveform parameters of Q_Ao_2, looked up once rather than on every call
+AORTIC_INFLOW = get_baseline("aortic_inflow")
+
 def Q_Ao_2(t):
     """
     Physiologically smoother neo-aortic valve flow waveform.
@@ -383,12 +374,12 @@ def Q_Ao_2(t):
     """
 
 
-    hr_bpm=140              # neonatal / young infant Norwood-ish default
-    weight_kg=3.5
-    co_ml_per_kg_min=250.0  # target mean cardiac output
-    ejection_fraction=0.5  # fraction of cycle spent ejecting
-    alpha=2.2               # controls upstroke
-    beta=3.8                 # controls downslope; peak occurs early
+    hr_bpm = AORTIC_INFLOW["HR"]                                    # neonatal / young infant Norwood-ish default
+    weight_kg = AORTIC_INFLOW["weight_kg"]
+    co_ml_per_kg_min = AORTIC_INFLOW["CO_per_kg"]                   # target mean cardiac output
+    ejection_fraction = AORTIC_INFLOW["ejection_fraction_of_cycle"]  # fraction of cycle spent ejecting
+    alpha = AORTIC_INFLOW["alpha"]                                  # controls upstroke
+    beta = AORTIC_INFLOW["beta"]                                    # controls downslope; peak occurs early
 
 
     # Cardiac cycle length in minutes
@@ -0,0 +1,287 @@
+"""
+Accuracy versus cost of the time step of the time-dependent models.
+
+Runs time_dependent_norwood or time_dependent_norwood_valve at a ladder of
+dt values, measures each run's error against a run at a much finer dt, and
+reports the error of every signal next to the wall time.
+
+Usage:
+    python timestep_study.py [--model valve|norwood] [--scheme backward_euler|bdf2|tr_bdf2]
+                             [--t-end 0.1] [--tol 0.01]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from parameters import get_baseline
+from time_dependent_model import AORTIC_INFLOW, SCHEMES, Q_Ao_2, time_dependent_norwood, time_dependent_norwood_valve
+
+MODELS = {
+    "norwood": time_dependent_norwood,
+    "valve": time_dependent_norwood_valve,
+}
+
+SIGNALS = ("Q_sa", "Q_sv", "Q_pa", "Q_pv", "P_sa", "P_sv", "P_pa", "P_pv")
+
+NORMS = ("rms", "max")
+
+# Defaults of /generate_timedep_plot
+DEFAULT_PARAMS = get_baseline("circuit")
+
+# Time steps in minutes; one cardiac cycle of Q_Ao_2 is 1/140 min
+DEFAULT_DT_LADDER = (5e-4, 2.5e-4, 1e-4, 5e-5, 2.5e-5, 1e-5)
+DEFAULT_TOLERANCE = 0.01
+
+# Cardiac cycle of Q_Ao_2 (min)
+Q_AO_2_CYCLE = 1 / AORTIC_INFLOW["HR"]
+
+
+def run_model(params, t_end, dt, model="valve", Q_Ao=Q_Ao_2, scheme="backward_euler"):
+    """
+    One time-dependent solve.
+
+    Parameters
+    ----------
+    params : dict
+        R_s, R_p, R_BTS, C_s, C_p, P_sa_0 and P_pa_0.
+    t_end, dt : float
+        End time and time step (min).
+    model : str, optional
+        "valve" (default) or "norwood".
+    Q_Ao : callable, optional
+        Aortic inflow waveform. Default is Q_Ao_2.
+    scheme : str, optional
+        Time integration scheme (see time_dependent_model.SCHEMES).
+
+    Returns
+    -------
+    t : ndarray
+        Time values (min).
+    signals : dict
+        Maps each name in SIGNALS to an array over t.
+    """
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {tuple(MODELS)} (got {model}).")
+    if dt >= t_end:
+        raise ValueError(f"dt must be smaller than t_end ({dt} >= {t_end}).")
+
+    t, *values = MODELS[model](
+        params["R_s"], params["R_p"], params["R_BTS"], params["C_s"], params["C_p"],
+        params["P_sa_0"], params["P_pa_0"], Q_Ao, t_end, dt, scheme=scheme,
+    )
+    return t, dict(zip(SIGNALS, values))
+
+
+def signal_errors(t, signals, t_ref, reference):
+    """
+    Error of each signal against a reference run on another time grid.
+
+    The reference is interpolated onto t. Errors are relative to the
+    range (max - min) of the reference signal, so a large offset, as in
+    the pressures, does not hide them. The first step of both runs
+    is left out: it jumps from the initial pressures to ones consistent
+    with Q_Ao(0), and the venous flows of that step scale with 1/dt.
+
+    Returns
+    -------
+    errors : dict
+        Maps each signal to {"max": ..., "rms": ...}.
+    """
+    errors = {}
+    for name in SIGNALS:
+        ref = np.interp(t[1:], t_ref[1:], reference[name][1:])
+        scale = np.ptp(reference[name][1:])
+        scale = scale if scale > 0 else 1.0
+        diff = np.abs(signals[name][1:] - ref) / scale
+        errors[name] = {"max": float(np.max(diff)), "rms": float(np.sqrt(np.mean(diff**2)))}
+    return errors
+
+
+def worst_error(errors, norm="rms"):
+    """
+    Largest error over every signal in the given norm.
+    """
+    if norm not in NORMS:
+        raise ValueError(f"norm must be one of {NORMS} (got {norm}).")
+    return max(e[norm] for e in errors.values())
+
+
+def timestep_study(params=None, model="valve", t_end=0.1, dts=DEFAULT_DT_LADDER, reference_dt=None,
+                   tol=DEFAULT_TOLERANCE, norm="rms", Q_Ao=Q_Ao_2, scheme="backward_euler"):
+    """
+    Error and wall time of the model at each dt in a ladder.
+
+    Parameters
+    ----------
+    params : dict, optional
+        Model parameters (see run_model). Default is DEFAULT_PARAMS.
+    model : str, optional
+        "valve" (default) or "norwood".
+    t_end : float, optional
+        End time (min). Default is 0.1.
+    dts : sequence of float, optional
+        Time steps to study (min). Steps not smaller than t_end are skipped.
+    reference_dt : float, optional
+        Time step of the reference run. Default is a quarter of the
+        smallest dt studied.
+    tol : float, optional
+        Relative error to meet. Default is 0.01 (1% of each signal's range).
+    norm : str, optional
+        "rms" (default) or "max"; the norm that tol applies to. The valve
+        model switches flows on and off, so its max-norm error converges
+        slowly near the switching times.
+    Q_Ao : callable, optional
+        Aortic inflow waveform. Default is Q_Ao_2.
+    scheme : str, optional
+        Time integration scheme of the studied runs. The reference run
+        uses the same scheme.
+
+    Returns
+    -------
+    study : dict
+        "reference_dt", "reference_seconds", "rows" (one per dt, largest
+        first, each with "dt", "steps", "seconds", "errors" per signal and
+        "error" in the chosen norm) and "selected_dt", the largest dt whose
+        error is within tol, or None if none is.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    dts = sorted((float(dt) for dt in dts if dt < t_end), reverse=True)
+    if not dts:
+        raise ValueError(f"No dt in the ladder is smaller than t_end = {t_end}.")
+    reference_dt = dts[-1] / 4 if reference_dt is None else float(reference_dt)
+
+    start = time.perf_counter()
+    t_ref, reference = run_model(params, t_end, reference_dt, model, Q_Ao, scheme)
+    reference_seconds = time.perf_counter() - start
+
+    rows = []
+    for dt in dts:
+        start = time.perf_counter()
+        t, signals = run_model(params, t_end, dt, model, Q_Ao, scheme)
+        seconds = time.perf_counter() - start
+
+        errors = signal_errors(t, signals, t_ref, reference)
+        rows.append({
+            "dt": dt,
+            "steps": len(t),
+            "seconds": seconds,
+            "errors": errors,
+            "error": worst_error(errors, norm),
+        })
+
+    within = [row["dt"] for row in rows if row["error"] <= tol]
+    return {
+        "reference_dt": reference_dt,
+        "reference_seconds": reference_seconds,
+        "rows": rows,
+        "selected_dt": max(within) if within else None,
+    }
+
+
+def select_dt(params, t_end, tol=DEFAULT_TOLERANCE, model="valve", dt_start=DEFAULT_DT_LADDER[0],
+              dt_min=1e-6, norm="rms", window=None, Q_Ao=Q_Ao_2, scheme="backward_euler"):
+    """
+    Largest time step of a halving sequence whose estimated error is within tol.
+
+    Backward Euler is first order, so the difference between the runs at
+    dt and dt/2 estimates the error of the dt/2 run; for the second-order
+    schemes it overestimates it about threefold. Halving stops at the
+    first estimate within tol, so the total cost is about twice that of
+    the accepted run, and that run is returned for reuse.
+
+    The pressures follow Q_Ao algebraically, so with a periodic Q_Ao the
+    error per cycle settles within the first cycles; window restricts the
+    halving to [0, window] and then runs the full t_end once at the
+    accepted dt.
+
+    Parameters
+    ----------
+    params : dict
+        Model parameters (see run_model).
+    t_end : float
+        End time (min).
+    tol : float, optional
+        Relative error to meet. Default is 0.01.
+    model : str, optional
+        "valve" (default) or "norwood".
+    dt_start : float, optional
+        First (largest) time step tried. Capped at t_end / 10.
+    dt_min : float, optional
+        Smallest time step tried. If tol is still not met there, that run
+        is returned with its estimated error.
+    norm : str, optional
+        "rms" (default) or "max".
+    window : float, optional
+        End time of the halving runs (min), e.g. a few cycles of Q_Ao.
+        Default is t_end.
+    Q_Ao : callable, optional
+        Aortic inflow waveform. Default is Q_Ao_2.
+    scheme : str, optional
+        Time integration scheme (see time_dependent_model.SCHEMES).
+
+    Returns
+    -------
+    dt : float
+        Accepted time step.
+    error : float
+        Its estimated relative error.
+    t, signals
+        The accepted run, as returned by run_model.
+    """
+    if tol <= 0:
+        raise ValueError(f"tol must be > 0 (got {tol}).")
+    if dt_min <= 0:
+        raise ValueError(f"dt_min must be > 0 (got {dt_min}).")
+
+    t_study = t_end if window is None else min(window, t_end)
+    dt = min(dt_start, t_study / 10)
+    t, signals = run_model(params, t_study, dt, model, Q_Ao, scheme)
+    while True:
+        fine_dt = dt / 2
+        t_fine, fine = run_model(params, t_study, fine_dt, model, Q_Ao, scheme)
+        # The dt/2 run is the reference for the dt run: first order makes
+        # their difference the error of the dt/2 run
+        error = worst_error(signal_errors(t, signals, t_fine, fine), norm)
+        if error <= tol or fine_dt / 2 < dt_min:
+            break
+        dt, t, signals = fine_dt, t_fine, fine
+
+    if t_study < t_end:
+        t_fine, fine = run_model(params, t_end, fine_dt, model, Q_Ao, scheme)
+    return fine_dt, error, t_fine, fine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=tuple(MODELS), default="valve")
+    parser.add_argument("--t-end", type=float, default=0.1, help="End time in minutes (default 0.1).")
+    parser.add_argument("--dt", type=float, nargs="+", default=DEFAULT_DT_LADDER, help="Time steps to study.")
+    parser.add_argument("--reference-dt", type=float, default=None,
+                        help="Time step of the reference run (default: smallest dt / 4).")
+    parser.add_argument("--tol", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Relative error to meet (default {DEFAULT_TOLERANCE}).")
+    parser.add_argument("--norm", choices=NORMS, default="rms")
+    parser.add_argument("--scheme", choices=SCHEMES, default="backward_euler")
+    args = parser.parse_args(argv)
+
+    study = timestep_study(model=args.model, t_end=args.t_end, dts=args.dt, reference_dt=args.reference_dt,
+                           tol=args.tol, norm=args.norm, scheme=args.scheme)
+
+    print(f"model={args.model} scheme={args.scheme} t_end={args.t_end} reference dt={study['reference_dt']:g} "
+          f"({study['reference_seconds']:.3f} s), {args.norm} error relative to each signal's range")
+    print(f"{'dt':>10} {'steps':>8} {'seconds':>9} " + " ".join(f"{name:>9}" for name in SIGNALS))
+    for row in study["rows"]:
+        errors = " ".join(f"{row['errors'][name][args.norm]:9.2e}" for name in SIGNALS)
+        print(f"{row['dt']:10.3g} {row['steps']:8d} {row['seconds']:9.3f} {errors}")
+
+    if study["selected_dt"] is None:
+        print(f"No dt meets tol={args.tol:g}")
+        return 1
+    print(f"Largest dt within tol={args.tol:g}: {study['selected_dt']:g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+import numpy as np
+
+from Norwood_Circulation_Solver_Functions import physiologic_mask
+from global_sensitivity import MODEL_INPUTS, GLOBAL_OUTPUTS, evaluate_steady_state
+
+DEFAULT_PERCENTILES = (2.5, 25.0, 50.0, 75.0, 97.5)
+DISTRIBUTIONS = ("normal", "lognormal", "uniform", "triangular")
+
+
+def sample_distribution(spec, size, rng):
+    """
+    Draw samples for one input.
+
+    Parameters
+    ----------
+    spec : float or dict
+        A float is a fixed value. A dict gives "dist" and its parameters:
+        normal (mean, sd), lognormal (mean, cv), uniform (low, high) or
+        triangular (low, mode, high).
+    size : int
+        Number of samples.
+    rng : numpy.random.Generator
+
+    Returns
+    -------
+    samples : ndarray, shape (size,)
+    """
+    if not isinstance(spec, dict):
+        return np.full(size, float(spec))
+
+    dist = spec.get("dist", "normal")
+    if dist == "normal":
+        return rng.normal(float(spec["mean"]), float(spec["sd"]), size)
+    if dist == "lognormal":
+        # Parameterized by the mean and coefficient of variation of the samples
+        sigma2 = np.log1p(float(spec["cv"])**2)
+        mu = np.log(float(spec["mean"])) - sigma2 / 2
+        return rng.lognormal(mu, np.sqrt(sigma2), size)
+    if dist == "uniform":
+        return rng.uniform(float(spec["low"]), float(spec["high"]), size)
+    if dist == "triangular":
+        return rng.triangular(float(spec["low"]), float(spec["mode"]), float(spec["high"]), size)
+
+    raise ValueError(f"Unknown distribution {dist}; choose from {DISTRIBUTIONS}.")
+
+
+class StreamingStats:
+    """
+    Constant-memory running statistics of a stream of values.
+
+    Mean and variance use Chan's parallel update of Welford's algorithm, so
+    each chunk is merged in one vectorized step, and min/max are exact.
+    Percentiles come from a KLL-style quantile sketch: level h holds values
+    that each stand for 2**h samples, and a level that grows past capacity
+    is sorted and every other value is promoted to the next level. The
+    error is in rank rather than in value, so it does not depend on the
+    spread of the values, and heavy-tailed outputs such as S_sv near
+    Q_s = 0 keep accurate percentiles.
+
+    Parameters
+    ----------
+    capacity : int, optional
+        Values kept per level. The rank error is at most about
+        log2(count / capacity) / capacity of the count. Default is 4096.
+    """
+
+    def __init__(self, capacity=4096):
+        if capacity < 2:
+            raise ValueError(f"capacity must be at least 2 (got {capacity}).")
+        self.capacity = capacity
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        # Alternate which half is promoted so rounding errors cancel
+        self._offsets = [0]
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        n = values.size
+        if n == 0:
+            return
+
+        chunk_mean = values.mean()
+        chunk_m2 = np.sum((values - chunk_mean)**2)
+        self._merge_moments(n, chunk_mean, chunk_m2, values.min(), values.max())
+
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compact()
+
+    def merge(self, other):
+        """
+        Add the values summarized by another StreamingStats.
+        """
+        if other.count == 0:
+            return
+        self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+        for h, items in enumerate(other.levels):
+            self._level(h)
+            self.levels[h] = np.concatenate((self.levels[h], items))
+        self._compact()
+
+    def _merge_moments(self, n, mean, m2, low, high):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta**2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    def _level(self, h):
+        while len(self.levels) <= h:
+            self.levels.append(np.empty(0))
+            self._offsets.append(0)
+
+    def _compact(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if items.size > self.capacity:
+                items = np.sort(items)
+                # An odd value out stays on this level
+                keep = items[-1:] if items.size % 2 else items[:0]
+                paired = items[:items.size - keep.size]
+                self._level(h + 1)
+                self.levels[h + 1] = np.concatenate((self.levels[h + 1], paired[self._offsets[h]::2]))
+                self._offsets[h] ^= 1
+                self.levels[h] = keep
+            h += 1
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float("nan")
+
+    def percentiles(self, q):
+        """
+        Approximate percentiles (0-100), interpolated linearly between
+        ranks as np.percentile does; exact while no level has been
+        compacted.
+        """
+        q = np.asarray(q, dtype=float)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items.size, 2.0**h) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+
+        # Each value sits at the middle of the ranks it stands for
+        ranks = np.cumsum(weights) - (weights + 1) / 2
+        result = np.interp(q / 100.0 * (self.count - 1), ranks, values)
+        return np.clip(result, self.min, self.max)
+
+
+def propagate_uncertainty(distributions, model=2, n_samples=100000, chunk_size=65536,
+                          percentiles=DEFAULT_PERCENTILES, seed=None):
+    """
+    Monte Carlo propagation of input uncertainty through the steady-state
+    solvers.
+
+    Samples are drawn and solved in chunks of chunk_size with the batched
+    solvers, and only streaming accumulators are kept between chunks, so
+    memory does not grow with n_samples.
+
+    Parameters
+    ----------
+    distributions : dict
+        Maps every name in MODEL_INPUTS[model] to a fixed value or a
+        distribution spec (see sample_distribution).
+    model : int, optional
+        Steady-state model, 1 or 2. Default is 2.
+    n_samples : int, optional
+        Total number of samples. Default is 100000.
+    chunk_size : int, optional
+        Samples per vectorized batch. Default is 65536.
+    percentiles : sequence of float, optional
+        Percentiles to report (0-100).
+    seed : int, optional
+        Random seed.
+
+    Returns
+    -------
+    result : dict
+        "n_samples", "n_invalid_inputs" (samples with non-positive inputs or
+        EF > 1, which are not solved), "p_non_physiologic" (fraction of all
+        samples that are invalid or fail physiologic_mask), and "outputs"
+        mapping each name in GLOBAL_OUTPUTS to its mean, std, min, max and
+        percentiles over the solved samples.
+    """
+    inputs = MODEL_INPUTS[model]
+    missing = [name for name in inputs if name not in distributions]
+    if missing:
+        raise ValueError(f"Missing distributions for: {', '.join(missing)}.")
+    if n_samples <= 0 or chunk_size <= 0:
+        raise ValueError("n_samples and chunk_size must be positive.")
+
+    rng = np.random.default_rng(seed)
+    stats = {name: StreamingStats() for name in GLOBAL_OUTPUTS}
+    n_invalid = 0
+    n_non_physiologic = 0
+
+    for start in range(0, n_samples, chunk_size):
+        size = min(chunk_size, n_samples - start)
+        samples = {name: sample_distribution(distributions[name], size, rng) for name in inputs}
+
+        valid = np.all([samples[name] > 0 for name in inputs], axis=0)
+        if "EF" in samples:
+            valid &= samples["EF"] <= 1
+        n_invalid += size - int(np.count_nonzero(valid))
+        if not valid.any():
+            continue
+
+        outputs = evaluate_steady_state({name: values[valid] for name, values in samples.items()}, model)
+        n_non_physiologic += int(np.count_nonzero(
+            ~physiologic_mask(outputs["S_m"], outputs["S_sv"], outputs["OD2"])
+        ))
+        for name in GLOBAL_OUTPUTS:
+            stats[name].update(outputs[name])
+
+    return {
+        "n_samples": n_samples,
+        "n_invalid_inputs": n_invalid,
+        "p_non_physiologic": (n_invalid + n_non_physiologic) / n_samples,
+        "outputs": {
+            name: {
+                "mean": s.mean if s.count else float("nan"),
+                "std": s.std,
+                "min": float(s.min) if s.count else float("nan"),
+                "max": float(s.max) if s.count else float("nan"),
+                "percentiles": dict(zip(percentiles, s.percentiles(percentiles).tolist())),
+            }
+            for name, s in stats.items()
+        },
+    }
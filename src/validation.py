@@ -0,0 +1,220 @@
+"""
+Vectorized validation of steady-state inputs and outputs.
+
+Each check sets one bit of a per-row status code, so a whole batch is
+validated with a few array comparisons and every problem of every row is
+known at once. A status of STATUS_OK (0) means the row passed; any other
+value can be split into messages with describe_status.
+"""
+import numpy as np
+
+STATUS_OK = 0
+STATUS_NOT_FINITE = 1 << 0
+STATUS_NOT_POSITIVE = 1 << 1
+STATUS_ABOVE_ONE = 1 << 2
+STATUS_FLOW_NOT_POSITIVE = 1 << 3
+STATUS_S_M_RANGE = 1 << 4
+STATUS_S_SV_RANGE = 1 << 5
+STATUS_OD2_NEGATIVE = 1 << 6
+
+STATUS_MESSAGES = {
+    STATUS_NOT_FINITE: "missing or infinite input",
+    STATUS_NOT_POSITIVE: "input not positive",
+    STATUS_ABOVE_ONE: "input above 1",
+    STATUS_FLOW_NOT_POSITIVE: "flow not positive",
+    STATUS_S_M_RANGE: "non-physiologic mixed saturation",
+    STATUS_S_SV_RANGE: "non-physiologic systemic venous saturation",
+    STATUS_OD2_NEGATIVE: "non-physiologic oxygen delivery",
+}
+
+# Inputs that are fractions and must also be at most 1
+FRACTION_INPUTS = ("EF",)
+
+ERRORS = ("raise", "mask")
+
+
+def input_codes(values, fractions=FRACTION_INPUTS):
+    """
+    Status code of every entry of every input.
+
+    Parameters
+    ----------
+    values : dict
+        Maps input names to floats or arrays, broadcast against each other.
+        Every input must be finite and positive.
+    fractions : sequence of str, optional
+        Inputs that must also be at most 1. Default is ("EF",).
+
+    Returns
+    -------
+    codes : dict
+        Maps each input name to a uint8 array of status bits.
+    """
+    names = list(values)
+    arrays = np.broadcast_arrays(*(np.asarray(values[name], dtype=float) for name in names))
+
+    codes = {}
+    for name, value in zip(names, arrays):
+        finite = np.isfinite(value)
+        code = np.where(finite, 0, STATUS_NOT_FINITE).astype(np.uint8)
+        code[finite & ~(value > 0)] |= STATUS_NOT_POSITIVE
+        if name in fractions:
+            code[finite & (value > 1)] |= STATUS_ABOVE_ONE
+        codes[name] = code
+    return codes
+
+
+def combine_codes(codes):
+    """
+    Per-row status: the bitwise OR of the codes of every input.
+    """
+    codes = list(codes.values())
+    status = np.zeros(np.broadcast_shapes(*(c.shape for c in codes)), dtype=np.uint8)
+    for code in codes:
+        status |= code
+    return status
+
+
+def input_status(values, fractions=FRACTION_INPUTS):
+    """
+    Per-row input status; see input_codes.
+    """
+    return combine_codes(input_codes(values, fractions))
+
+
+def output_status(S_m, S_sv, OD2, Q_s=None, Q_p=None):
+    """
+    Per-row status of solver outputs, the coded form of validate_physiology.
+
+    Saturations must lie in [0, 1], OD2 must be non-negative and, if given,
+    Q_s and Q_p must be positive. NaN outputs fail every check they enter.
+
+    Returns
+    -------
+    status : ndarray of uint8
+    """
+    flows = [flow for flow in (Q_s, Q_p) if flow is not None]
+    S_m, S_sv, OD2, *flows = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (S_m, S_sv, OD2, *flows))
+    )
+    status = np.zeros(S_m.shape, dtype=np.uint8)
+
+    status[~((S_m >= 0) & (S_m <= 1))] |= STATUS_S_M_RANGE
+    status[~((S_sv >= 0) & (S_sv <= 1))] |= STATUS_S_SV_RANGE
+    status[~(OD2 >= 0)] |= STATUS_OD2_NEGATIVE
+    for flow in flows:
+        status[~(flow > 0)] |= STATUS_FLOW_NOT_POSITIVE
+    return status
+
+
+def describe_status(code):
+    """
+    Messages of the bits set in one status code.
+    """
+    return [message for bit, message in STATUS_MESSAGES.items() if int(code) & bit]
+
+
+def status_counts(status):
+    """
+    Number of rows with each problem.
+
+    Returns
+    -------
+    counts : dict
+        Maps each message of STATUS_MESSAGES whose bit is set in any row to
+        its number of rows.
+    """
+    status = np.asarray(status)
+    counts = {}
+    for bit, message in STATUS_MESSAGES.items():
+        n = int(np.count_nonzero(status & bit))
+        if n:
+            counts[message] = n
+    return counts
+
+
+def row_reports(status, codes=None, limit=None):
+    """
+    One report per failed row.
+
+    Parameters
+    ----------
+    status : ndarray
+        Per-row status codes, e.g. from input_status or output_status.
+    codes : dict, optional
+        Per-input codes from input_codes; when given, each input problem is
+        prefixed with the input's name.
+    limit : int, optional
+        Report at most this many rows (the first ones).
+
+    Returns
+    -------
+    reports : list of dict
+        "row", "status" and "problems" (list of str) of each row whose
+        status is not STATUS_OK.
+    """
+    flat_status = np.ravel(status)
+    rows = np.flatnonzero(flat_status)
+    if limit is not None:
+        rows = rows[:limit]
+    flat_codes = {name: np.ravel(np.broadcast_to(code, np.shape(status))) for name, code in (codes or {}).items()}
+
+    reports = []
+    for row in rows:
+        problems = []
+        named = 0
+        for name, code in flat_codes.items():
+            for message in describe_status(code[row]):
+                problems.append(f"{name}: {message}")
+            named |= int(code[row])
+        problems.extend(describe_status(int(flat_status[row]) & ~named))
+        reports.append({"row": int(row), "status": int(flat_status[row]), "problems": problems})
+    return reports
+
+
+def _all_valid(value, fraction):
+    # NaN fails every comparison, so this also rules out NaN
+    below = value <= 1 if fraction else value < np.inf
+    return bool(np.all((value > 0) & below))
+
+
+def check_inputs(values, errors="raise", fractions=FRACTION_INPUTS):
+    """
+    Validate arrays of inputs at once.
+
+    Parameters
+    ----------
+    values : dict
+        Maps input names to floats or arrays (see input_codes). Pass them
+        before broadcasting, so that scalar inputs are checked once.
+    errors : str, optional
+        "raise" (default) raises one ValueError naming every failing input
+        with its number of bad entries; "mask" returns the status instead.
+    fractions : sequence of str, optional
+        Inputs that must also be at most 1.
+
+    Returns
+    -------
+    status : ndarray of uint8
+        Per-row status (all STATUS_OK if errors="raise" returns).
+    """
+    if errors not in ERRORS:
+        raise ValueError(f"errors must be one of {ERRORS} (got {errors}).")
+
+    # Most batches are entirely valid: one comparison per input settles
+    # that without building the per-input codes.
+    arrays = {name: np.asarray(value, dtype=float) for name, value in values.items()}
+    if all(_all_valid(value, name in fractions) for name, value in arrays.items()):
+        return np.zeros(np.broadcast_shapes(*(value.shape for value in arrays.values())), dtype=np.uint8)
+
+    codes = input_codes(arrays, fractions)
+    status = combine_codes(codes)
+    if errors == "raise" and status.any():
+        bad = []
+        for name, code in codes.items():
+            for bit, message in STATUS_MESSAGES.items():
+                n_bad = int(np.count_nonzero(code & bit))
+                if n_bad:
+                    bad.append(f"{name}: {message} ({n_bad} entries)")
+        raise ValueError("Invalid inputs: " + ", ".join(bad) + ".")
+    return status
@@ -0,0 +1,126 @@
+"""
+Check the time-integration schemes of time_dependent_model.py against the
+analytic solution of the linear circuit.
+
+With a smooth inflow Q_Ao(t) the circuit has a closed-form solution: the
+arterial flows split Q_Ao by resistance, the total stored volume
+C_S P_SA + C_P P_PA stays at its initial value, which fixes every pressure,
+and the venous flows are the arterial flows minus C dP/dt. Each scheme is
+run at a ladder of time steps; the script reports the error of every signal
+and the observed order of convergence, and fails if a scheme converges
+more slowly than its order or the pressures are not exact.
+
+Usage:
+    python verify_time_schemes.py
+"""
+import sys
+
+import numpy as np
+
+from parameters import get_baseline
+from time_dependent_model import SCHEMES, time_dependent_norwood, time_dependent_norwood_valve
+
+SIGNALS = ("Q_sa", "Q_sv", "Q_pa", "Q_pv", "P_sa", "P_sv", "P_pa", "P_pv")
+
+EXPECTED_ORDER = {"backward_euler": 1, "bdf2": 2, "tr_bdf2": 2}
+
+# Observed order may fall this far below the expected order
+ORDER_SLACK = 0.2
+
+PRESSURE_TOLERANCE = 1e-8
+
+CIRCUIT = get_baseline("circuit")
+
+# (name, model, mean inflow L/min, relative amplitude, period min, t_end min, time steps)
+# The slow case keeps every flow positive, so the valve model never clips.
+CASES = [
+    ("cardiac frequency", time_dependent_norwood, 0.875, 0.5, 1 / 140, 2 / 140,
+     [(1 / 140) / n for n in (50, 100, 200, 400)]),
+    ("slow, no valve", time_dependent_norwood, 0.875, 0.5, 1.0, 1.0, [0.02, 0.01, 0.005, 0.0025]),
+    ("slow, valve", time_dependent_norwood_valve, 0.875, 0.5, 1.0, 1.0, [0.02, 0.01, 0.005, 0.0025]),
+]
+
+
+def sinusoidal_inflow(mean, amplitude, period):
+    omega = 2 * np.pi / period
+
+    def Q_Ao(t):
+        return mean * (1 + amplitude * np.sin(omega * t))
+
+    def dQ_Ao(t):
+        return mean * amplitude * omega * np.cos(omega * t)
+
+    return Q_Ao, dQ_Ao
+
+
+def analytic_solution(t, Q_Ao, dQ_Ao, R_s, R_p, R_BTS, C_s, C_p, P_sa_0, P_pa_0):
+    """
+    Exact flows and pressures of the circuit at times t.
+    """
+    Q = Q_Ao(t)
+    dQ = dQ_Ao(t)
+    split_s = (R_p + R_BTS) / (R_s + R_p + R_BTS)
+    split_p = R_s / (R_s + R_p + R_BTS)
+
+    Q_sa, Q_pa = split_s * Q, split_p * Q
+    dQ_sa, dQ_pa = split_s * dQ, split_p * dQ
+
+    volume = C_s * P_sa_0 + C_p * P_pa_0
+    P_sv = (volume - C_s * R_s * Q_sa - C_p * R_p * Q_pa) / (C_s + C_p)
+    dP_sv = -(C_s * R_s * dQ_sa + C_p * R_p * dQ_pa) / (C_s + C_p)
+
+    return {
+        "Q_sa": Q_sa,
+        "Q_sv": Q_sa - C_s * (dP_sv + R_s * dQ_sa),
+        "Q_pa": Q_pa,
+        "Q_pv": Q_pa - C_p * (dP_sv + R_p * dQ_pa),
+        "P_sa": P_sv + R_s * Q_sa,
+        "P_sv": P_sv,
+        "P_pa": P_sv + R_p * Q_pa,
+        "P_pv": P_sv,
+    }
+
+
+def relative_errors(model, Q_Ao, dQ_Ao, t_end, dt, scheme):
+    """
+    Largest error of each signal relative to its largest exact value. The
+    first step, which absorbs the inconsistent initial pressures, is left out.
+    """
+    t, *values = model(**CIRCUIT, Q_Ao=Q_Ao, t_end=t_end, dt=dt, scheme=scheme)
+    exact = analytic_solution(t, Q_Ao, dQ_Ao, **CIRCUIT)
+    return {
+        name: float(np.max(np.abs(value[1:] - exact[name][1:])) / np.max(np.abs(exact[name][1:])))
+        for name, value in zip(SIGNALS, values)
+    }
+
+
+def main():
+    failures = []
+
+    for label, model, mean, amplitude, period, t_end, dts in CASES:
+        Q_Ao, dQ_Ao = sinusoidal_inflow(mean, amplitude, period)
+        print(f"{label} ({model.__name__})")
+
+        for scheme in SCHEMES:
+            errors = [relative_errors(model, Q_Ao, dQ_Ao, t_end, dt, scheme) for dt in dts]
+            flow_errors = [max(e["Q_sv"], e["Q_pv"]) for e in errors]
+            pressure_error = max(e[name] for e in errors for name in ("P_sa", "P_sv", "P_pa", "P_pv"))
+            order = np.log2(flow_errors[-2] / flow_errors[-1])
+
+            print(f"  {scheme:15s} venous flow error " + " ".join(f"{e:9.2e}" for e in flow_errors)
+                  + f"  order {order:4.2f}  pressure error {pressure_error:.1e}")
+
+            if order < EXPECTED_ORDER[scheme] - ORDER_SLACK:
+                failures.append(f"{label}: {scheme} order {order:.2f} < {EXPECTED_ORDER[scheme]}")
+            if pressure_error > PRESSURE_TOLERANCE:
+                failures.append(f"{label}: {scheme} pressure error {pressure_error:.1e}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Streaming statistics of uncertainty.py against exact NumPy results.
+"""
+import numpy as np
+import pytest
+
+from global_sensitivity import MODEL_INPUTS, evaluate_steady_state
+from parameters import get_baseline
+from uncertainty import DEFAULT_PERCENTILES, StreamingStats, propagate_uncertainty
+
+
+def _heavy_tailed_s_sv(n, seed=0):
+    """
+    S_sv of model 1 at the heatmap baseline with C_sys ~ U(0.005, 0.03).
+    S_sv diverges as Q_s approaches zero, so both tails are heavy.
+    """
+    rng = np.random.default_rng(seed)
+    samples = {name: np.full(n, value) for name, value in get_baseline("heatmap", MODEL_INPUTS[1]).items()}
+    samples["C_sys"] = rng.uniform(0.005, 0.03, n)
+    values = evaluate_steady_state(samples, 1)["S_sv"]
+    return values[np.isfinite(values)]
+
+
+def _rank_errors(values, estimates, q):
+    # Fraction of values at or below each estimate, against the target
+    return np.abs(np.searchsorted(np.sort(values), estimates, side="right") / values.size - np.asarray(q) / 100)
+
+
+@pytest.mark.parametrize("n_chunks", [1, 4, 13])
+def test_percentiles_of_heavy_tailed_output(n_chunks):
+    values = _heavy_tailed_s_sv(200_000)
+    stats = StreamingStats()
+    for chunk in np.array_split(values, n_chunks):
+        stats.update(chunk)
+
+    estimates = stats.percentiles(DEFAULT_PERCENTILES)
+    assert np.all(_rank_errors(values, estimates, DEFAULT_PERCENTILES) < 2e-3)
+    # The median is well inside the bulk, so its value is close too
+    assert estimates[2] == pytest.approx(np.median(values), abs=1e-2)
+
+
+def test_later_chunks_outside_first_chunk_range():
+    # A narrow first chunk followed by a Cauchy stream
+    rng = np.random.default_rng(1)
+    chunks = [rng.normal(0, 0.01, 1000)] + [rng.standard_cauchy(50_000) for _ in range(4)]
+    stats = StreamingStats()
+    for chunk in chunks:
+        stats.update(chunk)
+
+    values = np.concatenate(chunks)
+    estimates = stats.percentiles(DEFAULT_PERCENTILES)
+    assert np.all(_rank_errors(values, estimates, DEFAULT_PERCENTILES) < 2e-3)
+    assert stats.min == values.min() and stats.max == values.max()
+
+
+def test_exact_before_compaction():
+    values = np.random.default_rng(2).lognormal(0, 2, 3000)
+    stats = StreamingStats()
+    stats.update(values[:1000])
+    stats.update(values[1000:])
+
+    np.testing.assert_allclose(stats.percentiles(DEFAULT_PERCENTILES), np.percentile(values, DEFAULT_PERCENTILES))
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.std == pytest.approx(values.std(ddof=1))
+
+
+def test_merge_matches_single_stream():
+    values = _heavy_tailed_s_sv(100_000, seed=3)
+    left, right = StreamingStats(), StreamingStats()
+    left.update(values[:30_000])
+    right.update(values[30_000:])
+    left.merge(right)
+
+    assert left.count == values.size
+    assert left.mean == pytest.approx(values.mean())
+    assert np.all(_rank_errors(values, left.percentiles(DEFAULT_PERCENTILES), DEFAULT_PERCENTILES) < 2e-3)
+
+
+def test_memory_is_bounded():
+    stats = StreamingStats(capacity=256)
+    for chunk in np.array_split(np.random.default_rng(4).normal(size=500_000), 50):
+        stats.update(chunk)
+    assert sum(level.size for level in stats.levels) <= 256 * len(stats.levels)
+    assert len(stats.levels) <= 12
+
+
+def test_propagate_uncertainty_percentiles_across_chunks():
+    distributions = get_baseline("heatmap", MODEL_INPUTS[1])
+    distributions["C_sys"] = {"dist": "uniform", "low": 0.005, "high": 0.03}
+    result = propagate_uncertainty(distributions, model=1, n_samples=200_000, chunk_size=30_000, seed=0)
+
+    # The same draws in one pass: C_sys is the only random input
+    rng = np.random.default_rng(0)
+    c_sys = np.concatenate([rng.uniform(0.005, 0.03, size) for size in [30_000] * 6 + [20_000]])
+    samples = {name: np.full(c_sys.size, value) for name, value in get_baseline("heatmap", MODEL_INPUTS[1]).items()}
+    samples["C_sys"] = c_sys
+    exact = evaluate_steady_state(samples, 1)["S_sv"]
+    exact = exact[np.isfinite(exact)]
+
+    estimates = list(result["outputs"]["S_sv"]["percentiles"].values())
+    assert np.all(_rank_errors(exact, estimates, DEFAULT_PERCENTILES) < 2e-3)